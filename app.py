@@ -1,24 +1,34 @@
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, make_response
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
 from functools import wraps
-import sqlite3
+
+from studentapp import (assets, bootstrap, cache, compression, conditional, database, metrics, models, pagination,
+                        search, stats, templating, writebehind)
 
 app = Flask(__name__)
 app.jinja_env.autoescape = True  # pastikan autoescape aktif
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///students.db'
+database.configure(app)  # instance/students.db, WAL + pool bersama (studentapp/database.py)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.secret_key = 'some_secret_key'  # Added for session management
+app.config['STUDENTS_PAGE_SIZE'] = pagination.DEFAULT_PAGE_SIZE
+app.config['STUDENTS_STREAM_INDEX'] = False  # True: render daftar student secara streaming
+app.config['STUDENTS_CACHE_BACKEND'] = 'memory'  # 'memory', 'socket' (cache-server bersama) atau None
+app.config['STUDENTS_WRITE_BEHIND'] = False  # True: add/edit/delete lewat write-behind queue (group commit)
+app.config['STUDENTS_COMPRESSION'] = False  # True: gzip/brotli untuk response teks (studentapp/compression.py)
 db = SQLAlchemy(app)
-
-class Student(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    age = db.Column(db.Integer, nullable=False)
-    grade = db.Column(db.String(10), nullable=False)
-
-    def __repr__(self):
-        return f'<Student {self.name}>'
+listing_cache = cache.ListingCache.from_config(app.config)
+write_queue = writebehind.WriteBehindQueue.from_config(app.config)  # None jika write-behind nonaktif
+# /metrics (Prometheus): hanya admin atau scraper dengan STUDENTS_METRICS_TOKEN
+metrics.init_app(app, db, listing_cache=listing_cache, write_queue=write_queue,
+                 authorize=lambda: session.get('user_id') == 'admin')
+row_fragments = templating.init_app(app)  # bytecode cache Jinja di instance/jinja-cache + fragment cache baris student
+assets.init_app(app)  # CSS lokal (minify + fingerprint), tanpa CDN
+compression.init_app(app)  # aktif jika STUDENTS_COMPRESSION
+
+# Kolom id/name/age/grade + __repr__ dari studentapp/models.py (sama di ketiga varian)
+class Student(models.StudentMixin, db.Model):
+    pass
 
 def sanitize_text(value):
     if any(ch in value for ch in "<>"):
@@ -52,9 +62,41 @@ def logout():
 @app.route('/')
 @login_required
 def index():
-    # RAW Query
-    students = db.session.execute(text('SELECT * FROM student')).fetchall()
-    return render_template('index.html', students=students)
+    # Keyset pagination: ?after=<id> / ?before=<id> & ?limit=<n>
+    after, before, limit = pagination.parse_page_args(request.args, app.config['STUDENTS_PAGE_SIZE'])
+    stream = pagination.wants_stream(request.args, app.config['STUDENTS_STREAM_INDEX'])
+    # Cari/filter/sort: ?q=&grade=&age_min=&age_max=&sort= (studentapp/search.py)
+    try:
+        student_search = search.StudentSearch.from_args(request.args)
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
+
+    # Conditional GET: 304 tanpa query & render jika tabel belum berubah
+    conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+
+    try:
+        if stream:
+            page = student_search.page(db.session, 'student', limit, after=after, before=before, stream=True)
+            return conditional_get.tag(
+                pagination.stream_template('index.html', students=page.rows, page=page, search=student_search)
+            )
+
+        # Halaman di-cache sampai ada route yang mengubah data (invalidate)
+        page = listing_cache.get_or_load(
+            cache.SCOPE_ALL, (after, before, limit) + student_search.key(),
+            lambda: student_search.page(db.session, 'student', limit, after=after, before=before),
+            version=conditional_get.version
+        )
+    except pagination.CursorNotFound:
+        return "Error: Cursor tidak ditemukan", 404
+    return conditional_get.tag(
+        make_response(render_template('index.html', students=page.rows, page=page, search=student_search))
+    )
+
+def invalidate_listing(rows=None):
+    listing_cache.invalidate(cache.SCOPE_ALL)
 
 @app.route('/add', methods=['POST'])
 @login_required
@@ -64,29 +106,42 @@ def add_student():
     age = int(age_str)
     grade = sanitize_text(request.form['grade'])
 
-    connection = sqlite3.connect('instance/students.db')
-    cursor = connection.cursor()
+    if write_queue is not None:
+        # Write-behind: INSERT di-group-commit oleh writer thread, cache
+        # di-invalidate setelah commit
+        write_queue.execute(f"INSERT INTO student (name, age, grade) VALUES ('{name}', {age}, '{grade}')",
+                            on_commit=invalidate_listing, durability=writebehind.durability(request))
+        return redirect(url_for('index'))
 
-    # RAW Query
-    # db.session.execute(
-    #     text("INSERT INTO student (name, age, grade) VALUES (:name, :age, :grade)"),
-    #     {'name': name, 'age': age, 'grade': grade}
-    # )
-    # db.session.commit()
-    query = f"INSERT INTO student (name, age, grade) VALUES ('{name}', {age}, '{grade}')"
-    cursor.execute(query)
-    connection.commit()
-    cursor.close()
-    connection.close()
+    with database.connection(db) as connection:
+        cursor = connection.cursor()
+
+        # RAW Query
+        # db.session.execute(
+        #     text("INSERT INTO student (name, age, grade) VALUES (:name, :age, :grade)"),
+        #     {'name': name, 'age': age, 'grade': grade}
+        # )
+        # db.session.commit()
+        query = f"INSERT INTO student (name, age, grade) VALUES ('{name}', {age}, '{grade}')"
+        cursor.execute(query)
+        connection.commit()
+        cursor.close()
+    listing_cache.invalidate(cache.SCOPE_ALL)
     return redirect(url_for('index'))
 
 
 @app.route('/delete/<string:id>')
 @login_required
 def delete_student(id):
+    if write_queue is not None:
+        write_queue.execute(f"DELETE FROM student WHERE id={id}",
+                            on_commit=invalidate_listing, durability=writebehind.durability(request))
+        return redirect(url_for('index'))
+
     # RAW Query
     db.session.execute(text(f"DELETE FROM student WHERE id={id}"))
     db.session.commit()
+    listing_cache.invalidate(cache.SCOPE_ALL)
     return redirect(url_for('index'))
 
 
@@ -99,14 +154,39 @@ def edit_student(id):
         age = int(age_str)
         grade = sanitize_text(request.form['grade'])
 
+        if write_queue is not None:
+            write_queue.execute(f"UPDATE student SET name='{name}', age={age}, grade='{grade}' WHERE id={id}",
+                                on_commit=invalidate_listing, durability=writebehind.durability(request))
+            return redirect(url_for('index'))
+
         # RAW Query
         db.session.execute(text(f"UPDATE student SET name='{name}', age={age}, grade='{grade}' WHERE id={id}"))
         db.session.commit()
+        listing_cache.invalidate(cache.SCOPE_ALL)
         return redirect(url_for('index'))
     else:
+        conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+        if conditional_get.not_modified():
+            return conditional_get.response_304()
+
         # RAW Query
         student = db.session.execute(text(f"SELECT * FROM student WHERE id={id}")).fetchone()
-        return render_template('edit.html', student=student)
+        return conditional_get.tag(make_response(render_template('edit.html', student=student)))
+
+@app.route('/stats')
+@login_required
+def student_stats():
+    """Jumlah student per grade, kelompok umur, dan owner dari tabel agregat (studentapp/stats.py)"""
+    conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+    return conditional_get.tag(jsonify(stats.report(db.session)))
+
+@app.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    """Counter hit/miss/eviction cache listing untuk menentukan ukuran cache"""
+    return jsonify({**listing_cache.stats(), "row_fragments": row_fragments.stats()})
 
 # if __name__ == '__main__':
 #     with app.app_context():
@@ -114,5 +194,7 @@ def edit_student(id):
 #     app.run(debug=True)
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        # create_all + migrasi (studentapp/migrations.py), dilewati jika skema sudah sesuai
+        bootstrap.ensure_schema(db)
+    # Server development (reloader + debugger). Produksi: python -m studentapp serve
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -3,99 +3,41 @@ Flask Student Management App - SECURED VERSION
 Versi yang telah diperkuat keamanannya dari SQL Injection
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, make_response
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
 from functools import wraps
-import sqlite3
-import re
+
+from studentapp import (assets, audit, bootstrap, bulk, cache, compression, conditional, database, metrics,
+                        models, pagination, search, stats, templating, writebehind)
+# Validasi input (SECURED): regex dikompilasi sekali, grade lewat frozenset
+from studentapp.validation import validate_input, validate_id, validate_age, validate_grade
 
 app = Flask(__name__)
 app.jinja_env.autoescape = True  # pastikan autoescape aktif
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///students.db'
+database.configure(app)  # instance/students.db, WAL + pool bersama (studentapp/database.py)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.secret_key = 'some_secret_key'  # Added for session management
+app.config['STUDENTS_PAGE_SIZE'] = pagination.DEFAULT_PAGE_SIZE
+app.config['STUDENTS_STREAM_INDEX'] = False  # True: render daftar student secara streaming
+app.config['STUDENTS_CACHE_BACKEND'] = 'memory'  # 'memory', 'socket' (cache-server bersama) atau None
+app.config['STUDENTS_WRITE_BEHIND'] = False  # True: add/edit/delete lewat write-behind queue (group commit)
+app.config['STUDENTS_COMPRESSION'] = False  # True: gzip/brotli untuk response teks (studentapp/compression.py)
+app.config['STUDENTS_AUDIT'] = 'sqlite'  # audit log request: 'sqlite', 'jsonl' atau None (studentapp/audit.py)
 db = SQLAlchemy(app)
+listing_cache = cache.ListingCache.from_config(app.config)
+write_queue = writebehind.WriteBehindQueue.from_config(app.config)  # None jika write-behind nonaktif
+# /metrics (Prometheus): hanya admin atau scraper dengan STUDENTS_METRICS_TOKEN
+metrics.init_app(app, db, listing_cache=listing_cache, write_queue=write_queue,
+                 authorize=lambda: session.get('user_id') == 'admin')
+row_fragments = templating.init_app(app)  # bytecode cache Jinja di instance/jinja-cache + fragment cache baris student
+assets.init_app(app)  # CSS lokal (minify + fingerprint), tanpa CDN
+compression.init_app(app)  # aktif jika STUDENTS_COMPRESSION
+audit_log = audit.init_app(app)  # mutation + akses ditolak -> <db>-audit.db, ditulis per batch
 
-class Student(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    age = db.Column(db.Integer, nullable=False)
-    grade = db.Column(db.String(10), nullable=False)
-
-    def __repr__(self):
-        return f'<Student {self.name}>'
-
-# ============================================================
-# FUNGSI VALIDASI INPUT - DITAMBAHKAN UNTUK KEAMANAN
-# ============================================================
-
-def validate_input(value, field_name, max_length=100, allowed_pattern=r'^[a-zA-Z0-9\s\-\.]+$'):
-    """
-    Validasi input untuk mencegah SQL Injection dan serangan lainnya
-    
-    Args:
-        value: nilai input dari user
-        field_name: nama field untuk pesan error
-        max_length: panjang maksimum yang diizinkan
-        allowed_pattern: regex pattern karakter yang diizinkan
-    
-    Returns:
-        string yang sudah divalidasi
-    
-    Raises:
-        ValueError jika input tidak valid
-    """
-    if not value:
-        raise ValueError(f"{field_name} tidak boleh kosong")
-    
-    # Batasi panjang input
-    if len(value) > max_length:
-        raise ValueError(f"{field_name} maksimal {max_length} karakter")
-    
-    # Cek karakter yang diizinkan
-    if not re.match(allowed_pattern, value):
-        raise ValueError(f"{field_name} mengandung karakter tidak valid")
-    
-    # Blokir karakter berbahaya untuk XSS
-    if any(ch in value for ch in "<>"):
-        raise ValueError(f"{field_name} mengandung karakter berbahaya")
-    
-    return value.strip()
-
-def validate_id(id_value):
-    """
-    Validasi ID harus berupa integer positif
-    """
-    try:
-        id_int = int(id_value)
-        if id_int <= 0:
-            raise ValueError("ID harus positif")
-        return id_int
-    except (ValueError, TypeError):
-        raise ValueError("ID tidak valid")
-
-def validate_age(age_value):
-    """
-    Validasi umur harus integer antara 1-150
-    """
-    try:
-        age_int = int(age_value)
-        if age_int < 1 or age_int > 150:
-            raise ValueError("Umur harus antara 1-150")
-        return age_int
-    except (ValueError, TypeError):
-        raise ValueError("Umur tidak valid")
-
-def validate_grade(grade_value):
-    """
-    Validasi grade hanya A, B, C, D, E, F
-    """
-    valid_grades = ['A', 'B', 'C', 'D', 'E', 'F', 'A+', 'A-', 'B+', 'B-', 'C+', 'C-', 'D+', 'D-']
-    grade = grade_value.strip().upper()
-    if grade not in valid_grades:
-        raise ValueError(f"Grade harus salah satu dari: {', '.join(valid_grades)}")
-    return grade
+# Kolom id/name/age/grade + __repr__ dari studentapp/models.py (sama di ketiga varian)
+class Student(models.StudentMixin, db.Model):
+    pass
 
 # ============================================================
 # VERSI LAMA (RENTAN) - DIKOMENTARI
@@ -129,6 +71,7 @@ def login():
         if username == 'admin' and password == 'admin123':
             session['user_id'] = username
             return redirect(url_for('index'))
+        audit.note('invalid_credentials', outcome='denied', detail=username)
     return render_template('login.html')
 
 @app.route('/logout')
@@ -141,13 +84,46 @@ def logout():
 @login_required
 def index():
     # SECURED: Query statis tanpa input user, aman dari SQL Injection
-    students = db.session.execute(text('SELECT * FROM student')).fetchall()
-    return render_template('index.html', students=students)
+    # Cursor pagination hanya menerima integer (parse_page_args) dan di-binding
+    after, before, limit = pagination.parse_page_args(request.args, app.config['STUDENTS_PAGE_SIZE'])
+    stream = pagination.wants_stream(request.args, app.config['STUDENTS_STREAM_INDEX'])
+    # Cari/filter/sort: ?q=&grade=&age_min=&age_max=&sort= (studentapp/search.py)
+    try:
+        student_search = search.StudentSearch.from_args(request.args)
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
+
+    # Conditional GET: 304 tanpa query & render jika tabel belum berubah
+    conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+
+    try:
+        if stream:
+            page = student_search.page(db.session, 'student', limit, after=after, before=before, stream=True)
+            return conditional_get.tag(
+                pagination.stream_template('index.html', students=page.rows, page=page, search=student_search)
+            )
+
+        # Halaman di-cache sampai ada route yang mengubah data (invalidate)
+        page = listing_cache.get_or_load(
+            cache.SCOPE_ALL, (after, before, limit) + student_search.key(),
+            lambda: student_search.page(db.session, 'student', limit, after=after, before=before),
+            version=conditional_get.version
+        )
+    except pagination.CursorNotFound:
+        return "Error: Cursor tidak ditemukan", 404
+    return conditional_get.tag(
+        make_response(render_template('index.html', students=page.rows, page=page, search=student_search))
+    )
 
 # ============================================================
 # ADD STUDENT - SECURED VERSION
 # ============================================================
 
+def invalidate_listing(rows=None):
+    listing_cache.invalidate(cache.SCOPE_ALL)
+
 @app.route('/add', methods=['POST'])
 @login_required
 def add_student():
@@ -157,28 +133,39 @@ def add_student():
         age = validate_age(request.form['age'])
         grade = validate_grade(request.form['grade'])
 
-        connection = sqlite3.connect('instance/students.db')
-        cursor = connection.cursor()
+        if write_queue is not None:
+            # Write-behind: input sudah divalidasi; INSERT (tetap parameterized)
+            # di-group-commit oleh writer thread, cache di-invalidate setelah commit
+            write_queue.execute("INSERT INTO student (name, age, grade) VALUES (?, ?, ?)",
+                                (name, age, grade), on_commit=invalidate_listing,
+                                durability=writebehind.durability(request))
+            return redirect(url_for('index'))
 
-        # ============================================================
-        # VERSI LAMA (RENTAN SQL INJECTION) - DIKOMENTARI
-        # ============================================================
-        # query = f"INSERT INTO student (name, age, grade) VALUES ('{name}', {age}, '{grade}')"
-        # cursor.execute(query)
-        
-        # ============================================================
-        # VERSI BARU (SECURED) - PARAMETERIZED QUERY
-        # ============================================================
-        # Menggunakan placeholder ? untuk mencegah SQL Injection
-        # Input user diperlakukan sebagai DATA, bukan bagian dari perintah SQL
-        query = "INSERT INTO student (name, age, grade) VALUES (?, ?, ?)"
-        cursor.execute(query, (name, age, grade))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+        # Koneksi dipinjam dari pool bersama (WAL, busy_timeout, statement cache)
+        with database.connection(db) as connection:
+            cursor = connection.cursor()
+
+            # ============================================================
+            # VERSI LAMA (RENTAN SQL INJECTION) - DIKOMENTARI
+            # ============================================================
+            # query = f"INSERT INTO student (name, age, grade) VALUES ('{name}', {age}, '{grade}')"
+            # cursor.execute(query)
+
+            # ============================================================
+            # VERSI BARU (SECURED) - PARAMETERIZED QUERY
+            # ============================================================
+            # Menggunakan placeholder ? untuk mencegah SQL Injection
+            # Input user diperlakukan sebagai DATA, bukan bagian dari perintah SQL
+            query = "INSERT INTO student (name, age, grade) VALUES (?, ?, ?)"
+            cursor.execute(query, (name, age, grade))
+
+            connection.commit()
+            cursor.close()
+        listing_cache.invalidate(cache.SCOPE_ALL)
         return redirect(url_for('index'))
     
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
@@ -214,13 +201,20 @@ def delete_student(id):
         # VERSI BARU (SECURED) - PARAMETERIZED QUERY
         # ============================================================
         # Menggunakan parameter binding :id untuk mencegah SQL Injection
+        if write_queue is not None:
+            write_queue.execute("DELETE FROM student WHERE id = :id", {"id": safe_id},
+                                on_commit=invalidate_listing, durability=writebehind.durability(request))
+            return redirect(url_for('index'))
         db.session.execute(
             text("DELETE FROM student WHERE id = :id"),
             {"id": safe_id}
         )
         db.session.commit()
+        listing_cache.invalidate(cache.SCOPE_ALL)
         return redirect(url_for('index'))
     
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
@@ -271,13 +265,25 @@ def edit_student(id):
             # VERSI BARU (SECURED) - PARAMETERIZED QUERY
             # ============================================================
             # Menggunakan parameter binding untuk semua nilai
+            if write_queue is not None:
+                write_queue.execute(
+                    "UPDATE student SET name = :name, age = :age, grade = :grade WHERE id = :id",
+                    {"name": name, "age": age, "grade": grade, "id": safe_id},
+                    on_commit=invalidate_listing, durability=writebehind.durability(request)
+                )
+                return redirect(url_for('index'))
             db.session.execute(
                 text("UPDATE student SET name = :name, age = :age, grade = :grade WHERE id = :id"),
                 {"name": name, "age": age, "grade": grade, "id": safe_id}
             )
             db.session.commit()
+            listing_cache.invalidate(cache.SCOPE_ALL)
             return redirect(url_for('index'))
         else:
+            conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+            if conditional_get.not_modified():
+                return conditional_get.response_304()
+
             # ============================================================
             # VERSI LAMA (RENTAN SQL INJECTION) - DIKOMENTARI
             # ============================================================
@@ -290,14 +296,75 @@ def edit_student(id):
                 text("SELECT * FROM student WHERE id = :id"),
                 {"id": safe_id}
             ).fetchone()
-            return render_template('edit.html', student=student)
+            return conditional_get.tag(make_response(render_template('edit.html', student=student)))
     
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
         return f"Database error: {str(e)}", 500
 
+# ============================================================
+# BULK IMPORT / EXPORT (CSV atau JSONL)
+# ============================================================
+
+def _import_source():
+    """Upload multipart (field 'file') atau body mentah text/csv / application/x-ndjson"""
+    upload = request.files.get('file')
+    if upload is not None:
+        fmt = bulk.detect_format(request.form.get('format') or request.args.get('format'),
+                                 upload.filename, upload.mimetype)
+        return upload.stream, fmt
+    fmt = bulk.detect_format(request.args.get('format'), content_type=request.content_type)
+    return request.stream, fmt
+
+@app.route('/students/import', methods=['POST'])
+@login_required
+def import_students():
+    try:
+        stream, fmt = _import_source()
+        if fmt is None:
+            return "Error: format harus csv atau jsonl", 400
+
+        # SECURED: Setiap baris divalidasi, lalu disimpan dengan
+        # parameterized executemany per batch
+        report = bulk.import_students(
+            db, bulk.iter_records(stream, fmt),
+            "INSERT INTO student (name, age, grade) VALUES (?, ?, ?)"
+        )
+        listing_cache.invalidate(cache.SCOPE_ALL)
+        return jsonify(report.to_dict())
+
+    except Exception as e:
+        return f"Database error: {str(e)}", 500
+
+@app.route('/students/export')
+@login_required
+def export_students():
+    fmt = bulk.detect_format(request.args.get('format', 'csv'))
+    if fmt is None:
+        return "Error: format harus csv atau jsonl", 400
+    return bulk.export_response(db, fmt)
+
+@app.route('/stats')
+@login_required
+def student_stats():
+    """Jumlah student per grade, kelompok umur, dan owner dari tabel agregat (studentapp/stats.py)"""
+    conditional_get = conditional.ConditionalGet(db.session, session.get('user_id'))
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+    return conditional_get.tag(jsonify(stats.report(db.session)))
+
+@app.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    """Counter hit/miss/eviction cache listing untuk menentukan ukuran cache"""
+    return jsonify({**listing_cache.stats(), "row_fragments": row_fragments.stats()})
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        # create_all + migrasi (studentapp/migrations.py), dilewati jika skema sudah sesuai
+        bootstrap.ensure_schema(db)
+    # Server development (reloader + debugger). Produksi: python -m studentapp serve
     app.run(host='0.0.0.0', port=5000, debug=True)
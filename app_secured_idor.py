@@ -5,19 +5,63 @@ Versi yang telah diperkuat dari kerentanan IDOR dengan:
 - Ownership Validation
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, abort
+from flask import Flask, render_template, request, redirect, url_for, session, abort, jsonify, make_response
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
+from werkzeug.exceptions import HTTPException
 from functools import wraps
-import sqlite3
-import re
+import math
+
+from studentapp import (assets, audit, bootstrap, bulk, cache, compression, conditional, database, metrics,
+                        models, pagination, passwords, purge, search, sessions, sharding, stats, templating,
+                        throttle, writebehind)
+# Validasi input (SECURED): regex dikompilasi sekali, grade lewat frozenset
+from studentapp.validation import validate_input, validate_id, validate_age, validate_grade
 
 app = Flask(__name__)
 app.jinja_env.autoescape = True
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///students.db'
+database.configure(app)  # instance/students.db, WAL + pool bersama (studentapp/database.py)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.secret_key = 'some_secret_key'
+app.config['STUDENTS_PAGE_SIZE'] = pagination.DEFAULT_PAGE_SIZE
+app.config['STUDENTS_STREAM_INDEX'] = False  # True: render daftar student secara streaming
+app.config['STUDENTS_CACHE_BACKEND'] = 'memory'  # 'memory', 'socket' (cache-server bersama) atau None
+app.config['STUDENTS_WRITE_BEHIND'] = False  # True: add/edit/delete lewat write-behind queue (group commit)
+app.config['STUDENTS_COMPRESSION'] = False  # True: gzip/brotli untuk response teks (studentapp/compression.py)
+app.config['STUDENTS_SHARDING'] = False  # True: data per owner di file SQLite sendiri (studentapp/sharding.py)
+app.config['STUDENTS_AUDIT'] = 'sqlite'  # audit log request: 'sqlite', 'jsonl' atau None (studentapp/audit.py)
 db = SQLAlchemy(app)
+listing_cache = cache.ListingCache.from_config(app.config)
+write_queue = writebehind.WriteBehindQueue.from_config(app.config)  # None jika write-behind nonaktif
+shard_router = sharding.ShardRouter.from_config(db, app.config)  # None jika sharding nonaktif
+if shard_router is not None and write_queue is not None:
+    raise ValueError("STUDENTS_SHARDING tidak bisa digabung dengan STUDENTS_WRITE_BEHIND")
+# /metrics (Prometheus): hanya admin atau scraper dengan STUDENTS_METRICS_TOKEN
+metrics.init_app(app, db, listing_cache=listing_cache, write_queue=write_queue,
+                 authorize=lambda: session.get('role') == 'admin')
+row_fragments = templating.init_app(app)  # bytecode cache Jinja di instance/jinja-cache + fragment cache baris student
+assets.init_app(app)  # CSS lokal (minify + fingerprint), tanpa CDN
+compression.init_app(app)  # aktif jika STUDENTS_COMPRESSION
+audit_log = audit.init_app(app)  # mutation + akses ditolak -> <db>-audit.db, ditulis per batch
+# DITAMBAHKAN: Session server-side - cookie hanya berisi session ID,
+# principal (user_id, role) di-cache di memori + tabel user_session
+session_store = sessions.init_app(app, db)
+# DITAMBAHKAN: Hash password scrypt (biaya diatur lewat PASSWORD_SCRYPT_N) di pool
+# KDF terbatas, dan throttle login per IP/username sebelum hashing
+app.config['PASSWORD_SCRYPT_N'] = passwords.DEFAULT_N
+password_hasher = passwords.PasswordHasher.from_config(app.config)
+login_throttle = throttle.LoginThrottle.from_config(app.config)
+
+def invalidate_purged(job_id, filters, deleted):
+    """Dipanggil runner purge setelah setiap chunk: invalidasi scope cache listing yang terdampak"""
+    if 'owner_id' in filters:
+        listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(filters['owner_id']))
+    else:
+        listing_cache.clear()
+
+# DITAMBAHKAN: Hapus massal (delete-all, per owner, per filter) sebagai job background
+# per chunk id (studentapp/purge.py); PURGE_CHUNK_SIZE / PURGE_CHUNK_PAUSE_MS
+purge_runner = purge.PurgeRunner.from_config(app.config, on_chunk=invalidate_purged)
 
 # ============================================================
 # MODEL - DITAMBAHKAN FIELD UNTUK RBAC DAN OWNERSHIP
@@ -27,63 +71,33 @@ class User(db.Model):
     """Model User dengan role untuk RBAC"""
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password = db.Column(db.String(128), nullable=False)  # Dalam produksi: gunakan hash!
+    password = db.Column(db.String(128), nullable=False)  # SECURED: hash scrypt (studentapp/passwords.py)
     role = db.Column(db.String(20), default='user')  # 'admin' atau 'user'
     
     def __repr__(self):
         return f'<User {self.username}>'
 
-class Student(db.Model):
-    """Model Student dengan owner_id untuk ownership validation"""
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    age = db.Column(db.Integer, nullable=False)
-    grade = db.Column(db.String(10), nullable=False)
-    # DITAMBAHKAN: Field untuk tracking ownership
-    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
-    
-    def __repr__(self):
-        return f'<Student {self.name}>'
-
-# ============================================================
-# FUNGSI VALIDASI INPUT (dari versi sebelumnya)
-# ============================================================
+# Akun demo (sebelumnya dict hardcoded di login()), disimpan ke tabel user saat start
+DEMO_USERS = (
+    (1, 'admin', 'admin123', 'admin'),
+    (2, 'user1', 'user123', 'user'),
+    (3, 'user2', 'user123', 'user'),
+)
+
+def seed_demo_users():
+    """Isi tabel user dengan akun demo yang belum ada (id tetap = owner_id data lama)"""
+    existing = {row[0] for row in db.session.execute(text("SELECT username FROM user"))}
+    for user_id, username, password, role in DEMO_USERS:
+        if username not in existing:
+            db.session.add(User(id=user_id, username=username,
+                                password=password_hasher.hash(password), role=role))
+    db.session.commit()
 
-def validate_input(value, field_name, max_length=100, allowed_pattern=r'^[a-zA-Z0-9\s\-\.]+$'):
-    if not value:
-        raise ValueError(f"{field_name} tidak boleh kosong")
-    if len(value) > max_length:
-        raise ValueError(f"{field_name} maksimal {max_length} karakter")
-    if not re.match(allowed_pattern, value):
-        raise ValueError(f"{field_name} mengandung karakter tidak valid")
-    if any(ch in value for ch in "<>"):
-        raise ValueError(f"{field_name} mengandung karakter berbahaya")
-    return value.strip()
-
-def validate_id(id_value):
-    try:
-        id_int = int(id_value)
-        if id_int <= 0:
-            raise ValueError("ID harus positif")
-        return id_int
-    except (ValueError, TypeError):
-        raise ValueError("ID tidak valid")
-
-def validate_age(age_value):
-    try:
-        age_int = int(age_value)
-        if age_int < 1 or age_int > 150:
-            raise ValueError("Umur harus antara 1-150")
-        return age_int
-    except (ValueError, TypeError):
-        raise ValueError("Umur tidak valid")
-
-def validate_grade(grade_value):
-    valid_grades = ['A', 'B', 'C', 'D', 'E', 'F', 'A+', 'A-', 'B+', 'B-', 'C+', 'C-', 'D+', 'D-']
-    grade = grade_value.strip().upper()
-    if grade not in valid_grades:
-        raise ValueError(f"Grade harus salah satu dari: {', '.join(valid_grades)}")
-    return grade
+class Student(models.StudentMixin, db.Model):
+    """Model Student dengan owner_id untuk ownership validation"""
+    # id/name/age/grade + __repr__ dari studentapp/models.py (sama di ketiga varian)
+    # DITAMBAHKAN: Field untuk tracking ownership (sort_order: tetap kolom terakhir seperti tabel lama)
+    owner_id = db.mapped_column(db.Integer, db.ForeignKey('user.id'), nullable=True, sort_order=1)
 
 # ============================================================
 # DECORATOR UNTUK AUTHENTICATION DAN AUTHORIZATION
@@ -113,6 +127,7 @@ def admin_required(f):
             return redirect(url_for('login'))
         # SECURED: Cek role user
         if session.get('role') != 'admin':
+            audit.note('not_admin')
             abort(403)  # Forbidden
         return f(*args, **kwargs)
     return decorated_function
@@ -153,19 +168,109 @@ def require_ownership_or_admin(student_id):
     if session.get('role') == 'admin':
         return True
     
-    student = db.session.execute(
-        text("SELECT owner_id FROM student WHERE id = :id"),
-        {"id": student_id}
-    ).fetchone()
+    student = fetch_student("SELECT owner_id FROM student WHERE id = :id", student_id)
     
     if student is None:
+        audit.note('not_found')
         abort(404)  # Not Found
     
     if student[0] != session.get('user_id'):
+        audit.note('not_owner')  # DITAMBAHKAN: percobaan IDOR tercatat di audit log
         abort(403)  # Forbidden - tidak berhak
     
     return True
 
+def not_found_or_forbidden_status(student_id):
+    """
+    Dipanggil jika mutation yang dibatasi owner_id tidak mengenai baris apa pun.
+    Query tambahan ini hanya jalan di jalur gagal: 404 jika student tidak ada,
+    403 jika ada tapi milik user lain.
+    """
+    exists = fetch_student("SELECT 1 FROM student WHERE id = :id", student_id)
+    audit.note('not_owner' if exists else 'not_found')
+    return 403 if exists else 404
+
+def abort_not_found_or_forbidden(student_id):
+    abort(not_found_or_forbidden_status(student_id))
+
+# ============================================================
+# WRITE-BEHIND (opsional, STUDENTS_WRITE_BEHIND)
+# ============================================================
+
+def invalidate_owner(rows):
+    """on_commit write-behind: invalidasi scope 'all' + owner dari RETURNING owner_id"""
+    if rows:
+        listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(rows[0][0]))
+
+def queue_owned_mutation(student_id, sql, params):
+    """
+    UPDATE/DELETE lewat write-behind queue dengan semantik ownership yang sama:
+    SQL tetap dibatasi owner_id dan memakai RETURNING owner_id.
+
+    - durability 'commit': tunggu hasil; tidak ada baris -> 403/404 seperti biasa
+    - durability 'async': hasil tidak ditunggu, jadi ownership dicek dulu
+      (require_ownership_or_admin); SQL yang tetap owner-scoped menjaga race
+    """
+    mode = writebehind.durability(request) or write_queue.default_durability
+    if mode == writebehind.ASYNC:
+        require_ownership_or_admin(student_id)
+    rows = write_queue.execute(sql, params, on_commit=invalidate_owner, durability=mode)
+    if mode == writebehind.COMMIT and not rows:
+        abort_not_found_or_forbidden(student_id)
+
+# ============================================================
+# SHARDING PER OWNER (opsional, STUDENTS_SHARDING)
+# ============================================================
+# Tanpa sharding semua helper di bawah memakai db.session seperti sebelumnya.
+# Dengan sharding statement dijalankan di shard owner (studentapp/sharding.py).
+
+SHARDED_INSERT_SQL = ("INSERT INTO student (id, name, age, grade, owner_id) "
+                      "VALUES (:id, :name, :age, :grade, :owner_id) RETURNING id, name, age, grade, owner_id")
+
+def fetch_student(sql, student_id):
+    """Satu baris student berdasarkan :id (SELECT dengan parameter :id)"""
+    if shard_router is not None:
+        return shard_router.fetch(sql, {"id": student_id}, student_id)
+    return db.session.execute(text(sql), {"id": student_id}).fetchone()
+
+def execute_student(sql, params):
+    """
+    Satu UPDATE/DELETE ... RETURNING. Tanpa sharding: di db.session, commit
+    oleh pemanggil. Dengan sharding: di shard owner (params berisi owner_id)
+    atau shard yang menyimpan :id (admin), dan langsung di-commit.
+    """
+    if shard_router is not None:
+        if 'owner_id' in params:
+            return shard_router.execute(sql, params, owner_id=params['owner_id'])
+        return shard_router.execute(sql, params, student_id=params['id'])
+    return db.session.execute(text(sql), params).first()
+
+def insert_student(fields, owner_id):
+    """Tambah student (dict name/age/grade) milik owner_id. Return baris baru; commit oleh pemanggil."""
+    if shard_router is not None:
+        return shard_router.insert(SHARDED_INSERT_SQL, fields, owner_id)
+    return db.session.execute(text(API_INSERT_SQL), dict(fields, owner_id=owner_id)).first()
+
+def student_table_version(owner_id=None, student_id=None):
+    """Versi tabel student (gabungan semua shard jika owner_id dan student_id None)"""
+    if shard_router is not None:
+        return shard_router.table_version(owner_id=owner_id, student_id=student_id)
+    return conditional.table_version(db.session)
+
+def student_conditional_get(owner_id=None, student_id=None):
+    """ConditionalGet dari versi tabel student (lihat student_table_version)"""
+    return conditional.ConditionalGet(db.session, session.get('user_id'), session.get('role'),
+                                      version=student_table_version(owner_id, student_id))
+
+def unsharded_only(f):
+    """Route yang bekerja langsung di database utama: 501 jika STUDENTS_SHARDING aktif"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if shard_router is not None:
+            return jsonify({"error": "Tidak tersedia jika STUDENTS_SHARDING aktif"}), 501
+        return f(*args, **kwargs)
+    return decorated_function
+
 # ============================================================
 # ROUTES - LOGIN/LOGOUT
 # ============================================================
@@ -175,25 +280,62 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        
-        # SECURED: Cek user dari database dengan role
-        # Untuk demo, hardcoded users:
-        users = {
-            'admin': {'password': 'admin123', 'role': 'admin', 'id': 1},
-            'user1': {'password': 'user123', 'role': 'user', 'id': 2},
-            'user2': {'password': 'user123', 'role': 'user', 'id': 3},
-        }
-        
-        if username in users and users[username]['password'] == password:
-            session['user_id'] = users[username]['id']
-            session['username'] = username
-            session['role'] = users[username]['role']  # DITAMBAHKAN: Simpan role di session
+
+        # SECURED: Tolak banjir login sebelum query user dan hashing
+        retry_after = login_throttle.check(request.remote_addr or '', username)
+        if retry_after:
+            return login_unavailable("Terlalu banyak percobaan login, coba lagi nanti", 429, retry_after)
+
+        # ============================================================
+        # VERSI LAMA - DIKOMENTARI (dict dibangun ulang setiap POST)
+        # ============================================================
+        # users = {
+        #     'admin': {'password': 'admin123', 'role': 'admin', 'id': 1},
+        #     'user1': {'password': 'user123', 'role': 'user', 'id': 2},
+        #     'user2': {'password': 'user123', 'role': 'user', 'id': 3},
+        # }
+
+        # SECURED: Cek user dari tabel user (model User) dengan role
+        user = User.query.filter_by(username=username).first()
+        # Koneksi dikembalikan ke pool sebelum hashing: KDF makan waktu dan
+        # penyimpanan session server-side meminjam koneksi sendiri
+        db.session.close()
+        try:
+            # Verifikasi berjalan di pool KDF terbatas
+            valid = password_hasher.verify(user.password if user else None, password)
+        except passwords.KdfBusy:
+            return login_unavailable("Server sedang sibuk, coba lagi sebentar", 503, 1)
+
+        if valid:
+            if password_hasher.needs_rehash(user.password):
+                # Biaya hash berubah atau password lama masih plaintext
+                try:
+                    db.session.execute(
+                        text("UPDATE user SET password = :password WHERE id = :id"),
+                        {"password": password_hasher.hash(password), "id": user.id}
+                    )
+                    db.session.commit()
+                except passwords.KdfBusy:
+                    pass  # dicoba lagi pada login berikutnya
+            session.clear()
+            session.regenerate()  # Session ID baru setiap login (cegah session fixation)
+            session['user_id'] = user.id
+            session['username'] = user.username
+            session['role'] = user.role  # DITAMBAHKAN: Simpan role di session
             return redirect(url_for('index'))
-        
+
+        login_throttle.failed(username)
+        # DITAMBAHKAN: Login gagal tercatat di audit log (status 200, jadi ditandai denied)
+        audit.note('invalid_credentials', outcome='denied', detail=username)
         return render_template('login.html', error="Invalid credentials")
     
     return render_template('login.html')
 
+def login_unavailable(message, status, retry_after):
+    response = make_response(render_template('login.html', error=message), status)
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -207,17 +349,57 @@ def logout():
 @app.route('/')
 @login_required
 def index():
+    after, before, limit = pagination.parse_page_args(request.args, app.config['STUDENTS_PAGE_SIZE'])
+    stream = pagination.wants_stream(request.args, app.config['STUDENTS_STREAM_INDEX'])
+    # Cari/filter/sort: ?q=&grade=&age_min=&age_max=&sort= (studentapp/search.py)
+    try:
+        student_search = search.StudentSearch.from_args(request.args)
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
+
+    # Conditional GET: 304 tanpa query & render jika tabel belum berubah.
+    # ETag memuat user_id dan role, jadi tidak bisa dipakai lintas user.
+    conditional_get = student_conditional_get(None if session.get('role') == 'admin' else session.get('user_id'))
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+
     # SECURED: User biasa hanya lihat data miliknya, admin lihat semua
     if session.get('role') == 'admin':
-        students = db.session.execute(text('SELECT * FROM student')).fetchall()
+        scope = cache.SCOPE_ALL
+        def load(stream=False):
+            if shard_router is not None:
+                # Database utama + semua shard, digabung dengan k-way merge
+                return shard_router.page(student_search, limit, after=after, before=before, stream=stream)
+            return student_search.page(db.session, 'student', limit, after=after, before=before, stream=stream)
     else:
-        # User biasa hanya lihat data miliknya
-        students = db.session.execute(
-            text('SELECT * FROM student WHERE owner_id = :owner_id'),
-            {"owner_id": session.get('user_id')}
-        ).fetchall()
-    
-    return render_template('index.html', students=students, role=session.get('role'))
+        # User biasa hanya lihat data miliknya (filter pencarian digabung dengan owner_id)
+        scope = cache.owner_scope(session.get('user_id'))
+        def load(stream=False):
+            if shard_router is not None:
+                return shard_router.page(student_search, limit, after=after, before=before, stream=stream,
+                                         owner_id=session.get('user_id'))
+            return student_search.page(
+                db.session, 'student', limit, after=after, before=before, stream=stream,
+                where='owner_id = :owner_id', params={"owner_id": session.get('user_id')}
+            )
+
+    try:
+        if stream:
+            page = load(stream=True)
+            return conditional_get.tag(pagination.stream_template(
+                'index.html', students=page.rows, page=page, role=session.get('role'), search=student_search
+            ))
+
+        # Cache per scope: admin berbagi scope 'all', user biasa per owner_id
+        page = listing_cache.get_or_load(scope, (after, before, limit) + student_search.key(), load,
+                                         version=conditional_get.version)
+    except pagination.CursorNotFound:
+        # SECURED: cursor milik owner lain diperlakukan seperti baris yang tidak ada
+        audit.note('not_found')
+        abort(404)
+    return conditional_get.tag(make_response(render_template(
+        'index.html', students=page.rows, page=page, role=session.get('role'), search=student_search
+    )))
 
 # ============================================================
 # ADD STUDENT - SECURED VERSION
@@ -231,18 +413,37 @@ def add_student():
         age = validate_age(request.form['age'])
         grade = validate_grade(request.form['grade'])
 
-        connection = sqlite3.connect('instance/students.db')
-        cursor = connection.cursor()
+        if write_queue is not None:
+            # Write-behind: INSERT di-group-commit oleh writer thread
+            owner_id = session.get('user_id')
+            write_queue.execute(
+                "INSERT INTO student (name, age, grade, owner_id) VALUES (?, ?, ?, ?)",
+                (name, age, grade, owner_id),
+                on_commit=lambda rows: listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(owner_id)),
+                durability=writebehind.durability(request)
+            )
+            return redirect(url_for('index'))
+
+        if shard_router is not None:
+            # Id dari direktori student_key, baris ditulis ke shard milik user
+            insert_student({"name": name, "age": age, "grade": grade}, session.get('user_id'))
+            listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(session.get('user_id')))
+            return redirect(url_for('index'))
 
-        # SECURED: Tambahkan owner_id saat insert
-        query = "INSERT INTO student (name, age, grade, owner_id) VALUES (?, ?, ?, ?)"
-        cursor.execute(query, (name, age, grade, session.get('user_id')))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+        with database.connection(db) as connection:
+            cursor = connection.cursor()
+
+            # SECURED: Tambahkan owner_id saat insert
+            query = "INSERT INTO student (name, age, grade, owner_id) VALUES (?, ?, ?, ?)"
+            cursor.execute(query, (name, age, grade, session.get('user_id')))
+
+            connection.commit()
+            cursor.close()
+        listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(session.get('user_id')))
         return redirect(url_for('index'))
     
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
@@ -275,17 +476,34 @@ def delete_student(id):
         # ============================================================
         # DITAMBAHKAN: VALIDASI OWNERSHIP ATAU ADMIN ROLE
         # ============================================================
-        # Cek apakah user berhak menghapus data ini
-        require_ownership_or_admin(safe_id)
-        
-        # Jika lolos validasi, lakukan delete
-        db.session.execute(
-            text("DELETE FROM student WHERE id = :id"),
-            {"id": safe_id}
-        )
+        # Pengecekan ownership dan delete dalam SATU statement: tidak ada
+        # celah waktu antara cek dan delete (TOCTOU), dan hanya satu query.
+        # RETURNING owner_id dipakai untuk invalidasi cache milik owner tersebut.
+        if session.get('role') == 'admin':
+            sql = "DELETE FROM student WHERE id = :id RETURNING owner_id"
+            params = {"id": safe_id}
+        else:
+            sql = "DELETE FROM student WHERE id = :id AND owner_id = :owner_id RETURNING owner_id"
+            params = {"id": safe_id, "owner_id": session.get('user_id')}
+
+        if write_queue is not None:
+            queue_owned_mutation(safe_id, sql, params)
+            return redirect(url_for('index'))
+
+        deleted = execute_student(sql, params)
+
+        if deleted is None:
+            db.session.rollback()
+            abort_not_found_or_forbidden(safe_id)
+
         db.session.commit()
+        listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(deleted.owner_id))
         return redirect(url_for('index'))
     
+    except HTTPException:
+        raise  # 403/404 dari abort() jangan dianggap database error
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
@@ -315,34 +533,352 @@ def edit_student(id):
     try:
         safe_id = validate_id(id)
         
-        # ============================================================
-        # DITAMBAHKAN: VALIDASI OWNERSHIP ATAU ADMIN ROLE
-        # ============================================================
-        require_ownership_or_admin(safe_id)
-        
         if request.method == 'POST':
             name = validate_input(request.form['name'], 'Name', max_length=100)
             age = validate_age(request.form['age'])
             grade = validate_grade(request.form['grade'])
 
-            db.session.execute(
-                text("UPDATE student SET name = :name, age = :age, grade = :grade WHERE id = :id"),
-                {"name": name, "age": age, "grade": grade, "id": safe_id}
-            )
+            # ============================================================
+            # DITAMBAHKAN: VALIDASI OWNERSHIP ATAU ADMIN ROLE
+            # ============================================================
+            # Ownership dicek di dalam UPDATE itu sendiri (satu statement)
+            if session.get('role') == 'admin':
+                sql = ("UPDATE student SET name = :name, age = :age, grade = :grade "
+                       "WHERE id = :id RETURNING owner_id")
+                params = {"name": name, "age": age, "grade": grade, "id": safe_id}
+            else:
+                sql = ("UPDATE student SET name = :name, age = :age, grade = :grade "
+                       "WHERE id = :id AND owner_id = :owner_id RETURNING owner_id")
+                params = {"name": name, "age": age, "grade": grade, "id": safe_id,
+                          "owner_id": session.get('user_id')}
+
+            if write_queue is not None:
+                queue_owned_mutation(safe_id, sql, params)
+                return redirect(url_for('index'))
+
+            updated = execute_student(sql, params)
+
+            if updated is None:
+                db.session.rollback()
+                abort_not_found_or_forbidden(safe_id)
+
             db.session.commit()
+            listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(updated.owner_id))
             return redirect(url_for('index'))
         else:
-            student = db.session.execute(
-                text("SELECT * FROM student WHERE id = :id"),
-                {"id": safe_id}
-            ).fetchone()
-            return render_template('edit.html', student=student)
+            # Baris diambil sekali, ownership dicek dari hasil yang sama
+            student = fetch_student("SELECT * FROM student WHERE id = :id", safe_id)
+
+            if student is None:
+                audit.note('not_found')
+                abort(404)  # Not Found
+            if session.get('role') != 'admin' and student.owner_id != session.get('user_id'):
+                audit.note('not_owner')
+                abort(403)  # Forbidden - tidak berhak
+
+            # 304 hanya setelah ownership lolos: non-owner tetap mendapat 403/404
+            # (dan tercatat di audit) walau mengirim validator
+            conditional_get = student_conditional_get(student_id=safe_id)
+            if conditional_get.not_modified():
+                return conditional_get.response_304()
+
+            return conditional_get.tag(make_response(render_template('edit.html', student=student)))
     
+    except HTTPException:
+        raise  # 403/404 dari abort() jangan dianggap database error
+    except writebehind.QueueFull:
+        return "Server sedang sibuk, coba lagi", 503
     except ValueError as e:
         return f"Error: {str(e)}", 400
     except Exception as e:
         return f"Database error: {str(e)}", 500
 
+# ============================================================
+# BULK IMPORT / EXPORT (CSV atau JSONL)
+# ============================================================
+
+def _import_source():
+    """Upload multipart (field 'file') atau body mentah text/csv / application/x-ndjson"""
+    upload = request.files.get('file')
+    if upload is not None:
+        fmt = bulk.detect_format(request.form.get('format') or request.args.get('format'),
+                                 upload.filename, upload.mimetype)
+        return upload.stream, fmt
+    fmt = bulk.detect_format(request.args.get('format'), content_type=request.content_type)
+    return request.stream, fmt
+
+@app.route('/students/import', methods=['POST'])
+@login_required
+def import_students():
+    try:
+        stream, fmt = _import_source()
+        if fmt is None:
+            return "Error: format harus csv atau jsonl", 400
+
+        # SECURED: Semua baris hasil import dimiliki oleh user yang mengupload
+        owner_id = session.get('user_id')
+        if shard_router is not None:
+            # Baris dirutekan ke shard owner, id dari direktori student_key
+            with shard_router.import_writer(owner_id) as write:
+                report = bulk.import_students(db, bulk.iter_records(stream, fmt), writer=write)
+        else:
+            report = bulk.import_students(
+                db, bulk.iter_records(stream, fmt),
+                "INSERT INTO student (name, age, grade, owner_id) VALUES (?, ?, ?, ?)",
+                extra_params=(owner_id,)
+            )
+        listing_cache.invalidate(cache.SCOPE_ALL, cache.owner_scope(owner_id))
+        return jsonify(report.to_dict())
+
+    except Exception as e:
+        return f"Database error: {str(e)}", 500
+
+@app.route('/students/export')
+@login_required
+@unsharded_only
+def export_students():
+    fmt = bulk.detect_format(request.args.get('format', 'csv'))
+    if fmt is None:
+        return "Error: format harus csv atau jsonl", 400
+
+    # SECURED: User biasa hanya bisa export data miliknya, admin semua
+    if session.get('role') == 'admin':
+        return bulk.export_response(db, fmt)
+    return bulk.export_response(db, fmt, where="owner_id = ?", params=(session.get('user_id'),))
+
+# ============================================================
+# JSON API - /api/students
+# ============================================================
+# Aturan akses sama dengan route HTML: user biasa hanya bisa membaca dan
+# mengubah data miliknya (owner_id), admin semua data. Setiap mutation
+# memakai satu statement yang sudah dibatasi owner_id (lihat delete_student).
+
+MAX_BATCH_OPERATIONS = 1000
+
+# SQL ditulis utuh (bukan f-string) supaya ikut diperiksa `check-plans`.
+# COALESCE: field yang tidak dikirim (PATCH) tetap nilai lama, tetap satu statement.
+API_SELECT_SQL = "SELECT id, name, age, grade, owner_id FROM student WHERE id = :id"
+API_INSERT_SQL = ("INSERT INTO student (name, age, grade, owner_id) VALUES (:name, :age, :grade, :owner_id) "
+                  "RETURNING id, name, age, grade, owner_id")
+API_UPDATE_SQL = ("UPDATE student SET name = COALESCE(:name, name), age = COALESCE(:age, age), "
+                  "grade = COALESCE(:grade, grade) WHERE id = :id "
+                  "RETURNING id, name, age, grade, owner_id")
+API_UPDATE_OWNED_SQL = ("UPDATE student SET name = COALESCE(:name, name), age = COALESCE(:age, age), "
+                        "grade = COALESCE(:grade, grade) WHERE id = :id AND owner_id = :owner_id "
+                        "RETURNING id, name, age, grade, owner_id")
+API_DELETE_SQL = "DELETE FROM student WHERE id = :id RETURNING id, name, age, grade, owner_id"
+API_DELETE_OWNED_SQL = ("DELETE FROM student WHERE id = :id AND owner_id = :owner_id "
+                        "RETURNING id, name, age, grade, owner_id")
+
+class ApiError(Exception):
+    """Error API dengan HTTP status, dikembalikan sebagai JSON"""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@app.errorhandler(ApiError)
+def handle_api_error(e):
+    return jsonify({"error": e.message}), e.status
+
+def api_login_required(f):
+    """Seperti login_required, tapi 401 JSON (bukan redirect ke /login)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({"error": "Login diperlukan"}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+def student_json(row):
+    return {"id": row.id, "name": row.name, "age": row.age, "grade": row.grade, "owner_id": row.owner_id}
+
+def validate_student_json(data, partial=False):
+    """
+    Validasi body JSON student dengan validator yang sama seperti form.
+    partial=True (PATCH): field yang tidak dikirim diabaikan.
+
+    Returns:
+        dict name/age/grade (None untuk field yang tidak diubah)
+    """
+    if not isinstance(data, dict):
+        raise ApiError(400, "Body harus berupa objek JSON")
+    fields = {"name": None, "age": None, "grade": None}
+    try:
+        if not partial or 'name' in data:
+            name = data.get('name')
+            fields['name'] = validate_input(name if isinstance(name, str) else str(name or ''), 'Name', max_length=100)
+        if not partial or 'age' in data:
+            fields['age'] = validate_age(data.get('age'))
+        if not partial or 'grade' in data:
+            grade = data.get('grade')
+            fields['grade'] = validate_grade(grade if isinstance(grade, str) else str(grade or ''))
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return fields
+
+def api_create(data):
+    fields = validate_student_json(data)
+    # SECURED: owner_id selalu dari session, bukan dari body request
+    return insert_student(fields, session.get('user_id'))
+
+def api_update(student_id, data, partial=False):
+    safe_id = validate_id(student_id)
+    fields = validate_student_json(data, partial=partial)
+    if session.get('role') == 'admin':
+        row = execute_student(API_UPDATE_SQL, dict(fields, id=safe_id))
+    else:
+        row = execute_student(API_UPDATE_OWNED_SQL, dict(fields, id=safe_id, owner_id=session.get('user_id')))
+    if row is None:
+        raise ApiError(not_found_or_forbidden_status(safe_id), "Student tidak ditemukan atau bukan milik Anda")
+    return row
+
+def api_delete(student_id):
+    safe_id = validate_id(student_id)
+    if session.get('role') == 'admin':
+        row = execute_student(API_DELETE_SQL, {"id": safe_id})
+    else:
+        row = execute_student(API_DELETE_OWNED_SQL, {"id": safe_id, "owner_id": session.get('user_id')})
+    if row is None:
+        raise ApiError(not_found_or_forbidden_status(safe_id), "Student tidak ditemukan atau bukan milik Anda")
+    return row
+
+def commit_and_invalidate(owner_ids):
+    db.session.commit()
+    listing_cache.invalidate(cache.SCOPE_ALL, *{cache.owner_scope(owner_id) for owner_id in owner_ids})
+
+@app.route('/api/students', methods=['GET'])
+@api_login_required
+def api_list_students():
+    after, before, limit = pagination.parse_page_args(request.args, app.config['STUDENTS_PAGE_SIZE'])
+    try:
+        student_search = search.StudentSearch.from_args(request.args)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    if session.get('role') == 'admin':
+        scope = cache.SCOPE_ALL
+        def load():
+            if shard_router is not None:
+                return shard_router.page(student_search, limit, after=after, before=before)
+            return student_search.page(db.session, 'student', limit, after=after, before=before)
+    else:
+        scope = cache.owner_scope(session.get('user_id'))
+        def load():
+            if shard_router is not None:
+                return shard_router.page(student_search, limit, after=after, before=before,
+                                         owner_id=session.get('user_id'))
+            return student_search.page(
+                db.session, 'student', limit, after=after, before=before,
+                where='owner_id = :owner_id', params={"owner_id": session.get('user_id')}
+            )
+    # Versi dibaca sebelum load supaya halaman lama tidak tersimpan di key versi baru
+    version = student_table_version(None if session.get('role') == 'admin' else session.get('user_id'))
+    try:
+        page = listing_cache.get_or_load(scope, (after, before, limit) + student_search.key(), load,
+                                         version=version)
+    except pagination.CursorNotFound:
+        audit.note('not_found')
+        raise ApiError(404, "Cursor tidak ditemukan")
+    return jsonify({
+        "students": [student_json(row) for row in page.rows],
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
+        "limit": limit,
+    })
+
+@app.route('/api/students/<int:id>', methods=['GET'])
+@api_login_required
+def api_get_student(id):
+    try:
+        safe_id = validate_id(id)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    row = fetch_student(API_SELECT_SQL, safe_id)
+    if row is None:
+        raise ApiError(404, "Student tidak ditemukan")
+    if session.get('role') != 'admin' and row.owner_id != session.get('user_id'):
+        raise ApiError(403, "Student bukan milik Anda")
+    return jsonify(student_json(row))
+
+@app.route('/api/students', methods=['POST'])
+@api_login_required
+def api_create_student():
+    row = api_create(request.get_json(silent=True))
+    commit_and_invalidate([row.owner_id])
+    return jsonify(student_json(row)), 201
+
+@app.route('/api/students/<int:id>', methods=['PUT', 'PATCH'])
+@api_login_required
+def api_update_student(id):
+    try:
+        row = api_update(id, request.get_json(silent=True), partial=request.method == 'PATCH')
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    commit_and_invalidate([row.owner_id])
+    return jsonify(student_json(row))
+
+@app.route('/api/students/<int:id>', methods=['DELETE'])
+@api_login_required
+def api_delete_student(id):
+    try:
+        row = api_delete(id)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    commit_and_invalidate([row.owner_id])
+    return "", 204
+
+@app.route('/api/students:batch', methods=['POST'])
+@api_login_required
+@unsharded_only  # satu transaksi untuk semua operasi hanya mungkin di satu database
+def api_batch_students():
+    """
+    Jalankan banyak operasi dalam SATU transaksi (semua atau tidak sama sekali).
+
+    Body: {"operations": [{"op": "create", "data": {...}},
+                          {"op": "update", "id": 1, "data": {...}},
+                          {"op": "patch", "id": 1, "data": {...}},
+                          {"op": "delete", "id": 2}]}
+    Aturan ownership dicek per baris seperti endpoint tunggal.
+    """
+    body = request.get_json(silent=True)
+    operations = body.get('operations') if isinstance(body, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise ApiError(400, "Body harus berisi daftar 'operations'")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ApiError(400, f"Maksimal {MAX_BATCH_OPERATIONS} operasi per batch")
+
+    results = []
+    owner_ids = set()
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict):
+                raise ApiError(400, "Operasi harus berupa objek JSON")
+            op = operation.get('op')
+            if op == 'create':
+                row, status = api_create(operation.get('data')), 201
+            elif op in ('update', 'patch'):
+                row, status = api_update(operation.get('id'), operation.get('data'), partial=op == 'patch'), 200
+            elif op == 'delete':
+                row, status = api_delete(operation.get('id')), 204
+            else:
+                raise ApiError(400, "op harus create, update, patch, atau delete")
+        except (ApiError, ValueError) as e:
+            # Satu operasi gagal: seluruh batch dibatalkan
+            db.session.rollback()
+            status = e.status if isinstance(e, ApiError) else 400
+            return jsonify({
+                "committed": False,
+                "failed_index": index,
+                "error": str(e),
+                "status": status,
+            }), status
+
+        owner_ids.add(row.owner_id)
+        results.append({"index": index, "status": status, "student": student_json(row)})
+
+    commit_and_invalidate(owner_ids)
+    return jsonify({"committed": True, "results": results})
+
 # ============================================================
 # ADMIN ONLY ROUTES (Contoh penggunaan @admin_required)
 # ============================================================
@@ -353,15 +889,126 @@ def admin_users():
     """Halaman admin untuk melihat semua users"""
     return "Admin Only: User Management Page"
 
+@app.route('/stats')
+@login_required
+def student_stats():
+    """Jumlah student per grade dan kelompok umur dari tabel agregat (studentapp/stats.py)"""
+    owner_id = None if session.get('role') == 'admin' else session.get('user_id')
+    conditional_get = student_conditional_get(owner_id)
+    if conditional_get.not_modified():
+        return conditional_get.response_304()
+    # SECURED: admin melihat semua (termasuk per owner), user biasa hanya datanya sendiri
+    if shard_router is not None:
+        report = shard_router.stats_report(owner_id)
+    elif owner_id is None:
+        report = stats.report(db.session)
+    else:
+        report = stats.report(db.session, owner_id=owner_id)
+    return conditional_get.tag(jsonify(report))
+
 @app.route('/admin/delete-all', methods=['POST'])
 @admin_required  # Hanya admin yang bisa akses
 def admin_delete_all():
-    """Hapus semua data - hanya admin"""
-    db.session.execute(text("DELETE FROM student"))
-    db.session.commit()
-    return redirect(url_for('index'))
+    """Hapus semua data - hanya admin. Berjalan di background; response berisi id job"""
+    # VERSI LAMA - DIKOMENTARI (satu DELETE memegang write lock sampai semua baris terhapus)
+    # db.session.execute(text("DELETE FROM student"))
+    # db.session.commit()
+    # listing_cache.clear()  # semua scope terdampak
+    # return redirect(url_for('index'))
+    return start_purge({})
+
+@app.route('/admin/purge', methods=['POST'])
+@admin_required
+def admin_purge():
+    """Hapus student milik owner_id dan/atau yang cocok filter pencarian (q, grade, age_min, age_max)"""
+    args = request.get_json(silent=True) if request.is_json else request.form
+    if not isinstance(args, dict):
+        raise ApiError(400, "Body harus berupa objek JSON")
+    try:
+        filters = purge.parse_filters(args)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    if not filters:
+        raise ApiError(400, "Minimal satu filter; untuk menghapus semua data gunakan /admin/delete-all")
+    return start_purge(filters)
+
+def start_purge(filters):
+    """
+    Buat job purge, serahkan ke runner thread, dan langsung jawab 202 + id job.
+    Dengan sharding: satu job per sumber yang terdampak (database utama/shard), semuanya di "jobs"
+    """
+    sources = [None] if shard_router is None else shard_router.purge_sources(filters.get('owner_id'))
+    with database.connection(db) as connection:
+        job_ids = [purge.create(connection, filters, session.get('user_id'), shard) for shard in sources]
+        jobs = [purge.get(connection, job_id) for job_id in job_ids]
+    for job_id in job_ids:
+        purge_runner.submit(job_id)
+    payload = {"job": jobs[0]}
+    if shard_router is not None:
+        payload["jobs"] = jobs
+    response = jsonify(payload)
+    response.status_code = 202
+    response.headers['Location'] = url_for('admin_job', job_id=job_ids[0])
+    return response
+
+@app.route('/admin/jobs')
+@admin_required
+def admin_jobs():
+    """Daftar job purge terbaru"""
+    with database.connection(db) as connection:
+        return jsonify({"jobs": purge.list_jobs(connection)})
+
+@app.route('/admin/jobs/<int:job_id>')
+@admin_required
+def admin_job(job_id):
+    """Progres job purge (dibaca dari tabel, jadi bisa di-poll dari worker mana pun)"""
+    with database.connection(db) as connection:
+        job = purge.get(connection, job_id)
+    if job is None:
+        raise ApiError(404, "Job tidak ditemukan")
+    return jsonify({"job": job})
+
+@app.route('/admin/jobs/<int:job_id>/cancel', methods=['POST'])
+@admin_required
+def admin_cancel_job(job_id):
+    """Hentikan job purge di awal chunk berikutnya; baris yang sudah terhapus tidak kembali"""
+    with database.connection(db) as connection:
+        cancelled = purge.cancel(connection, job_id)
+        job = purge.get(connection, job_id)
+    if job is None:
+        raise ApiError(404, "Job tidak ditemukan")
+    if not cancelled:
+        raise ApiError(409, f"Job sudah {job['status']}")
+    return jsonify({"job": job}), 202
+
+@app.route('/admin/sessions/revoke', methods=['POST'])
+@admin_required
+def admin_revoke_sessions():
+    """Logout paksa semua session milik user_id tertentu, atau semua session jika kosong"""
+    user_id = request.form.get('user_id')
+    try:
+        if user_id:
+            revoked = session_store.revoke_user(validate_id(user_id))
+        else:
+            revoked = session_store.revoke_all()
+    except ValueError as e:
+        return f"Error: {str(e)}", 400
+    return jsonify({"revoked": revoked})
+
+@app.route('/admin/cache-stats')
+@admin_required
+def admin_cache_stats():
+    """Counter hit/miss/eviction cache listing untuk menentukan ukuran cache"""
+    return jsonify({**listing_cache.stats(), "sessions": session_store.stats(),
+                    "row_fragments": row_fragments.stats(),
+                    "shards": shard_router.stats() if shard_router is not None else None})
 
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        # create_all + migrasi (studentapp/migrations.py), dilewati jika skema sudah sesuai
+        bootstrap.ensure_schema(db)
+        seed_demo_users()
+        if shard_router is not None:
+            shard_router.prepare()
+    # Server development (reloader + debugger). Produksi: python -m studentapp serve
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,413 @@
+"""
+Benchmark beban campuran (login, list, add, edit, delete) untuk ketiga varian
+aplikasi dengan gate regresi terhadap baseline JSON.
+
+    python benchmarks/bench_crud.py [--variants baseline,sqli-secured,idor-secured]
+                                    [--scales 1000,100000,1000000] [--requests N]
+                                    [--client test|http] [--users U]
+                                    [--save-baseline FILE] [--baseline FILE]
+                                    [--max-regression 0.20]
+
+Client:
+    test  Flask test client di dalam proses (tanpa jaringan): mengukur biaya route.
+    http  ``python -m studentapp serve`` dijalankan di port bebas lalu dibebani
+          ``--users`` virtual user (trio + requests.Session, paket dari .venv).
+
+Database di-seed sekali per varian & skala di ``--data-dir`` lalu disalin untuk
+setiap run, sehingga hasil write dari run sebelumnya tidak terbawa. Setiap run
+berjalan di proses terpisah karena lokasi database dibaca saat app di-import.
+
+Hasil per operasi: jumlah, p50/p95/p99 (ms), dan ops/s. Dengan ``--baseline``,
+exit code 1 jika p95 sebuah operasi naik atau throughput-nya turun lebih dari
+``--max-regression`` (selisih p95 di bawah ``--min-delta-ms`` dan operasi dengan
+sampel sedikit seperti login diabaikan).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from studentapp import database, serve, validation  # noqa: E402
+
+DEFAULT_SCALES = (1000, 100000, 1000000)
+DEFAULT_REQUESTS = 2000
+DEFAULT_USERS = 8
+DEFAULT_MAX_REGRESSION = 0.20
+DEFAULT_MIN_DELTA_MS = 0.5
+# Operasi dengan sampel lebih sedikit (mis. login) tidak ikut gate regresi
+MIN_GATED_SAMPLES = 20
+SEED_BATCH = 10000
+OWNERS = (1, 2, 3)
+
+# Bobot operasi per iterasi. 'edit' = GET form (edit_form) + POST (edit)
+WORKLOAD = (
+    ('list', 50),
+    ('list_page', 20),
+    ('add', 10),
+    ('edit', 10),
+    ('delete', 10),
+)
+
+# Akun demo per varian dan owner_id milik akun tersebut (None: semua baris)
+CREDENTIALS = {
+    'baseline': ('admin', 'admin123', None),
+    'sqli-secured': ('admin', 'admin123', None),
+    'idor-secured': ('user1', 'user123', 2),
+}
+
+
+# ============================================================
+# SEED DATA
+# ============================================================
+
+def _seed_worker(variant, scale, path):
+    """Buat skema lewat app (create_all + migrasi) lalu isi sampai ``scale`` baris."""
+    os.environ[database.DB_PATH_ENV] = path
+    serve.preload(serve.load_app(variant))
+    connection = database.connect(path)
+    try:
+        (count,) = connection.execute("SELECT COUNT(*) FROM student").fetchone()
+        grades = validation.GRADE_CHOICES
+        while count < scale:
+            stop = min(scale, count + SEED_BATCH)
+            connection.executemany(
+                "INSERT INTO student (name, age, grade, owner_id) VALUES (?, ?, ?, ?)",
+                [(f'Student {i}', 18 + i % 10, grades[i % len(grades)], OWNERS[i % len(OWNERS)])
+                 for i in range(count, stop)]
+            )
+            connection.commit()
+            count = stop
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        connection.close()
+
+
+def seeded_copy(pool, variant, scale, data_dir, run_dir):
+    """Salinan database ter-seed untuk satu run."""
+    base = os.path.join(data_dir, f'seed-{variant}-{scale}.db')
+    if not os.path.exists(base):
+        started = time.perf_counter()
+        pool.submit(_seed_worker, variant, scale, base).result()
+        print(f"  seed {variant} {scale} baris: {time.perf_counter() - started:.1f} s", flush=True)
+    path = os.path.join(run_dir, f'run-{variant}-{scale}.db')
+    shutil.copyfile(base, path)
+    return path
+
+
+def target_ids(path, owner_id):
+    """ID yang boleh diedit/dihapus oleh akun benchmark."""
+    connection = sqlite3.connect(path)
+    try:
+        if owner_id is None:
+            rows = connection.execute("SELECT id FROM student")
+        else:
+            rows = connection.execute("SELECT id FROM student WHERE owner_id = ?", (owner_id,))
+        return [row[0] for row in rows]
+    finally:
+        connection.close()
+
+
+# ============================================================
+# WORKLOAD
+# ============================================================
+
+class Workload:
+    """Urutan operasi acak (deterministik per seed).
+
+    ``ids`` adalah baris yang boleh diedit/dihapus oleh workload ini; pada mode
+    http setiap virtual user mendapat potongan sendiri supaya tidak saling
+    menghapus baris yang sedang diedit user lain.
+    """
+
+    def __init__(self, ids, rng):
+        self.ids = ids
+        self.rng = rng
+        self.deleted = set()
+        self.added = 0
+        self.names, weights = zip(*WORKLOAD)
+        self.cumulative = [sum(weights[:i + 1]) for i in range(len(weights))]
+
+    def choose(self):
+        return self.rng.choices(self.names, cum_weights=self.cumulative)[0]
+
+    def _pick_id(self):
+        for _ in range(10):
+            student_id = self.rng.choice(self.ids)
+            if student_id not in self.deleted:
+                return student_id
+        return self.ids[0]
+
+    def steps(self, op):
+        """Request (nama, method, path, data) untuk satu operasi."""
+        if op == 'list':
+            return [('list', 'GET', '/', None)]
+        if op == 'list_page':
+            return [('list_page', 'GET', f'/?after={self.rng.choice(self.ids)}', None)]
+        if op == 'add':
+            self.added += 1
+            data = {'name': f'Bench {self.added}', 'age': '21', 'grade': 'B'}
+            return [('add', 'POST', '/add', data)]
+        if op == 'edit':
+            student_id = self._pick_id()
+            data = {'name': f'Edited {student_id}', 'age': '22', 'grade': 'A-'}
+            return [('edit_form', 'GET', f'/edit/{student_id}', None),
+                    ('edit', 'POST', f'/edit/{student_id}', data)]
+        student_id = self._pick_id()
+        self.deleted.add(student_id)
+        return [('delete', 'GET', f'/delete/{student_id}', None)]
+
+
+def summarize(samples, elapsed):
+    """samples: {op: [detik, ...]} -> ringkasan per operasi + total."""
+    ops = {}
+    total = 0
+    for op, latencies in sorted(samples.items()):
+        values = sorted(latencies)
+        total += len(values)
+        ops[op] = {
+            'count': len(values),
+            'p50_ms': round(serve.percentile(values, 50) * 1000, 3),
+            'p95_ms': round(serve.percentile(values, 95) * 1000, 3),
+            'p99_ms': round(serve.percentile(values, 99) * 1000, 3),
+            'ops_s': round(len(values) / elapsed, 1),
+        }
+    return {'elapsed_s': round(elapsed, 3), 'requests': total,
+            'throughput_rps': round(total / elapsed, 1), 'ops': ops}
+
+
+def _check_status(name, status):
+    # Route HTML menjawab redirect (302) setelah write dan 200/304 untuk GET
+    if status >= 400:
+        raise RuntimeError(f"{name}: status {status}")
+
+
+def _run_test_client(variant, path, requests_count, seed):
+    """Jalankan workload dengan Flask test client (di proses spawn terpisah)."""
+    os.environ[database.DB_PATH_ENV] = path
+    module = serve.load_app(variant)
+    username, password, owner_id = CREDENTIALS[variant]
+    workload = Workload(target_ids(path, owner_id), random.Random(seed))
+    client = module.app.test_client()
+    samples = {}
+    clock = time.perf_counter
+
+    def timed(name, method, url, data):
+        start = clock()
+        response = client.open(url, method=method, data=data)
+        response.get_data()
+        samples.setdefault(name, []).append(clock() - start)
+        _check_status(name, response.status_code)
+
+    started = clock()
+    timed('login', 'POST', '/login', {'username': username, 'password': password})
+    for _ in range(requests_count):
+        for step in workload.steps(workload.choose()):
+            timed(*step)
+    return summarize(samples, clock() - started)
+
+
+# ============================================================
+# CLIENT HTTP (trio + requests) TERHADAP `studentapp serve`
+# ============================================================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server berhenti (exit {process.returncode})")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server tidak siap dalam batas waktu")
+
+
+def _run_http(variant, path, requests_count, seed, users, workers, threads):
+    try:
+        import requests
+        import trio
+    except ImportError as e:
+        raise SystemExit(f"--client http membutuhkan paket requests dan trio ({e})")
+
+    port = _free_port()
+    command = [sys.executable, '-m', 'studentapp', '--db', path, 'serve', '--app', variant,
+               '--port', str(port), '--workers', str(workers), '--threads', str(threads)]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True)
+    try:
+        _wait_for_port(port, server)
+        base_url = f'http://127.0.0.1:{port}'
+        username, password, owner_id = CREDENTIALS[variant]
+        ids = target_ids(path, owner_id)
+        samples = {}
+        limiter = trio.CapacityLimiter(users)
+        clock = time.perf_counter
+
+        def timed(http, name, method, url, data):
+            start = clock()
+            response = http.request(method, base_url + url, data=data, allow_redirects=False)
+            samples.setdefault(name, []).append(clock() - start)
+            _check_status(name, response.status_code)
+
+        async def virtual_user(index, count):
+            http = requests.Session()
+            workload = Workload(ids[index::users], random.Random(seed + index))
+            await trio.to_thread.run_sync(
+                timed, http, 'login', 'POST', '/login', {'username': username, 'password': password},
+                limiter=limiter)
+            for _ in range(count):
+                for step in workload.steps(workload.choose()):
+                    await trio.to_thread.run_sync(timed, http, *step, limiter=limiter)
+            http.close()
+
+        async def main():
+            async with trio.open_nursery() as nursery:
+                for index in range(users):
+                    share = requests_count // users + (1 if index < requests_count % users else 0)
+                    nursery.start_soon(virtual_user, index, share)
+
+        started = clock()
+        trio.run(main)
+        result = summarize(samples, clock() - started)
+    finally:
+        server.send_signal(signal.SIGTERM)
+        output, _ = server.communicate(timeout=60)
+    result['server_report'] = [line for line in output.splitlines() if line.strip()][-2:]
+    return result
+
+
+# ============================================================
+# BASELINE & GATE REGRESI
+# ============================================================
+
+def compare(baseline, current, max_regression, min_delta_ms):
+    """Daftar pesan regresi: p95 naik / throughput turun lebih dari ``max_regression``."""
+    regressions = []
+    for key, run in current['runs'].items():
+        base_run = baseline.get('runs', {}).get(key)
+        if base_run is None:
+            continue
+        for op, stats in run['ops'].items():
+            base = base_run['ops'].get(op)
+            if base is None or min(stats['count'], base['count']) < MIN_GATED_SAMPLES:
+                continue
+            p95, base_p95 = stats['p95_ms'], base['p95_ms']
+            if p95 - base_p95 > min_delta_ms and p95 > base_p95 * (1 + max_regression):
+                regressions.append(f"{key} {op}: p95 {base_p95:.2f} -> {p95:.2f} ms")
+            if base['ops_s'] and stats['ops_s'] < base['ops_s'] * (1 - max_regression):
+                regressions.append(f"{key} {op}: {base['ops_s']:.1f} -> {stats['ops_s']:.1f} ops/s")
+    return regressions
+
+
+def print_run(key, run):
+    print(f"{key}: {run['requests']} request, {run['throughput_rps']:.1f} req/s")
+    print(f"    {'operasi':<10} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9}")
+    for op, stats in run['ops'].items():
+        print(f"    {op:<10} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+              f"{stats['p99_ms']:>9.2f} {stats['ops_s']:>9.1f}")
+    for line in run.get('server_report', ()):
+        print(f"    server: {line}")
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--variants', default=','.join(serve.VARIANTS),
+                        help='varian dipisah koma (default: semua)')
+    parser.add_argument('--scales', type=_int_list, default=list(DEFAULT_SCALES),
+                        help='jumlah baris seed dipisah koma')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='jumlah operasi workload per varian & skala')
+    parser.add_argument('--client', choices=('test', 'http'), default='test')
+    parser.add_argument('--users', type=int, default=DEFAULT_USERS, help='virtual user (mode http)')
+    parser.add_argument('--workers', type=int, default=2, help='worker server (mode http)')
+    parser.add_argument('--threads', type=int, default=serve.DEFAULT_THREADS,
+                        help='thread per worker server (mode http)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'studentapp-bench'),
+                        help='lokasi database seed yang dipakai ulang antar run')
+    parser.add_argument('--save-baseline', metavar='FILE', help='simpan hasil sebagai baseline JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='bandingkan dengan baseline JSON')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    variants = [name for name in args.variants.split(',') if name]
+    for name in variants:
+        if name not in serve.VARIANTS:
+            parser.error(f"varian tidak dikenal: {name}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix='run-', dir=args.data_dir)
+    result = {
+        'meta': {'client': args.client, 'requests': args.requests, 'seed': args.seed,
+                 'users': args.users if args.client == 'http' else 1,
+                 'python': platform.python_version(), 'machine': platform.machine(),
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'runs': {},
+    }
+    # spawn: setiap run meng-import app dengan $STUDENTS_DB sendiri
+    context = multiprocessing.get_context('spawn')
+    try:
+        for scale in args.scales:
+            for variant in variants:
+                key = f'{variant}/{scale}'
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    path = seeded_copy(pool, variant, scale, args.data_dir, run_dir)
+                    if args.client == 'test':
+                        run = pool.submit(_run_test_client, variant, path, args.requests, args.seed).result()
+                    else:
+                        run = _run_http(variant, path, args.requests, args.seed,
+                                        args.users, args.workers, args.threads)
+                result['runs'][key] = run
+                print_run(key, run)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print(f"Baseline disimpan ke {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(baseline, result, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"REGRESI (> {args.max_regression:.0%}):")
+            for line in regressions:
+                print(f"    {line}")
+            return 1
+        print(f"Tidak ada regresi dibanding {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
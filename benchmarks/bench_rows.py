@@ -0,0 +1,178 @@
+"""
+Benchmark baris listing: ``Row`` SQLAlchemy (jalur lama) dibanding record
+namedtuple dari ``pagination.compact_rows`` (fetchmany dari cursor DBAPI).
+
+    python benchmarks/bench_rows.py [--rows 100000] [--repeat 5]
+                                    [--variant idor-secured] [--row-cache]
+
+Database sementara di-bootstrap lewat app (skema + migrasi) lalu diisi
+``--rows`` baris. Yang diukur untuk kedua jalur:
+    fetch    waktu ``SELECT * FROM student`` sampai semua baris jadi list
+    memori   ukuran list baris setelah fetch (``tracemalloc``), per baris dan
+             per 100k baris
+    akses    membaca id/name/age/grade semua baris (pola macro ``student_row``)
+    render   ``render_template('index.html')`` dengan semua baris
+
+Fragment cache baris (``TEMPLATE_ROW_CACHE_SIZE``) dimatikan supaya render
+benar-benar memanggil macro per baris; ``--row-cache`` menyalakannya (cache
+sudah hangat dari run pertama). Nilai waktu adalah median dari ``--repeat`` run.
+"""
+
+import argparse
+import gc
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from studentapp import bootstrap, database, pagination  # noqa: E402
+
+DEFAULT_ROWS = 100000
+DEFAULT_REPEAT = 5
+DEFAULT_VARIANT = 'idor-secured'
+SEED_BATCH = 10000
+GRADES = ('A', 'B', 'C', 'D', 'E', 'F')
+
+SELECT_SQL = 'SELECT * FROM student ORDER BY id'
+
+
+def legacy_rows(result):
+    """Jalur sebelum compact_rows: KeysetPage mengiterasi result (``Row`` per baris)."""
+    return list(result)
+
+
+def compact_rows(result):
+    return list(pagination.compact_rows(result))
+
+
+PATHS = (('row', legacy_rows), ('record', compact_rows))
+
+
+# ============================================================
+# SETUP
+# ============================================================
+
+def seed(path, count):
+    connection = sqlite3.connect(path)
+    try:
+        for start in range(0, count, SEED_BATCH):
+            connection.executemany(
+                'INSERT INTO student (name, age, grade) VALUES (?, ?, ?)',
+                [(f'Student {i}', 10 + i % 80, GRADES[i % len(GRADES)])
+                 for i in range(start, min(start + SEED_BATCH, count))]
+            )
+            connection.commit()
+    finally:
+        connection.close()
+
+
+# ============================================================
+# PENGUKURAN
+# ============================================================
+
+def fetch(module, load):
+    from sqlalchemy import text
+
+    result = module.db.session.execute(text(SELECT_SQL))
+    try:
+        return load(result)
+    finally:
+        result.close()
+
+
+def measure_memory(module, load):
+    """Byte yang masih dialokasikan oleh list baris setelah fetch."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = fetch(module, load)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return len(rows), size
+
+
+def access(rows):
+    for student in rows:
+        student.id, student.name, student.age, student.grade
+
+
+def render(module, rows):
+    from flask import render_template
+
+    from studentapp import search
+
+    return render_template('index.html', students=rows, page=None, role='admin',
+                           search=search.StudentSearch.from_args({}))
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def measure(module, load, repeat):
+    count, size = measure_memory(module, load)
+    fetch_ms = statistics.median(_timed(fetch, module, load) for _ in range(repeat))
+    rows = fetch(module, load)
+    access_ms = statistics.median(_timed(access, rows) for _ in range(repeat))
+    render_ms = statistics.median(_timed(render, module, rows) for _ in range(repeat))
+    return {
+        'rows': count,
+        'bytes_per_row': size / count if count else 0.0,
+        'mib_per_100k': size / count * 100000 / 2 ** 20 if count else 0.0,
+        'fetch_ms': fetch_ms,
+        'access_ms': access_ms,
+        'render_ms': render_ms,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='run per pengukuran (median)')
+    parser.add_argument('--variant', choices=tuple(bootstrap.VARIANTS), default=DEFAULT_VARIANT)
+    parser.add_argument('--row-cache', action='store_true', help='render dengan fragment cache baris')
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix='studentapp-rows-')
+    os.environ[database.DB_PATH_ENV] = os.path.join(work_dir, 'students.db')
+    try:
+        module = bootstrap.load_app(args.variant)
+        bootstrap.prepare(module)
+        seed(os.environ[database.DB_PATH_ENV], args.rows)
+        fragments = module.app.extensions['studentapp_row_fragments']
+        if not args.row_cache:
+            fragments.maxsize = 0
+
+        results = {}
+        with module.app.test_request_context('/'):
+            for name, load in PATHS:
+                results[name] = measure(module, load, args.repeat)
+                module.db.session.remove()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.variant}, {args.rows} baris, fragment cache {'on' if args.row_cache else 'off'}:")
+    for name, run in results.items():
+        print(f"  {name:<7} {run['bytes_per_row']:>6.0f} B/baris ({run['mib_per_100k']:.1f} MiB/100k)  "
+              f"fetch {run['fetch_ms']:>7.1f} ms  akses {run['access_ms']:>6.1f} ms  "
+              f"render {run['render_ms']:>7.1f} ms")
+    old, new = results['row'], results['record']
+    for key, label in (('bytes_per_row', 'memori'), ('fetch_ms', 'fetch'),
+                       ('access_ms', 'akses'), ('render_ms', 'render')):
+        if new[key]:
+            print(f"  {label}: {old[key] / new[key]:.2f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
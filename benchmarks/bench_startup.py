@@ -0,0 +1,227 @@
+"""
+Benchmark waktu start proses: import aplikasi (``-X importtime``), bootstrap
+skema, dan command line, dengan gate regresi terhadap baseline JSON.
+
+    python benchmarks/bench_startup.py [--variants baseline,sqli-secured,idor-secured]
+                                       [--repeat 5] [--top 8]
+                                       [--save-baseline FILE] [--baseline FILE]
+                                       [--max-regression 0.20]
+
+Setiap pengukuran berjalan di interpreter baru (``subprocess``) seperti worker
+yang di-spawn atau test suite yang baru mulai, jadi modul yang sudah ter-import
+di proses benchmark tidak mempengaruhi hasil. Nilai yang dilaporkan adalah
+median dari ``--repeat`` run.
+
+Yang diukur per varian:
+    import      wall time ``python -c "import <app>"`` dan total dari ``-X importtime``
+    bootstrap   ``bootstrap.prepare()`` di database kosong (cold) dan di database
+                yang sudah di-bootstrap (cached, create_all + migrasi dilewati)
+Ditambah ``python -m studentapp migrate`` di database yang sudah terbaru.
+
+Rincian ``-X importtime`` dikelompokkan per paket teratas (flask, sqlalchemy,
+studentapp, ...) dan ``--top`` modul dengan waktu import sendiri terbesar.
+Dengan ``--baseline``, exit code 1 jika salah satu waktu naik lebih dari
+``--max-regression`` (selisih di bawah ``--min-delta-ms`` diabaikan).
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from studentapp import bootstrap, database  # noqa: E402
+
+DEFAULT_REPEAT = 5
+DEFAULT_TOP = 8
+DEFAULT_MAX_REGRESSION = 0.20
+DEFAULT_MIN_DELTA_MS = 10.0
+
+# Dijalankan di proses anak: ukur prepare() saja (import app tidak ikut dihitung)
+BOOTSTRAP_SCRIPT = """
+import json, sys, time
+from studentapp import bootstrap
+module = bootstrap.load_app(sys.argv[1])
+started = time.perf_counter()
+bootstrap.prepare(module)
+print(json.dumps({'ms': (time.perf_counter() - started) * 1000}))
+"""
+
+
+# ============================================================
+# PENGUKURAN
+# ============================================================
+
+def _run(args, db_path, capture_stderr=False):
+    """Jalankan interpreter baru di root proyek. Return (wall ms, stdout, stderr)."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env[database.DB_PATH_ENV] = db_path
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, env=env, check=True,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE if capture_stderr else None,
+                            text=True)
+    return (time.perf_counter() - started) * 1000, result.stdout, result.stderr
+
+
+def parse_importtime(output):
+    """
+    Baris ``import time: self | cumulative | name`` -> (total ms, {paket: ms}, [(self ms, modul)]).
+
+    Total = jumlah waktu kumulatif modul tingkat atas (indentasi nol).
+    """
+    total = 0.0
+    packages = defaultdict(float)
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        self_ms = int(self_us) / 1000
+        package = name.strip().split('.')[0]
+        packages[package] += self_ms
+        modules.append((self_ms, name.strip()))
+        if not name[1:].startswith(' '):
+            total += int(cumulative_us) / 1000
+    return total, dict(packages), modules
+
+
+def measure_import(variant, db_path, repeat):
+    module = bootstrap.VARIANTS[variant]
+    walls, totals, samples = [], [], []
+    for _ in range(repeat):
+        wall, _, stderr = _run(['-X', 'importtime', '-c', f'import {module}'], db_path, capture_stderr=True)
+        total, packages, modules = parse_importtime(stderr)
+        walls.append(wall)
+        totals.append(total)
+        samples.append((packages, modules))
+    # Rincian diambil dari run dengan total import median
+    packages, modules = samples[sorted(range(repeat), key=totals.__getitem__)[repeat // 2]]
+    return {
+        'wall_ms': statistics.median(walls),
+        'import_ms': statistics.median(totals),
+        'packages': dict(sorted(packages.items(), key=lambda item: -item[1])),
+        'modules': sorted(modules, reverse=True),
+    }
+
+
+def measure_bootstrap(variant, work_dir, repeat):
+    cold, cached = [], []
+    for i in range(repeat):
+        path = os.path.join(work_dir, f'{variant}-{i}.db')
+        for samples in (cold, cached):
+            _, stdout, _ = _run(['-c', BOOTSTRAP_SCRIPT, variant], path)
+            samples.append(json.loads(stdout)['ms'])
+    return {'cold_ms': statistics.median(cold), 'cached_ms': statistics.median(cached)}
+
+
+def measure_cli(db_path, repeat):
+    walls = [_run(['-m', 'studentapp', '--db', db_path, 'migrate'], db_path)[0] for _ in range(repeat)]
+    return {'wall_ms': statistics.median(walls)}
+
+
+# ============================================================
+# BASELINE & GATE REGRESI
+# ============================================================
+
+def _timings(result):
+    """Flatten hasil menjadi {nama: ms} untuk dibandingkan."""
+    flat = {'cli/migrate': result['cli']['wall_ms']}
+    for variant, run in result['variants'].items():
+        flat[f'{variant}/import_wall'] = run['import']['wall_ms']
+        flat[f'{variant}/import'] = run['import']['import_ms']
+        flat[f'{variant}/bootstrap_cold'] = run['bootstrap']['cold_ms']
+        flat[f'{variant}/bootstrap_cached'] = run['bootstrap']['cached_ms']
+    return flat
+
+
+def compare(baseline, current, max_regression, min_delta_ms):
+    regressions = []
+    base = _timings(baseline)
+    for name, value in _timings(current).items():
+        before = base.get(name)
+        if before is None:
+            continue
+        if value - before > min_delta_ms and value > before * (1 + max_regression):
+            regressions.append(f"{name}: {before:.1f} -> {value:.1f} ms")
+    return regressions
+
+
+def print_variant(variant, run, top):
+    imp, boot = run['import'], run['bootstrap']
+    print(f"{variant}: import {imp['import_ms']:.1f} ms (proses {imp['wall_ms']:.1f} ms), "
+          f"bootstrap cold {boot['cold_ms']:.1f} ms / cached {boot['cached_ms']:.1f} ms")
+    packages = ', '.join(f"{name} {ms:.1f}" for name, ms in list(imp['packages'].items())[:top])
+    print(f"    per paket (ms): {packages}")
+    for self_ms, name in imp['modules'][:top]:
+        print(f"    {self_ms:>8.1f} ms  {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--variants', default=','.join(bootstrap.VARIANTS),
+                        help='varian dipisah koma (default: semua)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='run per pengukuran (median)')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='jumlah modul terlambat yang ditampilkan')
+    parser.add_argument('--save-baseline', metavar='FILE', help='simpan hasil sebagai baseline JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='bandingkan dengan baseline JSON')
+    parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    variants = [name for name in args.variants.split(',') if name]
+    for name in variants:
+        if name not in bootstrap.VARIANTS:
+            parser.error(f"varian tidak dikenal: {name}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix='studentapp-startup-')
+    result = {
+        'meta': {'repeat': args.repeat, 'python': platform.python_version(),
+                 'machine': platform.machine(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'variants': {},
+    }
+    try:
+        for variant in variants:
+            run = {'bootstrap': measure_bootstrap(variant, work_dir, args.repeat)}
+            # Import diukur di database yang sudah di-bootstrap (kondisi restart biasa)
+            run['import'] = measure_import(variant, os.path.join(work_dir, f'{variant}-0.db'), args.repeat)
+            result['variants'][variant] = run
+            print_variant(variant, run, args.top)
+        result['cli'] = measure_cli(os.path.join(work_dir, f'{variants[0]}-0.db'), args.repeat)
+        print(f"python -m studentapp migrate: {result['cli']['wall_ms']:.1f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for run in result['variants'].values():
+        # Baseline cukup menyimpan modul teratas
+        run['import']['modules'] = run['import']['modules'][:args.top]
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print(f"Baseline disimpan ke {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(baseline, result, args.max_regression, args.min_delta_ms)
+        if regressions:
+            print(f"REGRESI (> {args.max_regression:.0%}):")
+            for line in regressions:
+                print(f"    {line}")
+            return 1
+        print(f"Tidak ada regresi dibanding {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark validasi input: implementasi lama (pattern string per panggilan,
+list grade, scan <> kedua) vs studentapp.validation per-field dan validate_batch.
+
+    python benchmarks/bench_validation.py [--rows N] [--repeat R]
+
+Hasil ditampilkan sebagai biaya per baris (name + age + grade).
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from studentapp import validation  # noqa: E402
+
+
+# ============================================================
+# VERSI LAMA (salinan dari app_secured.py sebelum validation.py)
+# ============================================================
+
+def legacy_validate_input(value, field_name, max_length=100, allowed_pattern=r'^[a-zA-Z0-9\s\-\.]+$'):
+    if not value:
+        raise ValueError(f"{field_name} tidak boleh kosong")
+    if len(value) > max_length:
+        raise ValueError(f"{field_name} maksimal {max_length} karakter")
+    if not re.match(allowed_pattern, value):
+        raise ValueError(f"{field_name} mengandung karakter tidak valid")
+    if any(ch in value for ch in "<>"):
+        raise ValueError(f"{field_name} mengandung karakter berbahaya")
+    return value.strip()
+
+
+def legacy_validate_age(age_value):
+    try:
+        age_int = int(age_value)
+        if age_int < 1 or age_int > 150:
+            raise ValueError("Umur harus antara 1-150")
+        return age_int
+    except (ValueError, TypeError):
+        raise ValueError("Umur tidak valid")
+
+
+def legacy_validate_grade(grade_value):
+    valid_grades = ['A', 'B', 'C', 'D', 'E', 'F', 'A+', 'A-', 'B+', 'B-', 'C+', 'C-', 'D+', 'D-']
+    grade = grade_value.strip().upper()
+    if grade not in valid_grades:
+        raise ValueError(f"Grade harus salah satu dari: {', '.join(valid_grades)}")
+    return grade
+
+
+def make_records(count):
+    grades = validation.GRADE_CHOICES
+    records = []
+    for i in range(count):
+        if i % 10 == 9:
+            records.append({'name': f'Bad <b>{i}</b>', 'age': '20', 'grade': 'A'})
+        else:
+            records.append({'name': f'Student Name {i}', 'age': str(18 + i % 40),
+                            'grade': grades[i % len(grades)].lower()})
+    return records
+
+
+def run_per_field(records, validate_input, validate_age, validate_grade):
+    # Sama seperti yang harus dilakukan import tanpa validate_batch:
+    # panggil tiga validator per baris dan kumpulkan hasil/error
+    rows = []
+    errors = []
+    for index, record in enumerate(records):
+        try:
+            rows.append((index, (
+                validate_input(record['name'], 'Name', max_length=100),
+                validate_age(record['age']),
+                validate_grade(record['grade']),
+            )))
+        except ValueError as e:
+            errors.append((index, str(e)))
+    return rows, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    records = make_records(args.rows)
+    cases = {
+        'lama (per field)': lambda: run_per_field(
+            records, legacy_validate_input, legacy_validate_age, legacy_validate_grade),
+        'validation (per field)': lambda: run_per_field(
+            records, validation.validate_input, validation.validate_age, validation.validate_grade),
+        'validation.validate_batch': lambda: validation.validate_batch(records),
+    }
+
+    print(f"{args.rows} baris, best of {args.repeat}")
+    baseline = None
+    for label, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        per_row_us = best / args.rows * 1e6
+        baseline = baseline or per_row_us
+        print(f"  {label:<28} {per_row_us:7.3f} us/baris  ({baseline / per_row_us:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
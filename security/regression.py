@@ -0,0 +1,508 @@
+"""
+Regression keamanan headless: skenario SQL Injection, XSS, IDOR, dan akses
+tanpa login (sama seperti laporan .docx dan folder ``test_screenshots*``)
+dijalankan terhadap ketiga varian aplikasi lewat Flask test client, paralel di
+beberapa proses worker.
+
+    python security/regression.py [--variants baseline,sqli-secured,idor-secured]
+                                  [--scenarios sqli-delete-or,xss-script,...]
+                                  [--workers N] [--json FILE]
+                                  [--screenshots DIR] [--list]
+
+Setiap worker (proses ``spawn``) menangani satu varian dengan salinan
+``instance/students.db`` sendiri di folder sementara. App di-import sekali per
+worker, lalu setiap skenario berjalan di child ``fork`` dengan database yang
+dipulihkan dari salinan, jadi serangan yang menghapus/mengubah data (atau
+mengisi cache dan session) tidak mempengaruhi skenario lain dan database di
+repo tidak pernah disentuh. Hasil tiap skenario adalah ``vulnerable``
+(serangan berhasil), ``blocked``, atau ``n/a`` (skenario tidak berlaku, mis.
+IDOR di varian yang hanya punya satu akun), lalu dibandingkan dengan hasil
+yang diharapkan: app.py memang dibiarkan rentan, varian secured harus
+memblokir. Exit code 1 jika ada hasil yang berbeda dari harapan.
+
+``--screenshots DIR`` menambahkan capture browser (Selenium + Chrome
+headless terhadap ``python -m studentapp serve``) HANYA untuk skenario yang
+ditandai ``screenshot=True``; gambar disimpan di ``DIR/<varian>/`` dengan
+pola nama seperti ``test_screenshots`` (``NN_<skenario>_<langkah>.png``).
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from studentapp import bootstrap, database, passwords, serve  # noqa: E402
+
+VULNERABLE = 'vulnerable'
+BLOCKED = 'blocked'
+NOT_APPLICABLE = 'n/a'
+ERROR = 'error'
+
+# Biaya scrypt kecil untuk akun demo: skenario menguji otorisasi, bukan biaya
+# hash, dan login dengan biaya produksi di banyak worker paralel hanya
+# memperlambat run (dan memenuhi log request lambat). Override lewat environment.
+REGRESSION_SCRYPT_N = 2 ** 10
+
+# Akun per varian: (username, password). app.py dan app_secured.py hanya punya admin
+ACCOUNTS = {
+    'baseline': {'admin': 'admin123'},
+    'sqli-secured': {'admin': 'admin123'},
+    'idor-secured': {'admin': 'admin123', 'user1': 'user123'},
+}
+
+# Baris di instance/students.db: id 1 dan 2 milik admin (owner_id 1)
+TARGET_ID = 1
+ADMIN_ROW_ID = 2
+
+
+# ============================================================
+# SKENARIO
+# ============================================================
+
+class Scenario:
+    """
+    Satu serangan: request yang dikirim (``method``, ``url``, ``form``) dan
+    ``check(probe, response)`` yang mengembalikan True jika serangan berhasil.
+
+    Args:
+        account: akun yang login sebelum serangan (None: tanpa login)
+        vulnerable_in: varian yang memang diharapkan rentan
+        form_page: halaman berisi form untuk request POST (capture browser)
+        screenshot: True agar skenario ini juga di-capture di browser
+    """
+
+    def __init__(self, name, category, description, method, url, check, form=None, account='admin',
+                 vulnerable_in=(), form_page=None, screenshot=False):
+        self.name = name
+        self.category = category
+        self.description = description
+        self.method = method
+        self.url = url
+        self.check = check
+        self.form = form
+        self.account = account
+        self.vulnerable_in = frozenset(vulnerable_in)
+        self.form_page = form_page
+        self.screenshot = screenshot
+
+    def applies_to(self, variant):
+        return self.account is None or self.account in ACCOUNTS[variant]
+
+    def expected(self, variant):
+        if not self.applies_to(variant):
+            return NOT_APPLICABLE
+        return VULNERABLE if variant in self.vulnerable_in else BLOCKED
+
+
+def _row_exists(name):
+    def check(probe, response):
+        return probe.scalar("SELECT COUNT(*) FROM student WHERE name = ?", (name,)) > 0
+    return check
+
+
+def _row_deleted(student_id):
+    def check(probe, response):
+        return probe.scalar("SELECT COUNT(*) FROM student WHERE id = ?", (student_id,)) == 0
+    return check
+
+
+def _other_rows_deleted(probe, response):
+    # DELETE ... WHERE id=1 OR 1=1: baris selain target ikut terhapus
+    return probe.scalar("SELECT COUNT(*) FROM student WHERE id != ?", (TARGET_ID,)) < probe.initial_count - 1
+
+
+def _grade_hacked(probe, response):
+    return probe.scalar("SELECT COUNT(*) FROM student WHERE grade = 'HACKED'") > 0
+
+
+def _table_dropped(probe, response):
+    return probe.scalar("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'student'") == 0
+
+
+def _payload_rendered(payload):
+    def check(probe, response):
+        # Payload muncul apa adanya (tidak di-escape) di halaman daftar
+        return payload in probe.client.get('/?limit=500').get_data(as_text=True)
+    return check
+
+
+def _renamed(student_id, name):
+    def check(probe, response):
+        return probe.scalar("SELECT COUNT(*) FROM student WHERE id = ? AND name = ?", (student_id, name)) > 0
+    return check
+
+
+def _admin_row_readable(probe, response):
+    admin_name = probe.scalar("SELECT name FROM student WHERE id = ?", (ADMIN_ROW_ID,))
+    return response.status_code == 200 and admin_name in response.get_data(as_text=True)
+
+
+def _xss(name, payload, screenshot=False):
+    return Scenario(name, 'xss', f"payload XSS di field name: {payload}", 'POST', '/add',
+                    _payload_rendered(payload), form={'name': payload, 'age': '20', 'grade': 'A'},
+                    form_page='/', screenshot=screenshot)
+
+
+SCENARIOS = (
+    Scenario('auth-add-no-login', 'auth', "POST /add tanpa session", 'POST', '/add',
+             _row_exists('Tanpa Login'), form={'name': 'Tanpa Login', 'age': '20', 'grade': 'A'}, account=None),
+    Scenario('auth-delete-no-login', 'auth', "GET /delete/1 tanpa session", 'GET', f'/delete/{TARGET_ID}',
+             _row_deleted(TARGET_ID), account=None),
+    Scenario('sqli-delete-or', 'sqli', "GET /delete/1 OR 1=1 menghapus semua baris", 'GET',
+             f'/delete/{TARGET_ID}%20OR%201=1', _other_rows_deleted, vulnerable_in=('baseline',),
+             screenshot=True),
+    Scenario('sqli-edit-update-all', 'sqli', "name = test', grade='HACKED' WHERE 1=1-- di form edit", 'POST',
+             f'/edit/{TARGET_ID}', _grade_hacked,
+             form={'name': "test', grade='HACKED' WHERE 1=1--", 'age': '20', 'grade': 'A'},
+             vulnerable_in=('baseline',), form_page=f'/edit/{TARGET_ID}'),
+    Scenario('sqli-add-drop-table', 'sqli', "name = test'); DROP TABLE student;-- di form tambah", 'POST',
+             '/add', _table_dropped, form={'name': "test'); DROP TABLE student;--", 'age': '20', 'grade': 'A'},
+             form_page='/'),
+    _xss('xss-script', "<script>alert('XSS')</script>", screenshot=True),
+    _xss('xss-img-onerror', "<img src=x onerror=alert('XSS')>"),
+    _xss('xss-svg-onload', "<svg onload=alert('XSS')>"),
+    Scenario('idor-delete', 'idor', "user1 menghapus /delete/2 milik admin", 'GET', f'/delete/{ADMIN_ROW_ID}',
+             _row_deleted(ADMIN_ROW_ID), account='user1', screenshot=True),
+    Scenario('idor-edit', 'idor', "user1 mengubah /edit/2 milik admin", 'POST', f'/edit/{ADMIN_ROW_ID}',
+             _renamed(ADMIN_ROW_ID, 'HACKED BY IDOR'),
+             form={'name': 'HACKED BY IDOR', 'age': '30', 'grade': 'A'}, account='user1',
+             form_page=f'/edit/{ADMIN_ROW_ID}'),
+    Scenario('idor-edit-form-read', 'idor', "user1 membuka form /edit/2 milik admin", 'GET',
+             f'/edit/{ADMIN_ROW_ID}', _admin_row_readable, account='user1'),
+    Scenario('idor-api-read', 'idor', "user1 membaca GET /api/students/2 milik admin", 'GET',
+             f'/api/students/{ADMIN_ROW_ID}', _admin_row_readable, account='user1'),
+)
+
+SCENARIOS_BY_NAME = {scenario.name: scenario for scenario in SCENARIOS}
+
+
+# ============================================================
+# WORKER (HEADLESS)
+# ============================================================
+
+class Probe:
+    """Test client satu skenario + akses baca ke salinan database-nya."""
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.initial_count = self.scalar("SELECT COUNT(*) FROM student")
+
+    def scalar(self, sql, params=()):
+        connection = sqlite3.connect(self.path)
+        try:
+            row = connection.execute(sql, params).fetchone()
+        finally:
+            connection.close()
+        return row[0] if row is not None else None
+
+
+def copy_database(source, target, readonly=False):
+    """Salinan konsisten database (backup API, termasuk isi WAL)."""
+    source = sqlite3.connect(f'file:{source}?mode=ro', uri=True) if readonly else sqlite3.connect(source)
+    destination = sqlite3.connect(target)
+    try:
+        source.backup(destination)
+    finally:
+        destination.close()
+        source.close()
+
+
+def restore_database(prepared, path):
+    for suffix in ('-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    shutil.copyfile(prepared, path)
+
+
+def run_scenario(module, variant, name, path):
+    """Kirim serangan lewat test client dan nilai hasilnya (di child fork)."""
+    scenario = SCENARIOS_BY_NAME[name]
+    started = time.perf_counter()
+    result = {'variant': variant, 'scenario': name, 'category': scenario.category,
+              'expected': scenario.expected(variant)}
+    try:
+        client = module.app.test_client()
+        if scenario.account is not None:
+            password = ACCOUNTS[variant][scenario.account]
+            client.post('/login', data={'username': scenario.account, 'password': password})
+        probe = Probe(client, path)
+        response = client.open(scenario.url, method=scenario.method, data=scenario.form)
+        response.get_data()
+        result['status'] = response.status_code
+        result['outcome'] = VULNERABLE if scenario.check(probe, response) else BLOCKED
+    except Exception as e:
+        result['outcome'] = ERROR
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def _fork_scenario(module, variant, name, path):
+    """``run_scenario`` di child fork: state proses (cache, session, pool) tidak terbawa ke skenario lain."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            with os.fdopen(write_fd, 'w') as f:
+                json.dump(run_scenario(module, variant, name, path), f)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    if not data:
+        return {'variant': variant, 'scenario': name, 'expected': SCENARIOS_BY_NAME[name].expected(variant),
+                'outcome': ERROR, 'error': f"child berhenti tanpa hasil (status {status})"}
+    return json.loads(data)
+
+
+def run_variant(variant, names, pristine, screenshots_dir=None):
+    """
+    Worker (proses spawn) untuk satu varian dengan folder dan salinan
+    database sendiri. App di-import dan di-preload sekali (``serve.preload``,
+    pola yang sama dengan worker server), lalu setiap skenario berjalan di
+    child fork setelah database dipulihkan ke kondisi sesudah bootstrap.
+    """
+    work_dir = tempfile.mkdtemp(prefix=f'security-{variant}-')
+    path = os.path.join(work_dir, 'students.db')
+    prepared = os.path.join(work_dir, 'prepared.db')
+    results = []
+    try:
+        shutil.copyfile(pristine, path)
+        os.environ[database.DB_PATH_ENV] = path
+        module = serve.load_app(variant)
+        # Error 500 app.py (mis. ValueError dari sanitize_text) adalah hasil yang
+        # dicatat lewat status, traceback-nya tidak perlu memenuhi output
+        module.app.logger.setLevel(logging.CRITICAL)
+        serve.preload(module)
+        copy_database(path, prepared)
+        for name in names:
+            restore_database(prepared, path)
+            result = _fork_scenario(module, variant, name, path)
+            if screenshots_dir and SCENARIOS_BY_NAME[name].screenshot:
+                browser_path = os.path.join(work_dir, 'browser.db')
+                restore_database(prepared, browser_path)
+                try:
+                    result['screenshots'] = capture(SCENARIOS_BY_NAME[name], variant, browser_path,
+                                                    os.path.join(screenshots_dir, variant))
+                except Exception as e:
+                    result['screenshot_error'] = f"{type(e).__name__}: {e}"
+            results.append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+# ============================================================
+# CAPTURE BROWSER (HANYA SKENARIO screenshot=True)
+# ============================================================
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server berhenti (exit {process.returncode})")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server tidak siap dalam batas waktu")
+
+
+def _screenshot(driver, out_dir, index, scenario, label):
+    from selenium.common.exceptions import NoAlertPresentException
+
+    try:
+        # Payload XSS yang lolos membuka alert; catat lalu tutup supaya capture bisa jalan
+        alert = driver.switch_to.alert
+        label += '_ALERT'
+        alert.accept()
+    except NoAlertPresentException:
+        pass
+    path = os.path.join(out_dir, f'{index:02d}_{scenario.name}_{label}.png')
+    driver.save_screenshot(path)
+    return path
+
+
+def capture(scenario, variant, path, out_dir):
+    """Ulangi skenario di Chrome headless terhadap server sungguhan, simpan screenshot per langkah."""
+    from selenium import webdriver
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
+    os.makedirs(out_dir, exist_ok=True)
+    port = _free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    command = [sys.executable, '-m', 'studentapp', '--db', path, 'serve', '--app', variant,
+               '--port', str(port), '--workers', '1']
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--window-size=1280,900')
+    driver = None
+    shots = []
+    index = SCENARIOS.index(scenario) * 10
+    try:
+        _wait_for_port(port, server)
+        driver = webdriver.Chrome(options=options)
+        if scenario.account is not None:
+            driver.get(base_url + '/login')
+            driver.find_element(By.NAME, 'username').send_keys(scenario.account)
+            driver.find_element(By.NAME, 'password').send_keys(ACCOUNTS[variant][scenario.account])
+            driver.find_element(By.CSS_SELECTOR, 'button[type=submit]').click()
+        driver.get(base_url + '/')
+        shots.append(_screenshot(driver, out_dir, index + 1, scenario, '1_SEBELUM_serangan'))
+
+        if scenario.method == 'GET':
+            driver.get(base_url + scenario.url)
+            shots.append(_screenshot(driver, out_dir, index + 2, scenario, '2_PROSES_request'))
+        else:
+            driver.get(base_url + (scenario.form_page or '/'))
+            try:
+                field = None
+                for name, value in scenario.form.items():
+                    field = driver.find_element(By.NAME, name)
+                    field.clear()
+                    field.send_keys(value)
+                shots.append(_screenshot(driver, out_dir, index + 2, scenario, '2_PROSES_input_payload'))
+                field.submit()
+            except NoSuchElementException:
+                # Form tidak bisa dibuka (mis. 403): halaman penolakan itu sendiri yang di-capture
+                pass
+            shots.append(_screenshot(driver, out_dir, index + 3, scenario, '3_PROSES_setelah_submit'))
+
+        driver.get(base_url + '/')
+        shots.append(_screenshot(driver, out_dir, index + 4, scenario, '4_SETELAH_serangan'))
+    finally:
+        if driver is not None:
+            driver.quit()
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    return shots
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def print_matrix(results, variants, scenarios):
+    cells = {(result['scenario'], result['variant']): result for result in results}
+    width = max(len(scenario.name) for scenario in scenarios)
+    print(f"{'skenario':<{width}}  " + '  '.join(f'{variant:<14}' for variant in variants))
+    for scenario in scenarios:
+        line = []
+        for variant in variants:
+            result = cells.get((scenario.name, variant))
+            if result is None:
+                line.append(f"{NOT_APPLICABLE:<14}")
+                continue
+            mark = '' if result['outcome'] == result['expected'] else ' !'
+            line.append(f"{result['outcome'] + mark:<14}")
+        print(f"{scenario.name:<{width}}  " + '  '.join(line))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--variants', default=','.join(bootstrap.VARIANTS),
+                        help='varian dipisah koma (default: semua)')
+    parser.add_argument('--scenarios', default='', help='skenario dipisah koma (default: semua)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='proses worker paralel')
+    parser.add_argument('--json', metavar='FILE', help='simpan hasil per skenario sebagai JSON')
+    parser.add_argument('--screenshots', metavar='DIR',
+                        help='capture browser untuk skenario yang ditandai screenshot=True')
+    parser.add_argument('--list', action='store_true', help='tampilkan daftar skenario lalu keluar')
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scenario in SCENARIOS:
+            mark = ' [screenshot]' if scenario.screenshot else ''
+            print(f"{scenario.name:<22} {scenario.category:<5} {scenario.description}{mark}")
+        return 0
+
+    variants = [name for name in args.variants.split(',') if name]
+    for name in variants:
+        if name not in bootstrap.VARIANTS:
+            parser.error(f"varian tidak dikenal: {name}")
+    names = [name for name in args.scenarios.split(',') if name] or list(SCENARIOS_BY_NAME)
+    for name in names:
+        if name not in SCENARIOS_BY_NAME:
+            parser.error(f"skenario tidak dikenal: {name} (pilih: {', '.join(SCENARIOS_BY_NAME)})")
+    scenarios = [SCENARIOS_BY_NAME[name] for name in names]
+    if args.screenshots:
+        try:
+            import selenium  # noqa: F401
+        except ImportError as e:
+            raise SystemExit(f"--screenshots membutuhkan paket selenium dan Chrome ({e})")
+        args.screenshots = os.path.abspath(args.screenshots)
+
+    # Diwarisi worker spawn sebelum app di-import
+    os.environ.setdefault(passwords.N_ENV, str(REGRESSION_SCRYPT_N))
+    run_dir = tempfile.mkdtemp(prefix='security-')
+    pristine = os.path.join(run_dir, 'students.db')
+    # Database di repo hanya dibaca (mode=ro)
+    copy_database(database.default_path(), pristine, readonly=True)
+    # Skenario satu varian dibagi ke beberapa worker jika worker lebih banyak dari varian
+    chunks = max(1, args.workers // len(variants))
+    tasks = []
+    for variant in variants:
+        applicable = [scenario.name for scenario in scenarios if scenario.applies_to(variant)]
+        tasks.extend((variant, applicable[i::chunks]) for i in range(chunks) if applicable[i::chunks])
+
+    started = time.perf_counter()
+    results = []
+    # spawn + satu task per proses: setiap worker meng-import app dengan $STUDENTS_DB sendiri
+    context = multiprocessing.get_context('spawn')
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, mp_context=context, max_tasks_per_child=1) as pool:
+            futures = [pool.submit(run_variant, variant, names, pristine, args.screenshots)
+                       for variant, names in tasks]
+            for future in as_completed(futures):
+                for result in future.result():
+                    results.append(result)
+                    for key in ('error', 'screenshot_error'):
+                        if key in result:
+                            print(f"  {result['variant']}/{result['scenario']}: {result[key]}", flush=True)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    elapsed = time.perf_counter() - started
+
+    print_matrix(results, variants, scenarios)
+    mismatches = [result for result in results if result['outcome'] != result['expected']]
+    print(f"{len(results)} skenario dalam {elapsed:.1f} s ({args.workers} worker), "
+          f"{len(mismatches)} tidak sesuai harapan")
+    for result in sorted(mismatches, key=lambda result: (result['scenario'], result['variant'])):
+        print(f"    {result['variant']}/{result['scenario']}: {result['outcome']} "
+              f"(diharapkan {result['expected']}, status {result.get('status')})")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(sorted(results, key=lambda result: (result['scenario'], result['variant'])),
+                      f, indent=2, sort_keys=True)
+        print(f"Hasil disimpan ke {args.json}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
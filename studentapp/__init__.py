@@ -0,0 +1,7 @@
+"""
+Paket pendukung bersama untuk aplikasi Student (app.py, app_secured.py,
+app_secured_idor.py).
+
+Modul di dalam paket ini sengaja tidak mengimpor Flask app mana pun supaya
+ketiga varian aplikasi bisa memakainya tanpa saling bergantung.
+"""
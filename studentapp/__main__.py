@@ -0,0 +1,309 @@
+"""
+Command line utilitas aplikasi Student.
+
+    python -m studentapp migrate [--db PATH]
+    python -m studentapp check-plans [--db PATH] [FILE ...]
+    python -m studentapp cache-server [--socket PATH] [--size N] [--ttl DETIK]
+    python -m studentapp revoke-sessions [--db PATH] [--user ID]
+    python -m studentapp rebuild-stats [--db PATH] [--check]
+    python -m studentapp purge-jobs [--db PATH] [--resume] [--cancel ID]
+    python -m studentapp shard-split [--db PATH] [--owner ID ...] [--status]
+    python -m studentapp audit [--db PATH] [--source PATH] [--user ID] [--student ID] [--follow]
+    python -m studentapp audit [--db PATH] [--source PATH] --prune [--retention-days N]
+    python -m studentapp build-assets [--out DIR]
+    python -m studentapp serve [--app VARIAN] [--workers N] [--threads M] [--host H] [--port P]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+
+from studentapp import audit, cache, database, migrations, purge, serve, sharding
+
+# Modul lain diimpor di dalam subcommand yang memakainya: migrate/rebuild-stats
+# tidak perlu memuat Flask dan SQLAlchemy.
+
+APP_FILES = ('app.py', 'app_secured.py', 'app_secured_idor.py')
+# SQL di luar app yang juga dijalankan per request
+PLAN_FILES = APP_FILES + tuple(os.path.join('studentapp', name)
+                                for name in ('sessions.py', 'stats.py', 'purge.py', 'sharding.py'))
+
+
+def cmd_migrate(args):
+    connection = database.connect(args.db)
+    try:
+        before = migrations.current_version(connection)
+        applied = migrations.upgrade(connection)
+    finally:
+        connection.close()
+    if applied:
+        print(f"Skema diupgrade dari versi {before} ke {applied[-1]}")
+    else:
+        print(f"Skema sudah versi terbaru ({before})")
+    return 0
+
+
+def cmd_check_plans(args):
+    from studentapp import queryplan
+
+    paths = args.files or [os.path.join(database.PROJECT_ROOT, name) for name in PLAN_FILES]
+    return queryplan.run(args.db, paths, sys.stdout)
+
+
+def cmd_cache_server(args):
+    server = cache.CacheServer(args.socket, args.size, args.ttl)
+    print(f"Cache server mendengarkan di {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+    return 0
+
+
+def cmd_revoke_sessions(args):
+    from studentapp import sessions
+
+    connection = database.connect(args.db)
+    try:
+        # Trigger log pencabutan (migrasi 9) harus ada supaya worker ikut membuang cache
+        migrations.upgrade(connection)
+        count = sessions.revoke(connection, args.user)
+        connection.commit()
+    finally:
+        connection.close()
+    target = f"user {args.user}" if args.user is not None else "semua user"
+    print(f"{count} session {target} dicabut (berlaku di semua worker dalam SESSION_REVOCATION_CHECK_MS)")
+    return 0
+
+
+def cmd_rebuild_stats(args):
+    from studentapp import stats
+
+    connection = database.connect(args.db)
+    try:
+        migrations.upgrade(connection)
+        diffs = stats.differences(connection)
+        for owner_id, grade, age_bucket, stored, expected in diffs:
+            print(f"owner {owner_id} grade {grade} umur {age_bucket}: tersimpan {stored}, seharusnya {expected}")
+        if args.check:
+            print(f"{len(diffs)} bucket tidak konsisten")
+            return 1 if diffs else 0
+        buckets = stats.rebuild(connection)
+    finally:
+        connection.close()
+    print(f"student_stats dibangun ulang: {buckets} bucket ({len(diffs)} sebelumnya tidak konsisten)")
+    return 0
+
+
+def cmd_purge_jobs(args):
+    connection = database.connect(args.db)
+    try:
+        migrations.upgrade(connection)
+        if args.cancel is not None and not purge.cancel(connection, args.cancel):
+            print(f"Job {args.cancel} tidak ada atau sudah selesai", file=sys.stderr)
+            return 1
+        if args.resume:
+            for job_id in purge.resumable(connection):
+                # Job yang sudah diambil runner lain dilewati (None)
+                purge.run(connection, job_id, args.chunk_size)
+        jobs = purge.list_jobs(connection, args.limit)
+    finally:
+        connection.close()
+    for job in jobs:
+        print(f"#{job['id']} {job['status']:<9} {job['deleted']}/{job['total']} baris "
+              f"(cursor {job['cursor']}/{job['max_id']}) filter {job['filters']}"
+              + (f" shard {job['shard']}" if job['shard'] else '')
+              + (f" error: {job['error']}" if job['error'] else ''))
+    return 0
+
+
+def cmd_shard_split(args):
+    directory = sharding.shard_directory(args.db)
+    connection = database.connect(args.db)
+    try:
+        migrations.upgrade(connection)
+        if not args.status:
+            owners = args.owner or sharding.pending_owners(connection)
+            for owner_id in owners:
+                result = sharding.split_owner(connection, owner_id, directory, args.chunk_size,
+                                              args.pause_ms / 1000)
+                if result is None:
+                    print(f"Owner {owner_id} sudah di shard")
+                else:
+                    print(f"Owner {owner_id} -> {result['shard']}: {result['copied']} baris, "
+                          f"{result['replayed']} perubahan diputar ulang, switch {result['switch_ms']:.1f} ms")
+        shards = sharding.shard_map(connection)
+    finally:
+        connection.close()
+    for owner_id, shard, state in shards:
+        path = os.path.join(directory, shard)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        print(f"owner {owner_id:<6} {state:<8} {shard} ({size} bytes)")
+    return 0
+
+
+def cmd_audit(args):
+    source = args.source
+    if source is None:
+        # File SQLite di samping database, atau folder JSONL jika itu yang ada
+        source = audit.default_path(args.db, 'sqlite')
+        if not os.path.exists(source) and os.path.isdir(audit.default_path(args.db, 'jsonl')):
+            source = audit.default_path(args.db, 'jsonl')
+    if not os.path.exists(source):
+        print(f"Audit log tidak ditemukan: {source}", file=sys.stderr)
+        return 1
+    if args.prune:
+        try:
+            removed = audit.prune(source, args.retention_days)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        unit = 'segmen' if os.path.isdir(source) else 'event'
+        print(f"{removed} {unit} audit lebih tua dari {args.retention_days} hari dihapus")
+        return 0
+    since = None if args.since is None else time.time() - args.since
+    events = audit.tail(source, args.limit, since, follow=args.follow, user_id=args.user,
+                        student_id=args.student, outcome=args.outcome, action=args.action)
+    dropped = 0
+    try:
+        for event in events:
+            if event['action'] == audit.DROPPED_ACTION:
+                dropped += int(event['detail'] or 0)
+            print(json.dumps(event) if args.json else audit.format_event(event), flush=args.follow)
+    except KeyboardInterrupt:
+        pass
+    if dropped:
+        print(f"Peringatan: {dropped} event audit dibuang karena buffer penuh "
+              f"(event {audit.DROPPED_ACTION})", file=sys.stderr)
+    return 0
+
+
+def cmd_build_assets(args):
+    from studentapp import assets
+
+    bundles = assets.build_all()
+    manifest = assets.write_dist(bundles, args.out or assets.DIST_FOLDER)
+    for name, (filename, content) in sorted(bundles.items()):
+        print(f"{name} -> {filename} ({len(content)} bytes)")
+    print(f"Manifest: {manifest}")
+    return 0
+
+
+def cmd_serve(args):
+    # --db berlaku juga untuk aplikasi (database.configure membaca $STUDENTS_DB)
+    os.environ[database.DB_PATH_ENV] = args.db
+    return serve.serve(args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m studentapp')
+    parser.add_argument('--db', default=database.default_path(),
+                        help='file database SQLite (default: instance/students.db atau $STUDENTS_DB)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help='terapkan migrasi skema yang belum dijalankan')
+    migrate.set_defaults(func=cmd_migrate)
+
+    check_plans = commands.add_parser('check-plans',
+                                      help='gagal jika hot query melakukan full table scan')
+    check_plans.add_argument('files', nargs='*',
+                             help='file Python yang diperiksa (default: ketiga app + sessions/stats/purge/sharding.py)')
+    check_plans.set_defaults(func=cmd_check_plans)
+
+    cache_server = commands.add_parser('cache-server',
+                                       help='cache listing bersama untuk banyak worker (Unix socket)')
+    cache_server.add_argument('--socket', default=cache.DEFAULT_SOCKET)
+    cache_server.add_argument('--size', type=int, default=cache.DEFAULT_MAXSIZE)
+    cache_server.add_argument('--ttl', type=float, default=cache.DEFAULT_TTL)
+    cache_server.set_defaults(func=cmd_cache_server)
+
+    revoke_sessions = commands.add_parser('revoke-sessions',
+                                          help='logout paksa session server-side (app_secured_idor)')
+    revoke_sessions.add_argument('--user', type=int, help='hanya session milik user ID ini')
+    revoke_sessions.set_defaults(func=cmd_revoke_sessions)
+
+    rebuild_stats = commands.add_parser('rebuild-stats',
+                                        help='hitung ulang tabel agregat student_stats dari tabel student')
+    rebuild_stats.add_argument('--check', action='store_true',
+                               help='hanya laporkan bucket yang tidak konsisten (exit code 1 jika ada)')
+    rebuild_stats.set_defaults(func=cmd_rebuild_stats)
+
+    purge_jobs = commands.add_parser('purge-jobs', help='daftar job hapus massal; lanjutkan job yang terhenti')
+    purge_jobs.add_argument('--resume', action='store_true',
+                            help='jalankan job queued/running yang runner-nya berhenti (di foreground)')
+    purge_jobs.add_argument('--cancel', type=int, metavar='ID', help='minta job berhenti di chunk berikutnya')
+    purge_jobs.add_argument('--chunk-size', type=int, default=purge.DEFAULT_CHUNK_SIZE,
+                            help='baris per transaksi saat --resume')
+    purge_jobs.add_argument('--limit', type=int, default=20, help='jumlah job yang ditampilkan')
+    purge_jobs.set_defaults(func=cmd_purge_jobs)
+
+    shard_split = commands.add_parser('shard-split',
+                                      help='pindahkan student per owner ke file shard sendiri (online)')
+    shard_split.add_argument('--owner', type=int, action='append',
+                             help='owner yang dipindah (boleh berulang; default: semua owner di database utama)')
+    shard_split.add_argument('--chunk-size', type=int, default=sharding.DEFAULT_CHUNK_SIZE,
+                             help='baris per transaksi salin')
+    shard_split.add_argument('--pause-ms', type=float, default=sharding.DEFAULT_CHUNK_PAUSE_MS,
+                             help='jeda antar chunk supaya writer lain tidak tertahan')
+    shard_split.add_argument('--status', action='store_true', help='hanya tampilkan shard map')
+    shard_split.set_defaults(func=cmd_shard_split)
+
+    audit_parser = commands.add_parser('audit', help='tampilkan event audit log (studentapp/audit.py)')
+    audit_parser.add_argument('--source', help='file SQLite atau folder JSONL (default: di samping --db)')
+    audit_parser.add_argument('--user', help='hanya event user ID/username ini')
+    audit_parser.add_argument('--student', type=int, help='hanya event untuk student ID ini')
+    audit_parser.add_argument('--outcome', choices=audit.OUTCOMES)
+    audit_parser.add_argument('--action', help='nama endpoint, mis. delete atau admin_delete_all')
+    audit_parser.add_argument('--since', type=float, metavar='DETIK', help='hanya event N detik terakhir')
+    audit_parser.add_argument('--limit', type=int, default=50, help='jumlah event terakhir')
+    audit_parser.add_argument('--follow', '-f', action='store_true', help='ikuti event baru (Ctrl+C untuk berhenti)')
+    audit_parser.add_argument('--json', action='store_true', help='satu objek JSON per baris')
+    audit_parser.add_argument('--prune', action='store_true', help='hapus event yang melewati retensi')
+    audit_parser.add_argument('--retention-days', type=int, default=audit.DEFAULT_RETENTION_DAYS,
+                              help=f'retensi untuk --prune (minimal {audit.MIN_RETENTION_DAYS})')
+    audit_parser.set_defaults(func=cmd_audit)
+
+    build_assets = commands.add_parser('build-assets',
+                                       help='tulis bundle CSS ber-fingerprint untuk reverse proxy')
+    build_assets.add_argument('--out', help='folder output (default: static/dist)')
+    build_assets.set_defaults(func=cmd_build_assets)
+
+    serve_parser = commands.add_parser('serve', help='jalankan aplikasi dengan worker pool (produksi)')
+    serve_parser.add_argument('--app', choices=sorted(serve.VARIANTS),
+                              default=os.environ.get(serve.VARIANT_ENV, serve.DEFAULT_VARIANT),
+                              help=f'varian aplikasi (default: ${serve.VARIANT_ENV} atau {serve.DEFAULT_VARIANT})')
+    serve_parser.add_argument('--host', default=serve.DEFAULT_HOST)
+    serve_parser.add_argument('--port', type=int, default=serve.DEFAULT_PORT)
+    serve_parser.add_argument('--workers', type=int, default=serve.default_workers(),
+                              help='jumlah proses worker (default: jumlah CPU)')
+    serve_parser.add_argument('--threads', type=int, default=serve.DEFAULT_THREADS,
+                              help='thread per worker')
+    serve_parser.add_argument('--backlog', type=int, default=serve.DEFAULT_BACKLOG)
+    serve_parser.add_argument('--graceful-timeout', type=float, default=serve.DEFAULT_GRACEFUL_TIMEOUT,
+                              help='batas waktu (detik) menyelesaikan request saat SIGTERM')
+    serve_parser.add_argument('--keepalive', type=float, default=serve.KEEPALIVE_TIMEOUT,
+                              help='detik koneksi keep-alive boleh idle sebelum ditutup')
+    serve_parser.add_argument('--access-log', action='store_true', help='log setiap request')
+    serve_parser.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except sqlite3.Error as e:
+        print(f"Database error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Bundle CSS lokal: minify + fingerprint, tanpa request ke CDN.
+
+Semua file di ``BUNDLES`` (relatif ke folder ``static/``) digabung, di-minify,
+lalu diberi nama ``<bundle>.<hash>.css`` berdasarkan isi. Karena nama berubah
+setiap isi berubah, file bisa di-cache browser selamanya
+(``Cache-Control: public, max-age=31536000, immutable``).
+
+Bundle dibangun di memori saat aplikasi start dan dilayani di
+``/static/dist/<nama>``. Untuk deployment di belakang reverse proxy,
+``python -m studentapp build-assets`` menulis file yang sama beserta
+``manifest.json`` ke ``static/dist/``.
+
+Template memakai ``{{ asset_url('app.css') }}``. ``Assets.build_id`` (hash
+nama bundle ber-fingerprint dan isi template) ikut masuk ETag halaman
+(studentapp/conditional.py), jadi deploy yang mengubah CSS atau template tidak
+dijawab 304 dengan HTML lama.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from flask import Response, abort, request
+
+from studentapp import database
+
+STATIC_FOLDER = os.path.join(database.PROJECT_ROOT, 'static')
+DIST_FOLDER = os.path.join(STATIC_FOLDER, 'dist')
+DIST_URL = '/static/dist/'
+
+# nama bundle -> file sumber (urutan = urutan cascade)
+BUNDLES = {
+    'app.css': ('css/bootstrap.css',),
+}
+
+FAR_FUTURE = 365 * 24 * 3600
+
+# Komentar biasa dibuang; komentar lisensi /*! ... */ dipertahankan
+_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+_WHITESPACE = re.compile(r'\s+')
+_AROUND_PUNCTUATION = re.compile(r'\s*([{};:,>])\s*')
+
+
+def minify_css(source):
+    """Minify sederhana yang aman untuk CSS biasa (tanpa string berisi ``{};:,``)."""
+    css = _COMMENT.sub('', source)
+    css = _WHITESPACE.sub(' ', css)
+    css = _AROUND_PUNCTUATION.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def build_bundle(name, static_folder=STATIC_FOLDER):
+    """Return (nama file ber-fingerprint, isi bytes) untuk satu bundle."""
+    parts = []
+    for path in BUNDLES[name]:
+        with open(os.path.join(static_folder, path), encoding='utf-8') as f:
+            parts.append(minify_css(f.read()))
+    content = '\n'.join(parts).encode('utf-8')
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    return f'{stem}.{digest}{ext}', content
+
+
+def build_all(static_folder=STATIC_FOLDER):
+    """Return dict nama bundle -> (nama file ber-fingerprint, isi bytes)."""
+    return {name: build_bundle(name, static_folder) for name in BUNDLES}
+
+
+def write_dist(bundles, out_dir=DIST_FOLDER):
+    """Tulis bundle dan ``manifest.json`` ke ``out_dir``. Return path manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name, (filename, content) in bundles.items():
+        with open(os.path.join(out_dir, filename), 'wb') as f:
+            f.write(content)
+        manifest[name] = filename
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest_path
+
+
+def build_id(bundles, template_folder):
+    """Hash nama file bundle dan isi semua template (berubah setiap deploy yang mengubah tampilan)."""
+    digest = hashlib.blake2b(digest_size=8)
+    for filename, _ in sorted(bundles.values()):
+        digest.update(filename.encode() + b'\0')
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read())
+    return digest.hexdigest()
+
+
+class Assets:
+    def __init__(self, bundles, build_id=None):
+        self.urls = {name: DIST_URL + filename for name, (filename, _) in bundles.items()}
+        self.files = {filename: (content, f'"{filename}"') for filename, content in bundles.values()}
+        self.build_id = build_id
+
+    def url(self, name):
+        return self.urls[name]
+
+    def serve(self, filename):
+        entry = self.files.get(filename)
+        if entry is None:
+            abort(404)
+        content, etag = entry
+        headers = {'Cache-Control': f'public, max-age={FAR_FUTURE}, immutable', 'ETag': etag}
+        if etag in request.headers.get('If-None-Match', ''):
+            return Response(status=304, headers=headers)
+        return Response(content, mimetype='text/css', headers=headers)
+
+
+def init_app(app):
+    """Bangun bundle, daftarkan ``asset_url()`` di Jinja dan route ``/static/dist/<nama>``."""
+    bundles = build_all()
+    template_folder = os.path.join(app.root_path, app.template_folder or 'templates')
+    assets = app.extensions['studentapp_assets'] = Assets(bundles, build_id(bundles, template_folder))
+    app.jinja_env.globals['asset_url'] = assets.url
+    app.add_url_rule(DIST_URL + '<path:filename>', 'dist_asset', assets.serve)
+    return assets
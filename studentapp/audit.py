@@ -0,0 +1,646 @@
+"""
+Audit log append-only dengan buffer di memori dan penulisan per batch.
+
+Event dicatat hook ``after_request`` (tanpa perubahan di setiap route):
+    - semua request non-GET (add, edit, import, login, admin, API mutation)
+    - endpoint di ``AUDIT_ENDPOINTS`` meskipun GET (mis. ``/delete/<id>``)
+    - request yang ditolak (401/403/429) dan 404 untuk resource student
+    - request yang memanggil ``note()`` (alasan keputusan, mis. 'not_owner')
+Isi event: waktu, user + role, action (endpoint), method, path, student_id,
+status HTTP, outcome (ok/denied/not_found/invalid/error), alasan, latency, IP,
+dan detail (mis. username yang dicoba saat login gagal; ``user_id`` hanya
+berisi user yang benar-benar terautentikasi).
+
+Request hanya menambah tuple ke buffer (deque, terkunci singkat). Satu flusher
+thread per proses menulis isi buffer setiap ``AUDIT_FLUSH_INTERVAL_MS`` atau
+segera setelah ``AUDIT_BATCH_SIZE`` event terkumpul, sebagai satu batch:
+    sqlite  satu transaksi ``executemany`` ke file SQLite terpisah dari database
+            aplikasi (default ``<db>-audit.db``), jadi tidak berebut write lock
+            dengan tabel student. UPDATE/DELETE ditolak trigger (append-only).
+    jsonl   satu ``write()`` per batch ke segmen ``audit-<waktu>-<pid>.jsonl``
+            di folder ``<db>-audit/``; segmen baru setelah ``AUDIT_SEGMENT_BYTES``.
+            Segmen lama bisa diarsip/dihapus per file.
+
+Retensi: event yang lebih tua dari ``AUDIT_RETENTION_DAYS`` hari dihapus
+flusher thread setiap ``PRUNE_INTERVAL`` detik (sqlite: DELETE per chunk,
+jsonl: segmen yang terakhir ditulis sebelum batas), atau manual dengan
+``python -m studentapp audit --prune``. Trigger sqlite tetap menolak DELETE
+event yang lebih muda dari ``MIN_RETENTION_DAYS`` hari.
+
+Memori dibatasi ``AUDIT_BUFFER_SIZE`` event. Jika penuh (backend macet):
+    - keputusan keamanan (outcome denied/not_found) ditulis langsung ke backend
+      jika flusher tidak sedang memegangnya dalam ``DECISION_WRITE_TIMEOUT``;
+    - event lain (dan keputusan yang tetap tidak bisa ditulis) dibuang, dihitung
+      di ``dropped`` (``/metrics``), dan warning dicatat di awal setiap periode
+      buffer penuh. Begitu buffer ada ruang lagi, event ``audit_dropped``
+      (detail = jumlah event yang dibuang) disisipkan ke audit log, jadi celah
+      itu terlihat di ``python -m studentapp audit``.
+Buffer di-flush saat proses berhenti (``atexit`` dan shutdown worker
+``studentapp serve``).
+
+``python -m studentapp audit`` menampilkan event terakhir dengan filter, atau
+mengikuti log (``--follow``).
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+
+from studentapp import database
+
+logger = logging.getLogger(__name__)
+
+ENABLE_ENV = 'STUDENTS_AUDIT'
+BACKENDS = ('sqlite', 'jsonl')
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL_MS = 1000
+DEFAULT_SEGMENT_BYTES = 16 * 1024 * 1024
+# Retensi (hari); 0/None = simpan selamanya
+DEFAULT_RETENTION_DAYS = 90
+MIN_RETENTION_DAYS = 30
+PRUNE_INTERVAL = 3600
+PRUNE_CHUNK_SIZE = 5000
+# Panjang maksimal detail (mis. username login gagal yang dikirim client)
+MAX_DETAIL_LENGTH = 200
+# Endpoint GET yang mengubah data
+DEFAULT_ENDPOINTS = frozenset(('delete_student',))
+
+FIELDS = ('ts', 'user_id', 'role', 'action', 'method', 'path', 'student_id', 'status', 'outcome',
+          'reason', 'latency_ms', 'ip', 'detail')
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+OUTCOMES = ('ok', 'denied', 'not_found', 'invalid', 'error')
+# Outcome keputusan keamanan: saat buffer penuh dicoba ditulis langsung
+DECISION_OUTCOMES = frozenset(('denied', 'not_found'))
+# Batas tunggu write lock backend untuk keputusan keamanan saat buffer penuh (detik)
+DECISION_WRITE_TIMEOUT = 0.2
+# Action event penanda celah karena buffer penuh (detail = jumlah event dibuang)
+DROPPED_ACTION = 'audit_dropped'
+_OUTCOME_INDEX = FIELDS.index('outcome')
+
+_logs = weakref.WeakSet()
+
+
+def outcome(status):
+    if status < 400:
+        return 'ok'
+    if status in (401, 403, 429):
+        return 'denied'
+    if status == 404:
+        return 'not_found'
+    if status < 500:
+        return 'invalid'
+    return 'error'
+
+
+def default_path(db_path, backend):
+    """``students-audit.db`` (sqlite) atau folder ``students-audit/`` (jsonl) di samping database."""
+    stem = os.path.splitext(db_path)[0] + '-audit'
+    return stem + '.db' if backend == 'sqlite' else stem
+
+
+# ============================================================
+# BACKEND
+# ============================================================
+
+# Versi skema file audit (PRAGMA user_version). 1: kolom detail, DELETE diizinkan
+# untuk event yang lebih tua dari MIN_RETENTION_DAYS (retensi)
+SCHEMA_VERSION = 1
+CREATE_SQL = (
+    "CREATE TABLE IF NOT EXISTS audit_event ("
+    "id INTEGER PRIMARY KEY, ts REAL NOT NULL, user_id TEXT, role TEXT, action TEXT NOT NULL, "
+    "method TEXT NOT NULL, path TEXT NOT NULL, student_id INTEGER, status INTEGER NOT NULL, "
+    "outcome TEXT NOT NULL, reason TEXT, latency_ms REAL, ip TEXT, detail TEXT)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_event_user_id ON audit_event (user_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_event_student_id ON audit_event (student_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_audit_event_ts ON audit_event (ts)",
+    "CREATE TRIGGER IF NOT EXISTS audit_event_no_update BEFORE UPDATE ON audit_event "
+    "BEGIN SELECT RAISE(ABORT, 'audit log append-only'); END",
+    "CREATE TRIGGER IF NOT EXISTS audit_event_no_delete BEFORE DELETE ON audit_event "
+    f"WHEN old.ts > CAST(strftime('%s', 'now') AS REAL) - {MIN_RETENTION_DAYS * 86400} "
+    "BEGIN SELECT RAISE(ABORT, 'audit log append-only'); END",
+)
+INSERT_SQL = (
+    "INSERT INTO audit_event (ts, user_id, role, action, method, path, student_id, status, outcome, "
+    "reason, latency_ms, ip, detail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+PRUNE_SQL = "DELETE FROM audit_event WHERE id IN (SELECT id FROM audit_event WHERE ts < ? ORDER BY ts LIMIT ?)"
+
+
+def ensure_schema(connection):
+    """Buat tabel audit_event, atau upgrade file audit versi lama (tanpa detail/retensi)."""
+    if connection.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(audit_event)')}
+        if columns and 'detail' not in columns:
+            connection.execute('ALTER TABLE audit_event ADD COLUMN detail TEXT')
+        # Versi 0 menolak semua DELETE, termasuk retensi
+        connection.execute('DROP TRIGGER IF EXISTS audit_event_no_delete')
+        for sql in CREATE_SQL:
+            connection.execute(sql)
+        connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+class SQLiteBackend:
+    """Batch = satu transaksi ``executemany`` di file audit terpisah."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = None
+
+    def _connect(self):
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = database.connect(self.path)
+            ensure_schema(connection)
+            self._connection = connection
+        return self._connection
+
+    def write(self, events):
+        connection = self._connect()
+        try:
+            connection.executemany(INSERT_SQL, events)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    def prune(self, cutoff):
+        """Hapus event dengan ts < ``cutoff`` per chunk. Return jumlah event."""
+        connection = self._connect()
+        removed = 0
+        while True:
+            count = connection.execute(PRUNE_SQL, (cutoff, PRUNE_CHUNK_SIZE)).rowcount
+            connection.commit()
+            removed += count
+            if count < PRUNE_CHUNK_SIZE:
+                return removed
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def detach(self):
+        # Setelah fork: koneksi milik parent tidak dipakai (dan tidak ditutup) di child
+        self._connection = None
+
+
+class JsonlBackend:
+    """Batch = satu ``write()`` ke segmen JSONL milik proses ini."""
+
+    def __init__(self, directory, segment_bytes=DEFAULT_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._file = None
+
+    def _segment(self):
+        if self._file is not None and self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # Nama berurutan menurut waktu; pid memisahkan worker yang menulis bersamaan
+            now = time.time()
+            name = f"audit-{time.strftime('%Y%m%dT%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}" \
+                   f"-{os.getpid()}.jsonl"
+            self._file = open(os.path.join(self.directory, name), 'a', encoding='utf-8')
+        return self._file
+
+    def write(self, events):
+        segment = self._segment()
+        segment.write(''.join(json.dumps(dict(zip(FIELDS, event)), separators=(',', ':')) + '\n'
+                              for event in events))
+        segment.flush()
+
+    def prune(self, cutoff):
+        """Hapus segmen yang terakhir ditulis sebelum ``cutoff``. Return jumlah segmen."""
+        current = self._file.name if self._file is not None else None
+        removed = 0
+        for path in _segments(self.directory):
+            if path != current and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+        return removed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def detach(self):
+        # Setelah fork: child menulis ke segmen baru dengan pid-nya sendiri
+        self._file = None
+
+
+# ============================================================
+# BUFFER + FLUSHER THREAD
+# ============================================================
+
+class AuditLog:
+    def __init__(self, backend, buffer_size=DEFAULT_BUFFER_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval_ms=DEFAULT_FLUSH_INTERVAL_MS, endpoints=DEFAULT_ENDPOINTS,
+                 retention_days=DEFAULT_RETENTION_DAYS):
+        _check_retention(retention_days)
+        self.backend = backend
+        self.retention_days = retention_days
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.endpoints = frozenset(endpoints)
+        self._reset()
+        _logs.add(self)
+        # Thread tidak ikut fork (studentapp serve): worker memulai flusher sendiri
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        None jika audit nonaktif. Config: STUDENTS_AUDIT ('sqlite', 'jsonl' atau
+        False), AUDIT_PATH, AUDIT_BUFFER_SIZE, AUDIT_BATCH_SIZE,
+        AUDIT_FLUSH_INTERVAL_MS, AUDIT_SEGMENT_BYTES, AUDIT_ENDPOINTS,
+        AUDIT_RETENTION_DAYS.
+        """
+        backend = os.environ.get(ENABLE_ENV)
+        if backend is None:
+            backend = config.get(ENABLE_ENV)
+        if not backend or backend in ('0', 'false'):
+            return None
+        if backend not in BACKENDS:
+            raise ValueError(f"{ENABLE_ENV} harus salah satu dari: {', '.join(BACKENDS)}")
+        path = config.get('AUDIT_PATH') or default_path(config['STUDENTS_DB_PATH'], backend)
+        if backend == 'sqlite':
+            backend = SQLiteBackend(path)
+        else:
+            backend = JsonlBackend(path, config.get('AUDIT_SEGMENT_BYTES', DEFAULT_SEGMENT_BYTES))
+        return cls(backend,
+                   config.get('AUDIT_BUFFER_SIZE', DEFAULT_BUFFER_SIZE),
+                   config.get('AUDIT_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+                   config.get('AUDIT_FLUSH_INTERVAL_MS', DEFAULT_FLUSH_INTERVAL_MS),
+                   config.get('AUDIT_ENDPOINTS', DEFAULT_ENDPOINTS),
+                   config.get('AUDIT_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+
+    def _reset(self):
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopping = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.pruned = 0
+        # Event yang dibuang sejak penanda audit_dropped terakhir
+        self._gap = 0
+        self._next_prune = time.monotonic()
+
+    def _after_fork(self):
+        self.backend.detach()
+        self._reset()
+
+    def record(self, event):
+        """Tambahkan event (tuple urutan ``FIELDS``) ke buffer. Return False jika dibuang."""
+        if self._thread is None:
+            self._start()
+        with self._lock:
+            accepted = len(self._buffer) < self.buffer_size
+            if accepted:
+                if self._gap:
+                    self._buffer.append(_dropped_event(self._gap))
+                    self._gap = 0
+                self._buffer.append(event)
+                self.recorded += 1
+                full = len(self._buffer) >= self.batch_size
+        if not accepted:
+            if event[_OUTCOME_INDEX] in DECISION_OUTCOMES and self._write_direct(event):
+                return True
+            self._drop()
+            return False
+        if full:
+            self._wakeup.set()
+        return True
+
+    def _write_direct(self, event):
+        """Tulis satu event tanpa buffer (keputusan keamanan saat buffer penuh)."""
+        if not self._write_lock.acquire(timeout=DECISION_WRITE_TIMEOUT):
+            return False
+        try:
+            self.backend.write([event])
+        except Exception:
+            logger.exception("gagal menulis event audit saat buffer penuh")
+            return False
+        finally:
+            self._write_lock.release()
+        with self._lock:
+            self.recorded += 1
+            self.written += 1
+            self.batches += 1
+        return True
+
+    def _drop(self):
+        with self._lock:
+            self.dropped += 1
+            self._gap += 1
+            first = self._gap == 1
+        if first:
+            logger.warning("buffer audit penuh (%d event): event audit dibuang sampai flusher menyusul",
+                           self.buffer_size)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name='studentapp-audit', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush_pending()
+            self._maybe_prune()
+
+    def flush_pending(self):
+        """Tulis semua event di buffer sekarang (per batch ``batch_size``)."""
+        with self._write_lock:
+            with self._lock:
+                events = list(self._buffer)
+                self._buffer.clear()
+            for start in range(0, len(events), self.batch_size):
+                batch = events[start:start + self.batch_size]
+                try:
+                    self.backend.write(batch)
+                except Exception:
+                    self.failed += len(batch)
+                    logger.exception("gagal menulis %d event audit", len(batch))
+                    continue
+                self.batches += 1
+                self.written += len(batch)
+
+    def _maybe_prune(self):
+        if not self.retention_days or time.monotonic() < self._next_prune:
+            return
+        self._next_prune = time.monotonic() + PRUNE_INTERVAL
+        with self._write_lock:
+            try:
+                self.pruned += self.backend.prune(time.time() - self.retention_days * 86400)
+            except Exception:
+                logger.exception("gagal menghapus event audit yang melewati retensi")
+
+    def depth(self):
+        return len(self._buffer)
+
+    def stats(self):
+        return {'depth': self.depth(), 'buffer_size': self.buffer_size, 'recorded': self.recorded,
+                'written': self.written, 'dropped': self.dropped, 'failed': self.failed,
+                'batches': self.batches, 'pruned': self.pruned}
+
+    def close(self, timeout=5.0):
+        """Hentikan flusher, tulis sisa buffer, dan tutup backend."""
+        self._stopping = True
+        thread = self._thread
+        if thread is not None:
+            self._wakeup.set()
+            thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            if self._gap:
+                self._buffer.append(_dropped_event(self._gap))
+                self._gap = 0
+        self.flush_pending()
+        self.backend.close()
+
+
+def _dropped_event(count):
+    return (time.time(), None, None, DROPPED_ACTION, '-', '-', None, 0, 'error', 'buffer_full',
+            None, None, str(count))
+
+
+def _check_retention(retention_days):
+    if retention_days and retention_days < MIN_RETENTION_DAYS:
+        raise ValueError(f"AUDIT_RETENTION_DAYS minimal {MIN_RETENTION_DAYS} hari (0 = simpan selamanya)")
+
+
+def prune(source, retention_days=DEFAULT_RETENTION_DAYS):
+    """Hapus event ``source`` (file SQLite atau folder JSONL) yang lebih tua dari ``retention_days``."""
+    _check_retention(retention_days)
+    backend = JsonlBackend(source) if os.path.isdir(source) else SQLiteBackend(source)
+    try:
+        return backend.prune(time.time() - retention_days * 86400)
+    finally:
+        backend.close()
+
+
+def flush_all():
+    """Tulis semua event audit yang masih di buffer (dipanggil saat proses berhenti)."""
+    for audit_log in list(_logs):
+        audit_log.close()
+
+
+atexit.register(flush_all)
+
+
+# ============================================================
+# INTEGRASI FLASK
+# ============================================================
+
+def note(reason, outcome=None, detail=None):
+    """
+    Catat alasan keputusan request ini (mis. 'not_owner' sebelum ``abort(403)``).
+    Request yang memanggil ``note()`` selalu masuk audit log. ``detail``: teks
+    tambahan dari request (mis. username login gagal), bukan identitas user.
+    """
+    from flask import g
+
+    g._audit_note = (reason, outcome, None if detail is None else str(detail)[:MAX_DETAIL_LENGTH])
+
+
+def init_app(app):
+    """Pasang hook audit jika diaktifkan. Return ``AuditLog`` atau None."""
+    from flask import g, request, session
+
+    from studentapp import metrics
+
+    audit_log = AuditLog.from_config(app.config)
+    if audit_log is None:
+        return None
+    app.extensions['studentapp_audit'] = audit_log
+
+    @app.before_request
+    def _audit_start():
+        g._audit_started = time.perf_counter()
+        # User sebelum view (logout mengosongkan session)
+        g._audit_user = (session.get('user_id'), session.get('role'))
+
+    @app.after_request
+    def _audit_record(response):
+        started = g.get('_audit_started')
+        if started is None:
+            return response
+        view_args = request.view_args or {}
+        status = response.status_code
+        noted = g.get('_audit_note')
+        result = outcome(status)
+        if not (noted is not None or request.method not in SAFE_METHODS
+                or request.endpoint in audit_log.endpoints or result == 'denied'
+                or (result == 'not_found' and 'id' in view_args)):
+            return response
+        reason, forced_outcome, detail = noted or (None, None, None)
+        user_id, role = g._audit_user
+        if user_id is None:
+            # Login berhasil: user dari session baru
+            user_id, role = session.get('user_id'), session.get('role')
+        audit_log.record((
+            time.time(), None if user_id is None else str(user_id), role, request.endpoint or 'unmatched',
+            request.method, request.path, view_args.get('id'), status, forced_outcome or result, reason,
+            round((time.perf_counter() - started) * 1000, 3), request.remote_addr, detail,
+        ))
+        return response
+
+    registry = metrics.registry(app)
+    if registry is not None:
+        registry.add_callback(_metrics_callback(audit_log))
+    return audit_log
+
+
+def _metrics_callback(audit_log):
+    def collect():
+        stats = audit_log.stats()
+        yield ('studentapp_audit_buffer_depth', 'Event audit yang menunggu ditulis', 'gauge', {}, stats['depth'])
+        for key in ('recorded', 'written', 'dropped', 'failed', 'batches', 'pruned'):
+            yield (f'studentapp_audit_{key}_total', f'Audit log: {key}', 'counter', {}, stats[key])
+    return collect
+
+
+# ============================================================
+# BACA LOG (CLI)
+# ============================================================
+
+def _matches(event, filters):
+    return all(event.get(name) == value for name, value in filters.items() if value is not None)
+
+
+def _normalize(filters):
+    filters = dict(filters)
+    if filters.get('user_id') is not None:
+        filters['user_id'] = str(filters['user_id'])
+    return filters
+
+
+def _sqlite_where(filters, since):
+    conditions, params = [], []
+    for name in ('user_id', 'student_id', 'outcome', 'action'):
+        if filters.get(name) is not None:
+            conditions.append(f'{name} = ?')
+            params.append(filters[name])
+    if since is not None:
+        conditions.append('ts >= ?')
+        params.append(since)
+    return conditions, params
+
+
+def _sqlite_rows(connection, conditions, params, limit=None, after_id=None):
+    conditions = list(conditions)
+    params = list(params)
+    if after_id is not None:
+        conditions.append('id > ?')
+        params.append(after_id)
+    sql = f"SELECT id, {', '.join(FIELDS)} FROM audit_event"
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if limit is not None:
+        sql += ' ORDER BY id DESC LIMIT ?'
+        rows = connection.execute(sql, params + [limit]).fetchall()[::-1]
+    else:
+        rows = connection.execute(sql + ' ORDER BY id', params).fetchall()
+    return [(row[0], dict(zip(FIELDS, row[1:]))) for row in rows]
+
+
+def _segments(directory):
+    return sorted(glob.glob(os.path.join(directory, 'audit-*.jsonl')))
+
+
+def _jsonl_events(path, start=0, end=None):
+    """Event lengkap di ``path`` antara byte ``start`` dan ``end``. Return (events, offset akhir)."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read() if end is None else f.read(end - start)
+    # Baris terakhir yang belum lengkap (sedang ditulis) dibaca pada putaran berikutnya
+    complete = data[:data.rfind(b'\n') + 1]
+    return [json.loads(line) for line in complete.splitlines() if line], start + len(complete)
+
+
+def _jsonl_tail(directory, limit, since, filters):
+    """(event terakhir, offset akhir per segmen) dari folder JSONL."""
+    offsets = {path: os.path.getsize(path) for path in _segments(directory)}
+    events = []
+    # Segmen terbaru dibaca lebih dulu; berhenti begitu limit terpenuhi
+    for path in sorted(offsets, reverse=True):
+        if len(events) >= limit:
+            break
+        segment, offsets[path] = _jsonl_events(path, end=offsets[path])
+        events.extend(event for event in segment
+                      if (since is None or event['ts'] >= since) and _matches(event, filters))
+    events.sort(key=lambda event: event['ts'])
+    return events[-limit:] if limit else [], offsets
+
+
+def tail(source, limit=50, since=None, follow=False, interval=0.5, **filters):
+    """
+    Event terakhir (urut waktu) dari ``source``: file SQLite atau folder JSONL.
+
+    Filter: user_id, student_id, outcome, action; ``since`` = epoch detik.
+    Dengan ``follow=True`` generator tidak berhenti: setelah event terakhir,
+    event baru di-yield begitu ditulis (seperti ``tail -f``).
+    """
+    filters = _normalize(filters)
+    if os.path.isdir(source):
+        events, offsets = _jsonl_tail(source, limit, since, filters)
+        yield from events
+        while follow:
+            time.sleep(interval)
+            for path in _segments(source):
+                segment, offsets[path] = _jsonl_events(path, start=offsets.get(path, 0))
+                yield from (event for event in segment if _matches(event, filters))
+        return
+
+    connection = database.connect(source)
+    try:
+        conditions, params = _sqlite_where(filters, since)
+        rows = _sqlite_rows(connection, conditions, params, limit)
+        last_id = rows[-1][0] if rows else connection.execute(
+            'SELECT COALESCE(MAX(id), 0) FROM audit_event').fetchone()[0]
+        yield from (event for _, event in rows)
+        while follow:
+            time.sleep(interval)
+            for last_id, event in _sqlite_rows(connection, conditions, params, after_id=last_id):
+                yield event
+    finally:
+        connection.close()
+
+
+def format_event(event):
+    ts = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(event['ts']))
+    user = f"{event['user_id']}({event['role']})" if event['user_id'] is not None else '-'
+    student = f" student={event['student_id']}" if event['student_id'] is not None else ''
+    reason = f" [{event['reason']}]" if event['reason'] else ''
+    # Event sebelum kolom detail tidak punya key ini (segmen JSONL lama)
+    detail = f" {json.dumps(event['detail'])}" if event.get('detail') else ''
+    if event['action'] == DROPPED_ACTION:
+        return f"{ts} {DROPPED_ACTION}: {event['detail']} event dibuang (buffer penuh)"
+    return (f"{ts} {user} {event['method']} {event['path']} {event['action']}{student} -> "
+            f"{event['status']} {event['outcome']}{reason}{detail} {event['latency_ms']} ms {event['ip']}")
@@ -0,0 +1,107 @@
+"""
+Bootstrap skema saat start, dilewati jika database sudah sesuai.
+
+Sebelumnya setiap start menjalankan ``db.create_all()`` (introspeksi setiap
+tabel model) lalu ``migrations.upgrade()``. Sekarang bootstrap menyimpan
+fingerprint metadata model (nama tabel, kolom, tipe) + versi migrasi terakhir
+di tabel ``schema_bootstrap``. Start berikutnya cukup membaca
+``PRAGMA user_version`` dan satu baris tabel itu; ``create_all`` dan migrasi
+hanya dijalankan jika model atau migrasi berubah. Ketiga varian bisa memakai
+database yang sama: setiap varian punya fingerprint sendiri.
+
+``create_app(varian)`` adalah factory untuk server, benchmark, dan script:
+import modul varian, siapkan skema, dan isi akun demo (app_secured_idor).
+"""
+
+import hashlib
+import importlib
+import logging
+import sqlite3
+import sys
+
+from studentapp import database, migrations
+
+logger = logging.getLogger(__name__)
+
+CREATE_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS schema_bootstrap "
+    "(fingerprint TEXT PRIMARY KEY, created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+)
+LOOKUP_SQL = "SELECT 1 FROM schema_bootstrap WHERE fingerprint = ?"
+RECORD_SQL = "INSERT OR IGNORE INTO schema_bootstrap (fingerprint) VALUES (?)"
+
+# Nama varian -> modul aplikasi di root proyek
+VARIANTS = {
+    'baseline': 'app',
+    'sqli-secured': 'app_secured',
+    'idor-secured': 'app_secured_idor',
+}
+
+
+def fingerprint(metadata):
+    """Hash metadata model + ``migrations.LATEST_VERSION``."""
+    digest = hashlib.sha256(f'migrations:{migrations.LATEST_VERSION}\n'.encode())
+    for table in sorted(metadata.tables.values(), key=lambda table: table.name):
+        digest.update(f'table:{table.name}\n'.encode())
+        for column in table.columns:
+            digest.update(f'{column.name}:{column.type!r}:{column.nullable}:{column.primary_key}\n'.encode())
+    return digest.hexdigest()[:32]
+
+
+def is_current(connection, expected):
+    """True jika database (sqlite3) sudah di-bootstrap dengan fingerprint ``expected``."""
+    if migrations.current_version(connection) != migrations.LATEST_VERSION:
+        return False
+    try:
+        return connection.execute(LOOKUP_SQL, (expected,)).fetchone() is not None
+    except sqlite3.OperationalError:
+        # Tabel schema_bootstrap belum ada (database baru atau sebelum bootstrap ini)
+        return False
+
+
+def ensure_schema(db):
+    """
+    ``db.create_all()`` + migrasi jika diperlukan. Harus dipanggil di dalam
+    app context. Return True jika bootstrap dijalankan, False jika dilewati.
+    """
+    expected = fingerprint(db.metadata)
+    with database.connection(db) as connection:
+        if is_current(connection, expected):
+            return False
+
+    db.create_all()
+    with database.connection(db) as connection:
+        applied = migrations.upgrade(connection)
+        connection.execute(CREATE_TABLE_SQL)
+        connection.execute(RECORD_SQL, (expected,))
+        connection.commit()
+    logger.info("Skema di-bootstrap (fingerprint %s, %d migrasi)", expected, len(applied))
+    return True
+
+
+def prepare(module):
+    """Siapkan database untuk modul varian (berisi ``app`` dan ``db``)."""
+    with module.app.app_context():
+        ensure_schema(module.db)
+        if hasattr(module, 'seed_demo_users'):
+            # app_secured_idor: login memakai tabel user
+            module.seed_demo_users()
+        if getattr(module, 'shard_router', None) is not None:
+            # Trigger log/guard sharding hanya dipasang jika sharding aktif
+            module.shard_router.prepare()
+
+
+def load_app(variant):
+    """Import modul varian aplikasi dan kembalikan modulnya (berisi ``app`` dan ``db``)."""
+    if variant not in VARIANTS:
+        raise ValueError(f"Varian tidak dikenal: {variant} (pilih: {', '.join(VARIANTS)})")
+    if database.PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, database.PROJECT_ROOT)
+    return importlib.import_module(VARIANTS[variant])
+
+
+def create_app(variant):
+    """Factory: Flask app varian dengan skema database yang sudah siap."""
+    module = load_app(variant)
+    prepare(module)
+    return module.app
@@ -0,0 +1,242 @@
+"""
+Import/export student secara massal (CSV atau JSONL).
+
+Import membaca upload baris per baris, memvalidasi per batch dengan
+``validation.validate_batch`` (aturan yang sama dengan route /add), lalu
+menyimpan dengan ``executemany`` (satu transaksi per batch). Export men-stream tabel dengan ``fetchmany``
+sehingga memori tetap konstan berapa pun jumlah barisnya.
+"""
+
+import csv
+import io
+import json
+import logging
+import time
+
+from flask import Response, stream_with_context
+
+from studentapp import database, validation
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl')
+MIMETYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 1000
+
+# Batas jumlah error per baris yang dikembalikan di laporan (total tetap dihitung)
+MAX_REPORTED_ERRORS = 100
+
+EXPORT_COLUMNS = ('id', 'name', 'age', 'grade')
+
+
+def detect_format(explicit=None, filename=None, content_type=None):
+    """
+    Tentukan format dari parameter ``format``, ekstensi file, atau Content-Type.
+
+    Returns:
+        'csv', 'jsonl', atau None jika tidak dikenali
+    """
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in FORMATS else None
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('jsonl', 'ndjson'):
+            return 'jsonl'
+    if content_type:
+        content_type = content_type.split(';', 1)[0].strip().lower()
+        for fmt, mimetype in MIMETYPES.items():
+            if content_type == mimetype:
+                return fmt
+    return None
+
+
+def iter_records(stream, fmt):
+    """
+    Parse stream biner secara inkremental.
+
+    Yields:
+        tuple (nomor_baris, record) dengan record berupa dict, atau
+        ValueError jika baris tersebut tidak bisa di-parse
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_no, line in enumerate(text_stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"JSON tidak valid: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, ValueError("Baris harus berupa objek JSON")
+            continue
+        yield line_no, record
+
+
+class ImportReport:
+    """Ringkasan hasil import: jumlah baris, error per baris, dan throughput."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add_error(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_no, 'error': message})
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errors_truncated': self.failed > len(self.errors),
+            'elapsed_s': round(self.elapsed, 4),
+            'rows_per_s': round(self.rows_per_second, 1),
+        }
+
+
+def import_students(db, records, insert_sql=None, extra_params=(), batch_size=BATCH_SIZE, writer=None):
+    """
+    Validasi dan insert record hasil ``iter_records``.
+
+    Record dikumpulkan per batch, divalidasi sekaligus dengan
+    ``validation.validate_batch``, lalu disimpan dengan satu ``executemany``
+    dan satu commit per batch.
+
+    Args:
+        db: instance SQLAlchemy (koneksi dipinjam dari pool bersama)
+        records: iterable (nomor_baris, record)
+        insert_sql: statement INSERT dengan placeholder ``?`` untuk
+            (name, age, grade) diikuti ``extra_params``
+        extra_params: nilai tambahan per baris, mis. (owner_id,)
+        batch_size: jumlah baris per transaksi
+        writer: callable(rows) yang menyimpan dan meng-commit satu batch,
+            pengganti ``insert_sql`` (mis. ``ShardRouter.import_writer``)
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    extra_params = tuple(extra_params)
+
+    def flush(write, line_numbers, pending):
+        rows, errors = validation.validate_batch(pending)
+        for index, message in errors:
+            report.add_error(line_numbers[index], message)
+        if rows:
+            write([row + extra_params for _, row in rows])
+            report.inserted += len(rows)
+
+    def load(write):
+        line_numbers = []
+        pending = []
+        for line_no, record in records:
+            if isinstance(record, Exception):
+                report.add_error(line_no, str(record))
+                continue
+            line_numbers.append(line_no)
+            pending.append(record)
+            if len(pending) >= batch_size:
+                flush(write, line_numbers, pending)
+                line_numbers = []
+                pending = []
+        if pending:
+            flush(write, line_numbers, pending)
+
+    if writer is not None:
+        load(writer)
+    else:
+        with database.connection(db) as connection:
+            cursor = connection.cursor()
+            try:
+                def write(rows):
+                    cursor.executemany(insert_sql, rows)
+                    connection.commit()
+
+                load(write)
+            finally:
+                cursor.close()
+    report.finish()
+    logger.info("import: %d baris, %d gagal, %.0f rows/s",
+                report.inserted, report.failed, report.rows_per_second)
+    return report
+
+
+def _encode_csv(rows, header=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def _encode_jsonl(rows):
+    return ''.join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in rows)
+
+
+def export_response(db, fmt, where=None, params=()):
+    """
+    Response streaming berisi tabel student dalam format ``fmt``.
+
+    Args:
+        where: kondisi tambahan dengan placeholder ``?``, mis. "owner_id = ?"
+        params: nilai untuk ``where``
+    """
+    sql = f"SELECT {', '.join(EXPORT_COLUMNS)} FROM student"
+    if where:
+        sql += f" WHERE {where}"
+    sql += " ORDER BY id"
+
+    def generate():
+        started = time.perf_counter()
+        exported = 0
+        with database.connection(db) as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, params)
+                if fmt == 'csv':
+                    yield _encode_csv((), header=True)
+                while True:
+                    rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+                    if not rows:
+                        break
+                    exported += len(rows)
+                    yield _encode_csv(rows) if fmt == 'csv' else _encode_jsonl(rows)
+            finally:
+                cursor.close()
+        elapsed = time.perf_counter() - started
+        logger.info("export: %d baris dalam %.2fs (%.0f rows/s)",
+                    exported, elapsed, exported / elapsed if elapsed else 0.0)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=students.{fmt}'},
+    )
@@ -0,0 +1,318 @@
+"""
+Cache hasil listing student dengan invalidasi write-through.
+
+Key cache berbentuk ``<scope>|v<versi>|<after>|<before>|<limit>``. Scope adalah
+``all`` (listing tanpa filter, mis. admin) atau ``owner:<id>`` (listing milik
+satu user). Route yang mengubah data memanggil ``ListingCache.invalidate``
+untuk scope yang terdampak saja, sehingga cache user lain tetap utuh. Versi
+tabel student (``table_version``, dibaca route sebelum query untuk ETag) ikut
+menjadi bagian key: halaman yang dimuat sebelum sebuah write tetapi disimpan
+setelah ``invalidate`` write itu tersimpan di key versi lama, jadi tidak pernah
+dilayani dengan ETag versi baru.
+
+Backend:
+    - ``MemoryBackend``: LRU + TTL di dalam proses.
+    - ``SocketBackend``: client untuk ``CacheServer`` lewat Unix socket lokal,
+      pengganti sederhana cache bersama antar worker gunicorn. Pesan berupa
+      JSON dengan prefix panjang (bukan pickle: isi socket tidak pernah bisa
+      menjalankan kode), halaman ``KeysetPage`` dikirim lewat ``to_dict``.
+      Socket default ada di direktori instance (bukan /tmp yang bisa diisi
+      user lain lebih dulu), dibuat dengan permission 0600 di direktori yang
+      tidak bisa ditulis user lain, dan kedua sisi menolak koneksi dari proses
+      milik user lain (``SO_PEERCRED``, atau pemilik file socket).
+"""
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from studentapp import database, pagination
+
+logger = logging.getLogger(__name__)
+
+SCOPE_ALL = 'all'
+
+DEFAULT_MAXSIZE = 1024
+DEFAULT_TTL = 30
+DEFAULT_SOCKET = os.path.join(database.PROJECT_ROOT, 'instance', 'studentapp-cache.sock')
+
+_MISSING = object()
+_HEADER = struct.Struct('!I')
+# struct ucred Linux: pid, uid, gid
+_PEERCRED = struct.Struct('3i')
+_PAGE_TAG = '__keyset_page__'
+
+
+def owner_scope(owner_id):
+    return f'owner:{owner_id}'
+
+
+class MemoryBackend:
+    """LRU dengan TTL, aman dipakai banyak thread."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            keys = [key for key in self._data if key.startswith(prefix)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+def _encode(value):
+    if isinstance(value, pagination.KeysetPage):
+        return {_PAGE_TAG: value.to_dict()}
+    raise TypeError(f"nilai cache tidak bisa dikirim sebagai JSON: {type(value).__name__}")
+
+
+def _decode(obj):
+    # Hanya dipakai client: server menyimpan dict JSON apa adanya
+    if len(obj) == 1 and _PAGE_TAG in obj:
+        return pagination.KeysetPage.from_dict(obj[_PAGE_TAG])
+    return obj
+
+
+def _send(sock, payload):
+    data = json.dumps(payload, default=_encode, separators=(',', ':')).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("cache socket ditutup")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv(sock, object_hook=None):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size), object_hook=object_hook)
+
+
+def _peer_uid(sock, path):
+    """UID proses di ujung lain socket (pemilik file socket jika SO_PEERCRED tidak ada)."""
+    if hasattr(socket, 'SO_PEERCRED'):
+        return _PEERCRED.unpack(sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size))[1]
+    return os.stat(path).st_uid
+
+
+def _check_directory(path):
+    """Tolak direktori socket yang bisa ditulis user lain (mis. /tmp)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.geteuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"direktori cache socket {directory} harus milik user ini "
+                              "dan tidak bisa ditulis user lain")
+
+
+class _CacheRequestHandler(socketserver.BaseRequestHandler):
+    OPERATIONS = ('get', 'set', 'delete_prefix', 'clear', 'stats')
+
+    def handle(self):
+        backend = self.server.backend
+        if _peer_uid(self.request, self.server.server_address) != os.geteuid():
+            logger.warning("koneksi cache dari user lain ditolak")
+            return
+        while True:
+            try:
+                op, args = _recv(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if op not in self.OPERATIONS:
+                _send(self.request, None)
+                continue
+            _send(self.request, getattr(backend, op)(*args))
+
+
+class CacheServer(socketserver.ThreadingUnixStreamServer):
+    """Server cache bersama: satu MemoryBackend yang diakses lewat Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path=DEFAULT_SOCKET, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        _check_directory(path)
+        try:
+            info = os.lstat(path)
+        except FileNotFoundError:
+            pass
+        else:
+            # Sisa socket dari run sebelumnya boleh diganti, file lain tidak
+            if not stat.S_ISSOCK(info.st_mode) or info.st_uid != os.geteuid():
+                raise PermissionError(f"{path} sudah ada dan bukan cache socket milik user ini")
+            os.unlink(path)
+        self.backend = MemoryBackend(maxsize, ttl)
+        old_umask = os.umask(0o077)
+        try:
+            super().__init__(path, _CacheRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+
+class SocketBackend:
+    """
+    Client ``CacheServer``. Satu koneksi per thread; jika server tidak bisa
+    dihubungi, operasi dianggap miss supaya aplikasi tetap jalan tanpa cache.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=0.5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _call(self, op, *args):
+        sock = getattr(self._local, 'sock', None)
+        try:
+            if sock is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                if _peer_uid(sock, self.path) != os.geteuid():
+                    raise PermissionError(f"cache socket {self.path} dibuka oleh user lain")
+                self._local.sock = sock
+            _send(sock, (op, args))
+            return _recv(sock, _decode)
+        except (OSError, ConnectionError, ValueError, TypeError) as e:
+            logger.warning("cache server %s tidak tersedia: %s", self.path, e)
+            if sock is not None:
+                sock.close()
+            self._local.sock = None
+            return None
+
+    def get(self, key):
+        return self._call('get', key)
+
+    def set(self, key, value):
+        self._call('set', key, value)
+
+    def delete_prefix(self, prefix):
+        return self._call('delete_prefix', prefix) or 0
+
+    def clear(self):
+        self._call('clear')
+
+    def stats(self):
+        stats = self._call('stats') or {'available': False}
+        stats['backend'] = 'socket'
+        return stats
+
+
+def create_backend(config):
+    """
+    Buat backend dari konfigurasi app:
+        STUDENTS_CACHE_BACKEND: 'memory' (default), 'socket', atau None (nonaktif)
+        STUDENTS_CACHE_SIZE, STUDENTS_CACHE_TTL, STUDENTS_CACHE_SOCKET
+    """
+    kind = config.get('STUDENTS_CACHE_BACKEND', 'memory')
+    if not kind:
+        return None
+    if kind == 'memory':
+        return MemoryBackend(config.get('STUDENTS_CACHE_SIZE', DEFAULT_MAXSIZE),
+                             config.get('STUDENTS_CACHE_TTL', DEFAULT_TTL))
+    if kind == 'socket':
+        return SocketBackend(config.get('STUDENTS_CACHE_SOCKET', DEFAULT_SOCKET))
+    raise ValueError(f"STUDENTS_CACHE_BACKEND tidak dikenal: {kind}")
+
+
+class ListingCache:
+    """Cache halaman listing per scope di atas salah satu backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(create_backend(config))
+
+    def get_or_load(self, scope, key_parts, loader, version=None):
+        """
+        Ambil halaman dari cache, atau jalankan ``loader()`` lalu simpan hasilnya.
+
+        ``version``: versi tabel (``conditional.TableVersion``) yang dibaca
+        sebelum ``loader()``; None jika migrasi table_version belum diterapkan.
+        """
+        if self.backend is None:
+            return loader()
+        version = version.version if version is not None else None
+        key = '|'.join([scope, f'v{version}'] + [str(part) for part in key_parts])
+        value = self.backend.get(key)
+        if value is None:
+            value = loader()
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, *scopes):
+        if self.backend is None:
+            return
+        for scope in scopes:
+            self.backend.delete_prefix(scope + '|')
+
+    def clear(self):
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self):
+        if self.backend is None:
+            return {'backend': None}
+        return self.backend.stats()
@@ -0,0 +1,193 @@
+"""
+Kompresi response (gzip, atau brotli jika paket ``brotli`` terpasang).
+
+Opt-in lewat ``STUDENTS_COMPRESSION = True`` (atau environment variable
+``STUDENTS_COMPRESSION=1``). Encoding dipilih dari ``Accept-Encoding`` client
+(nilai ``q`` dihormati, brotli diutamakan jika sama).
+
+Yang dikompresi hanya response 200 dengan mimetype teks di
+``COMPRESSION_MIMETYPES`` dan belum punya ``Content-Encoding``; gambar, zip,
+dan konten lain yang sudah terkompresi dilewati. Response biasa dikompresi
+sekaligus jika ukurannya minimal ``COMPRESSION_MIN_SIZE`` byte. Response
+streaming (``?stream=1``, export CSV/JSONL) ukurannya belum diketahui, jadi
+selalu dikompresi per chunk dengan flush di setiap chunk: tidak ada buffering,
+dan browser tetap bisa menampilkan baris pertama lebih dulu.
+
+ETag kuat diubah menjadi weak (``W/"..."``) karena representasi terkompresi
+tidak identik byte per byte; conditional GET tetap berfungsi.
+
+Metric di ``/metrics``: rasio kompresi dan waktu CPU per response, serta total
+byte sebelum/sesudah kompresi, per encoding.
+"""
+
+import gzip
+import os
+import time
+import zlib
+
+from flask import request
+
+from studentapp import metrics
+
+try:
+    import brotli
+except ImportError:  # opsional: tanpa brotli hanya gzip yang ditawarkan
+    brotli = None
+
+ENABLE_ENV = 'STUDENTS_COMPRESSION'
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+DEFAULT_MIMETYPES = frozenset((
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'application/json',
+    'application/x-ndjson', 'application/javascript', 'image/svg+xml',
+))
+
+RATIO_BUCKETS = (1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 16.0, 24.0, 32.0)
+CPU_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class Compressor:
+    """Hook ``after_request`` yang mengompresi response sesuai konfigurasi app."""
+
+    def __init__(self, min_size=DEFAULT_MIN_SIZE, gzip_level=DEFAULT_GZIP_LEVEL,
+                 brotli_quality=DEFAULT_BROTLI_QUALITY, mimetypes=DEFAULT_MIMETYPES):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = frozenset(mimetypes)
+        self.encodings = available_encodings()
+
+    def _negotiate(self):
+        return request.accept_encodings.best_match(self.encodings)
+
+    def _compress(self, encoding, data):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, self.gzip_level, mtime=0)
+
+    def _stream(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def __call__(self, response):
+        if (response.status_code != 200 or response.mimetype not in self.mimetypes
+                or 'Content-Encoding' in response.headers or request.method == 'HEAD'):
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.direct_passthrough:
+            # send_file: body berupa file wrapper, dilayani apa adanya
+            return response
+        encoding = self._negotiate()
+        if encoding is None:
+            return response
+
+        registry = metrics.registry()
+        if response.is_streamed:
+            response.response = self._compress_stream(encoding, response.response, registry)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            started = time.process_time()
+            compressed = self._compress(encoding, data)
+            _observe(registry, encoding, len(data), len(compressed), time.process_time() - started)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compress_stream(self, encoding, chunks, registry):
+        stream = self._stream(encoding)
+        size_in = size_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                if not chunk:
+                    continue
+                started = time.process_time()
+                out = stream.compress(chunk)
+                cpu += time.process_time() - started
+                size_in += len(chunk)
+                size_out += len(out)
+                yield out
+            started = time.process_time()
+            out = stream.finish()
+            cpu += time.process_time() - started
+            size_out += len(out)
+            yield out
+            _observe(registry, encoding, size_in, size_out, cpu)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+
+def _observe(registry, encoding, size_in, size_out, cpu_seconds):
+    if registry is None:
+        return
+    registry.histogram('studentapp_compression_ratio', 'Rasio ukuran asli / terkompresi per response',
+                       RATIO_BUCKETS).observe(size_in / max(size_out, 1), encoding=encoding)
+    registry.histogram('studentapp_compression_cpu_seconds', 'Waktu CPU kompresi per response',
+                       CPU_BUCKETS).observe(cpu_seconds, encoding=encoding)
+    registry.counter('studentapp_compression_input_bytes_total', 'Byte sebelum kompresi').inc(
+        size_in, encoding=encoding)
+    registry.counter('studentapp_compression_output_bytes_total', 'Byte setelah kompresi').inc(
+        size_out, encoding=encoding)
+
+
+def init_app(app):
+    """
+    Pasang kompresi jika diaktifkan. Return ``Compressor`` atau None.
+
+    Konfigurasi:
+        STUDENTS_COMPRESSION: aktifkan kompresi (default False)
+        COMPRESSION_MIN_SIZE: ukuran minimum response biasa (byte)
+        COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY: level kompresi
+        COMPRESSION_MIMETYPES: mimetype yang dikompresi
+    """
+    enabled = os.environ.get(ENABLE_ENV)
+    enabled = enabled not in ('', '0', 'false') if enabled is not None else app.config.get(ENABLE_ENV)
+    if not enabled:
+        return None
+    compressor = Compressor(
+        app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE),
+        app.config.get('COMPRESSION_GZIP_LEVEL', DEFAULT_GZIP_LEVEL),
+        app.config.get('COMPRESSION_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY),
+        app.config.get('COMPRESSION_MIMETYPES', DEFAULT_MIMETYPES),
+    )
+    app.after_request(compressor)
+    return compressor
@@ -0,0 +1,102 @@
+"""
+Conditional GET (ETag / Last-Modified) untuk halaman listing dan edit.
+
+Versi tabel student dibaca dari ``table_version`` yang dinaikkan oleh trigger
+pada setiap INSERT/UPDATE/DELETE (migrasi 3). ETag dibentuk dari versi
+tersebut ditambah identitas user, URL, dan build id aset/template
+(studentapp/assets.py), sehingga request dengan ``If-None-Match`` yang cocok
+langsung dijawab ``304 Not Modified`` tanpa menjalankan query listing maupun
+merender template.
+
+``updated_at`` hanya presisi detik, jadi ``If-Modified-Since`` saja dijawab 304
+hanya jika write terakhir terjadi sebelum detik tersebut (write di detik yang
+sama dengan response sebelumnya tidak boleh menghasilkan 304).
+"""
+
+import hashlib
+from datetime import datetime, timezone
+
+from flask import Response, current_app, request
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Halaman berisi data per user: hanya boleh disimpan browser (private) dan
+# selalu divalidasi ulang ke server (no-cache)
+CACHE_CONTROL = 'private, no-cache'
+
+
+class TableVersion:
+    def __init__(self, version, updated_at):
+        self.version = version
+        self.last_modified = datetime.fromtimestamp(updated_at, tz=timezone.utc)
+
+
+def table_version(session, table='student'):
+    """
+    Versi tabel saat ini, atau None jika migrasi table_version belum
+    diterapkan (conditional GET dinonaktifkan).
+    """
+    try:
+        row = session.execute(
+            text("SELECT version, updated_at FROM table_version WHERE name = :name"),
+            {"name": table}
+        ).fetchone()
+    except OperationalError:
+        session.rollback()
+        return None
+    return TableVersion(*row) if row else None
+
+
+def make_etag(version, *parts):
+    """ETag (tanpa prefix W/) dari versi tabel dan komponen lain, mis. user dan URL."""
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (version.version,) + parts:
+        digest.update(repr(part).encode())
+        digest.update(b'\0')
+    return f'{version.version}-{digest.hexdigest()}'
+
+
+class ConditionalGet:
+    """
+    Validator untuk satu request GET.
+
+    Contoh::
+
+        conditional_get = ConditionalGet(db.session, session.get('user_id'))
+        if conditional_get.not_modified():
+            return conditional_get.response_304()
+        ...
+        return conditional_get.tag(make_response(render_template(...)))
+    """
+
+    def __init__(self, session, *parts, table='student', version=None):
+        # version: TableVersion yang sudah dibaca (mis. gabungan shard, studentapp/sharding.py)
+        self.version = version if version is not None else table_version(session, table)
+        self.etag = None
+        if self.version is not None:
+            assets = current_app.extensions.get('studentapp_assets')
+            build = assets.build_id if assets is not None else None
+            self.etag = make_etag(self.version, request.full_path, build, *parts)
+
+    def not_modified(self):
+        if self.version is None:
+            return False
+        if request.if_none_match:
+            return request.if_none_match.contains_weak(self.etag)
+        # Last-Modified hanya presisi detik: write di detik ``since`` bisa terjadi
+        # setelah response sebelumnya, jadi harus lebih kecil, bukan sama dengan
+        since = request.if_modified_since
+        return since is not None and self.version.last_modified < since
+
+    def response_304(self):
+        return self.tag(Response(status=304))
+
+    def tag(self, response):
+        """Tambahkan ETag, Last-Modified, dan Cache-Control ke response."""
+        if self.version is None:
+            return response
+        response.set_etag(self.etag, weak=True)
+        response.last_modified = self.version.last_modified
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.vary.add('Cookie')
+        return response
@@ -0,0 +1,119 @@
+"""
+Lapisan koneksi SQLite bersama untuk jalur raw sqlite3 dan Flask-SQLAlchemy.
+
+Semua koneksi dibuat oleh ``connect()`` sehingga pragma (WAL, synchronous,
+busy_timeout, cache/mmap) selalu sama. Pool-nya adalah pool engine SQLAlchemy
+(QueuePool terbatas per proses); route yang butuh koneksi sqlite3 mentah
+meminjam dari pool yang sama lewat ``connection(db)``, jadi satu request tidak
+lagi memegang dua koneksi berbeda ke file yang sama.
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from functools import partial
+
+DB_FILENAME = 'students.db'
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Override lokasi database, mis. untuk salinan sementara saat testing
+DB_PATH_ENV = 'STUDENTS_DB'
+
+BUSY_TIMEOUT_MS = 5000
+POOL_SIZE = 8
+POOL_TIMEOUT_S = 10
+
+# Ukuran cache prepared statement per koneksi (parameter cached_statements
+# sqlite3). Karena koneksi di-pool, statement yang sudah dikompilasi dipakai
+# ulang lintas request.
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('cache_size', -16000),            # nilai negatif = KiB, jadi ~16 MB
+    ('mmap_size', 128 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+)
+
+
+def database_path(app):
+    """Path absolut file database untuk app (default: instance/students.db)."""
+    path = os.environ.get(DB_PATH_ENV)
+    if path:
+        return os.path.abspath(path)
+    os.makedirs(app.instance_path, exist_ok=True)
+    return os.path.join(app.instance_path, DB_FILENAME)
+
+
+def default_path():
+    """Path database untuk tool command line (tanpa Flask app)."""
+    path = os.environ.get(DB_PATH_ENV)
+    if path:
+        return os.path.abspath(path)
+    return os.path.join(PROJECT_ROOT, 'instance', DB_FILENAME)
+
+
+def apply_pragmas(connection):
+    """Terapkan PRAGMAS ke koneksi sqlite3 yang baru dibuka."""
+    cursor = connection.cursor()
+    try:
+        for name, value in PRAGMAS:
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def connect(path):
+    """Buka koneksi sqlite3 baru dengan pengaturan standar aplikasi."""
+    connection = sqlite3.connect(
+        path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # koneksi berpindah thread lewat pool
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    apply_pragmas(connection)
+    return connection
+
+
+def configure(app):
+    """
+    Isi konfigurasi SQLAlchemy agar engine memakai ``connect()`` dan pool
+    terbatas. Harus dipanggil sebelum ``SQLAlchemy(app)``.
+    """
+    path = database_path(app)
+    app.config['STUDENTS_DB_PATH'] = path
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + path
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update({
+        'creator': partial(connect, path),
+        'pool_size': POOL_SIZE,
+        'max_overflow': 0,
+        'pool_timeout': POOL_TIMEOUT_S,
+    })
+
+
+# Key app.extensions berisi list fungsi pembungkus koneksi mentah (mis. metrics)
+CONNECTION_WRAPPERS_KEY = 'studentapp.connection_wrappers'
+
+
+@contextmanager
+def connection(db):
+    """
+    Pinjam koneksi DBAPI (sqlite3) dari pool engine ``db``.
+
+    Koneksi dikembalikan ke pool saat blok selesai; transaksi yang belum
+    di-commit otomatis di-rollback oleh pool.
+    """
+    # Flask diimpor di sini: tool command line memakai modul ini tanpa Flask
+    from flask import current_app
+
+    conn = db.engine.raw_connection()
+    try:
+        wrapped = conn
+        for wrapper in current_app.extensions.get(CONNECTION_WRAPPERS_KEY, ()):
+            wrapped = wrapper(wrapped)
+        yield wrapped
+    finally:
+        conn.close()
@@ -0,0 +1,383 @@
+"""
+Instrumentasi request, SQL, dan render template dengan endpoint ``/metrics``
+(format teks Prometheus).
+
+``init_app(app, db)`` memasang:
+    - hook before/after request untuk histogram latency per route
+    - listener SQLAlchemy ``before_cursor_execute``/``after_cursor_execute``
+    - wrapper koneksi sqlite3 mentah dari ``database.connection(db)``
+      (``cursor().execute`` maupun ``connection.execute`` langsung)
+    - signal ``before_render_template``/``template_rendered``
+    - log request lambat beserta SQL yang dijalankan request tersebut
+
+Untuk response streaming, latency dihitung sampai header dikirim. Statement
+dari thread background dengan koneksi sendiri (flusher audit, runner purge,
+writer write-behind) tidak punya app context, jadi tidak ikut dihitung.
+
+``/metrics`` memuat nama route, SQL lambat, dan kedalaman queue, jadi hanya
+untuk admin (``authorize``) atau scraper dengan header
+``Authorization: Bearer <METRICS_TOKEN>`` (environment variable
+``STUDENTS_METRICS_TOKEN``); selain itu 403.
+"""
+
+import bisect
+import hmac
+import logging
+import os
+import threading
+import time
+from functools import partial
+
+from flask import Response, current_app, g, has_app_context, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+
+from studentapp import database
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = 'studentapp.metrics'
+TOKEN_ENV = 'STUDENTS_METRICS_TOKEN'
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Jumlah statement SQL berbeda per request yang disimpan untuk log request lambat
+MAX_LOGGED_STATEMENTS = 50
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [count per bucket ..., +Inf], sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield self.name + '_bucket', labels + (('le', _format_value(float(bound))),), cumulative
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, cumulative
+
+
+class Registry:
+    """Kumpulan metric satu app, plus callback untuk gauge yang dihitung saat scrape."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._callbacks = []
+
+    def counter(self, name, help_text):
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def add_callback(self, callback):
+        """
+        ``callback()`` mengembalikan iterable (nama, help, tipe, labels_dict, nilai),
+        dipanggil setiap kali /metrics di-scrape.
+        """
+        self._callbacks.append(callback)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        seen = set()
+        for callback in self._callbacks:
+            for name, help_text, kind, labels, value in callback():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def registry(app=None):
+    """Registry metric milik ``app`` (default: current_app), atau None jika belum di-init."""
+    app = app or current_app
+    return app.extensions.get(EXTENSION_KEY)
+
+
+class _TracedCursor:
+    """Cursor sqlite3 yang mencatat waktu setiap execute/executemany."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, *args)
+        finally:
+            record_statement(sql, time.perf_counter() - started, 'sqlite3')
+
+    def executemany(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, *args)
+        finally:
+            record_statement(sql, time.perf_counter() - started, 'sqlite3')
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TracedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args):
+        return _TracedCursor(self._connection.cursor(*args))
+
+    # sessions.py, purge.py, dll. memanggil connection.execute() tanpa cursor
+    def execute(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return self._connection.execute(sql, *args)
+        finally:
+            record_statement(sql, time.perf_counter() - started, 'sqlite3')
+
+    def executemany(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return self._connection.executemany(sql, *args)
+        finally:
+            record_statement(sql, time.perf_counter() - started, 'sqlite3')
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def record_statement(sql, duration, source):
+    """Catat satu statement SQL ke registry app dan daftar statement request."""
+    if not has_app_context():
+        return
+    metrics = registry()
+    if metrics is None:
+        return
+    metrics.histogram('studentapp_sql_duration_seconds', 'Durasi statement SQL',
+                      SQL_BUCKETS).observe(duration, source=source)
+    if has_request_context():
+        g._metrics_query_count = g.get('_metrics_query_count', 0) + 1
+        # Statement yang sama (mis. executemany per batch) digabung: jumlah + total waktu
+        statements = g.setdefault('_metrics_statements', {})
+        sql = ' '.join(str(sql).split())
+        entry = statements.get(sql)
+        if entry is not None:
+            entry[0] += 1
+            entry[1] += duration
+        elif len(statements) < MAX_LOGGED_STATEMENTS:
+            statements[sql] = [1, duration]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['_metrics_started'].pop()
+    record_statement(statement, time.perf_counter() - started, 'sqlalchemy')
+
+
+def _handle_error(context):
+    # Statement gagal: after_cursor_execute tidak dipanggil, buang waktu mulainya
+    connection = context.connection
+    if connection is not None and connection.info.get('_metrics_started'):
+        connection.info['_metrics_started'].pop()
+
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault('_metrics_render_started', []).append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    if not has_request_context() or not g.get('_metrics_render_started'):
+        return
+    metrics = registry(sender)
+    if metrics is None:
+        return
+    duration = time.perf_counter() - g._metrics_render_started.pop()
+    metrics.histogram('studentapp_template_render_seconds', 'Durasi render template').observe(
+        duration, template=template.name or 'string')
+
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _before_request():
+    g._metrics_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.get('_metrics_started')
+    if started is None:
+        return response
+    duration = time.perf_counter() - started
+    metrics = registry()
+    route = _route_label()
+    metrics.histogram('studentapp_request_duration_seconds', 'Latency request per route').observe(
+        duration, route=route, method=request.method)
+    metrics.counter('studentapp_requests_total', 'Jumlah request per route dan status').inc(
+        route=route, method=request.method, status=response.status_code)
+    query_count = g.get('_metrics_query_count', 0)
+    metrics.histogram('studentapp_request_queries', 'Jumlah statement SQL per request',
+                      QUERY_COUNT_BUCKETS).observe(query_count, route=route)
+
+    threshold_ms = current_app.config.get('METRICS_SLOW_REQUEST_MS')
+    if threshold_ms is not None and duration * 1000 >= threshold_ms:
+        metrics.counter('studentapp_slow_requests_total', 'Request yang melewati ambang lambat').inc(
+            route=route)
+        statements = ''.join(f'\n    {elapsed * 1000:8.2f} ms  {count:4d}x  {sql}'
+                             for sql, (count, elapsed) in g.get('_metrics_statements', {}).items())
+        logger.warning("request lambat %s %s: %.1f ms, %d query%s",
+                       request.method, request.full_path.rstrip('?'), duration * 1000,
+                       query_count, statements)
+    return response
+
+
+def _token_matches(token):
+    header = request.headers.get('Authorization', '')
+    return bool(token) and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode())
+
+
+def _metrics_view(authorize=None):
+    if not (_token_matches(current_app.config.get('METRICS_TOKEN'))
+            or (authorize is not None and authorize())):
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(registry().render(), mimetype='text/plain; version=0.0.4')
+
+
+def cache_callback(listing_cache):
+    """Callback registry yang mengekspor counter ``ListingCache`` sebagai metric."""
+    def collect():
+        stats = listing_cache.stats()
+        for key in ('hits', 'misses', 'evictions', 'expirations'):
+            if key in stats:
+                yield (f'studentapp_cache_{key}_total', f'Cache listing: {key}', 'counter',
+                       {'backend': stats['backend']}, stats[key])
+        if 'size' in stats:
+            yield ('studentapp_cache_entries', 'Jumlah entry cache listing', 'gauge',
+                   {'backend': stats['backend']}, stats['size'])
+    return collect
+
+
+def write_queue_callback(write_queue):
+    """Callback registry untuk kedalaman queue dan ukuran batch write-behind."""
+    def collect():
+        stats = write_queue.stats()
+        yield ('studentapp_write_queue_depth', 'Mutation yang menunggu di queue write-behind',
+               'gauge', {}, stats['depth'])
+        yield ('studentapp_write_batches_total', 'Batch (commit) write-behind', 'counter', {},
+               stats['batches'])
+        yield ('studentapp_write_mutations_total', 'Mutation yang diproses write-behind', 'counter', {},
+               stats['mutations'])
+        yield ('studentapp_write_failed_total', 'Mutation write-behind yang gagal', 'counter', {},
+               stats['failed'])
+        yield ('studentapp_write_last_batch_size', 'Ukuran batch commit terakhir', 'gauge', {},
+               stats['last_batch_size'])
+        yield ('studentapp_write_max_batch_size', 'Ukuran batch commit terbesar', 'gauge', {},
+               stats['max_batch_size'])
+    return collect
+
+
+def init_app(app, db, listing_cache=None, write_queue=None, authorize=None):
+    """
+    Pasang instrumentasi ke ``app`` dan engine ``db``, dan daftarkan ``/metrics``.
+
+    Args:
+        authorize: callable() -> bool yang mengizinkan ``/metrics`` untuk
+            request ini (mis. session admin). Tanpa ini hanya METRICS_TOKEN.
+
+    Konfigurasi:
+        METRICS_SLOW_REQUEST_MS: ambang log request lambat (None = nonaktif)
+        METRICS_TOKEN: bearer token scraper (default: STUDENTS_METRICS_TOKEN)
+    """
+    app.config.setdefault('METRICS_SLOW_REQUEST_MS', 500)
+    app.config.setdefault('METRICS_TOKEN', os.environ.get(TOKEN_ENV))
+    metrics = app.extensions[EXTENSION_KEY] = Registry()
+    if listing_cache is not None:
+        metrics.add_callback(cache_callback(listing_cache))
+    if write_queue is not None:
+        metrics.add_callback(write_queue_callback(write_queue))
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_rendered, app)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(db.engine, 'handle_error', _handle_error)
+    app.extensions.setdefault(database.CONNECTION_WRAPPERS_KEY, []).append(_TracedConnection)
+
+    app.add_url_rule('/metrics', 'metrics', partial(_metrics_view, authorize))
+    return metrics
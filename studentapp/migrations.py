@@ -0,0 +1,267 @@
+"""
+Migrasi skema berversi untuk database student.
+
+Versi skema disimpan di ``PRAGMA user_version``. Tabel dasar tetap dibuat oleh
+``db.create_all()``; migrasi di sini menangani perubahan setelahnya (yang
+sebelumnya dilakukan manual dengan ALTER) dan index untuk query yang sering
+dipakai. Setiap migrasi berjalan dalam transaksinya sendiri bersama update
+``user_version``, jadi migrasi yang gagal tidak meninggalkan skema setengah jadi.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(cursor, table):
+    return {row[1] for row in cursor.execute(f'PRAGMA table_info({table})')}
+
+
+def _add_student_owner_id(cursor):
+    # Database lama sudah di-ALTER manual, jadi cek dulu kolomnya
+    if 'owner_id' not in _columns(cursor, 'student'):
+        cursor.execute('ALTER TABLE student ADD COLUMN owner_id INTEGER REFERENCES user (id)')
+
+
+def _student_table_version(cursor):
+    # Counter perubahan tabel student untuk ETag/Last-Modified
+    # (studentapp/conditional.py). Dijaga trigger supaya semua jalur tulis
+    # (ORM, sqlite3 mentah, import massal, proses lain) ikut menaikkan versi.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS table_version ("
+        "name TEXT PRIMARY KEY, version INTEGER NOT NULL, updated_at INTEGER NOT NULL)"
+    )
+    cursor.execute(
+        "INSERT OR IGNORE INTO table_version (name, version, updated_at) "
+        "VALUES ('student', 1, CAST(strftime('%s', 'now') AS INTEGER))"
+    )
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS student_version_{event.lower()} "
+            f"AFTER {event} ON student BEGIN "
+            "UPDATE table_version SET version = version + 1, "
+            "updated_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE name = 'student'; "
+            "END"
+        )
+
+
+def _user_session_table(cursor):
+    # Session server-side (studentapp/sessions.py). id = hash session ID dari
+    # cookie; user_id untuk revoke massal per user, expires_at untuk purge.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS user_session ("
+        "id TEXT PRIMARY KEY, user_id INTEGER, data TEXT NOT NULL, expires_at INTEGER NOT NULL"
+        ") WITHOUT ROWID"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_user_session_user_id ON user_session (user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_user_session_expires_at ON user_session (expires_at)")
+
+
+def _student_search(cursor):
+    # Pencarian nama (studentapp/search.py): FTS5 external content table di
+    # atas student, dijaga trigger supaya semua jalur tulis ikut ter-index.
+    # prefix='2 3' mempercepat pencarian prefix ("ali"*) untuk kata pendek.
+    cursor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5("
+        "name, content='student', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN "
+        "INSERT INTO student_fts (rowid, name) VALUES (new.id, new.name); "
+        "END"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN "
+        "INSERT INTO student_fts (student_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "END"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS student_fts_update AFTER UPDATE OF name ON student BEGIN "
+        "INSERT INTO student_fts (student_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO student_fts (rowid, name) VALUES (new.id, new.name); "
+        "END"
+    )
+    cursor.execute("INSERT INTO student_fts (student_fts) VALUES ('rebuild')")
+    # Filter dan sort per kolom; id sebagai tie-breaker keyset
+    for column in ('name', 'age', 'grade'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_student_{column}_id ON student ({column}, id)")
+
+
+def _student_stats(cursor):
+    # Agregat per (owner_id, grade, kelompok umur 10 tahun) untuk /stats
+    # (studentapp/stats.py), dijaga trigger seperti table_version. owner_id
+    # NULL disimpan sebagai 0 karena kolom primary key WITHOUT ROWID harus
+    # NOT NULL. Bucket yang count-nya 0 dihapus supaya tabel tetap kecil.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS student_stats ("
+        "owner_id INTEGER NOT NULL, grade TEXT NOT NULL, age_bucket INTEGER NOT NULL, "
+        "count INTEGER NOT NULL, age_sum INTEGER NOT NULL, "
+        "PRIMARY KEY (owner_id, grade, age_bucket)) WITHOUT ROWID"
+    )
+    add = (
+        "INSERT INTO student_stats (owner_id, grade, age_bucket, count, age_sum) "
+        "VALUES (COALESCE(new.owner_id, 0), new.grade, new.age / 10 * 10, 1, new.age) "
+        "ON CONFLICT (owner_id, grade, age_bucket) DO UPDATE SET "
+        "count = count + 1, age_sum = age_sum + excluded.age_sum; "
+    )
+    remove = (
+        "UPDATE student_stats SET count = count - 1, age_sum = age_sum - old.age "
+        "WHERE owner_id = COALESCE(old.owner_id, 0) AND grade = old.grade AND age_bucket = old.age / 10 * 10; "
+        "DELETE FROM student_stats "
+        "WHERE owner_id = COALESCE(old.owner_id, 0) AND grade = old.grade AND age_bucket = old.age / 10 * 10 "
+        "AND count <= 0; "
+    )
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS student_stats_insert AFTER INSERT ON student BEGIN {add}END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS student_stats_delete AFTER DELETE ON student BEGIN {remove}END")
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS student_stats_update AFTER UPDATE OF owner_id, grade, age ON student "
+        f"BEGIN {remove}{add}END"
+    )
+    cursor.execute(
+        "INSERT INTO student_stats (owner_id, grade, age_bucket, count, age_sum) "
+        "SELECT COALESCE(owner_id, 0), grade, age / 10 * 10, COUNT(*), SUM(age) FROM student "
+        "GROUP BY 1, 2, 3"
+    )
+
+
+def _purge_job_table(cursor):
+    # Job hapus massal di background (studentapp/purge.py). Progres (cursor id,
+    # jumlah terhapus) dan permintaan cancel disimpan di tabel supaya bisa
+    # dibaca/diubah dari worker mana pun dan job bisa dilanjutkan setelah restart.
+    # shard: NULL = baris di database utama, selain itu nama file shard
+    # (studentapp/sharding.py) tempat baris dihapus.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS purge_job ("
+        "id INTEGER PRIMARY KEY, filters TEXT NOT NULL, status TEXT NOT NULL, "
+        "cursor INTEGER NOT NULL, max_id INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0, "
+        "total INTEGER, cancel_requested INTEGER NOT NULL DEFAULT 0, error TEXT, created_by INTEGER, "
+        "shard TEXT, created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_purge_job_status ON purge_job (status, id)")
+
+
+def _student_shards(cursor):
+    # Sharding per owner (studentapp/sharding.py). student_shard_map: owner ->
+    # file shard, state 'copying' selama split online lalu 'active'.
+    # student_key: direktori id -> owner (AUTOINCREMENT, mulai dari id student
+    # terbesar) supaya id tetap unik lintas shard dan admin bisa merutekan
+    # /edit/<id>. Trigger log/guard di student tidak dibuat di sini: dipasang
+    # oleh sharding.install_triggers hanya jika sharding dipakai.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS student_shard_map ("
+        "owner_id INTEGER PRIMARY KEY, shard TEXT NOT NULL, state TEXT NOT NULL, "
+        "updated_at INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)))"
+    )
+    cursor.execute("CREATE TABLE IF NOT EXISTS student_key (id INTEGER PRIMARY KEY AUTOINCREMENT, owner_id INTEGER)")
+    cursor.execute(
+        "INSERT INTO sqlite_sequence (name, seq) "
+        "SELECT 'student_key', COALESCE(MAX(id), 0) FROM student "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'student_key')"
+    )
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS student_shard_log ("
+        "seq INTEGER PRIMARY KEY, owner_id INTEGER NOT NULL, student_id INTEGER NOT NULL)"
+    )
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_student_shard_log_owner_id ON student_shard_log (owner_id, seq)")
+    cursor.execute(
+        "INSERT OR IGNORE INTO table_version (name, version, updated_at) "
+        "VALUES ('student_shard_map', 1, CAST(strftime('%s', 'now') AS INTEGER))"
+    )
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS student_shard_map_version_{event.lower()} "
+            f"AFTER {event} ON student_shard_map BEGIN "
+            "UPDATE table_version SET version = version + 1, "
+            "updated_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE name = 'student_shard_map'; "
+            "END"
+        )
+
+
+def _user_session_revocation(cursor):
+    # Log pencabutan session (studentapp/sessions.py). Trigger mencatat key
+    # setiap session yang belum kedaluwarsa dihapus (logout, rotasi saat login,
+    # revoke per user/semua, termasuk dari command line); worker membaca baris
+    # baru secara berkala dan hanya membuang key itu dari cache memorinya.
+    # Purge session kedaluwarsa tidak dicatat.
+    cursor.execute(
+        "CREATE TABLE IF NOT EXISTS user_session_revocation ("
+        "seq INTEGER PRIMARY KEY, id TEXT NOT NULL, revoked_at INTEGER NOT NULL)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS ix_user_session_revocation_revoked_at "
+        "ON user_session_revocation (revoked_at)"
+    )
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS user_session_revocation_delete AFTER DELETE ON user_session "
+        "WHEN old.expires_at > CAST(strftime('%s', 'now') AS INTEGER) BEGIN "
+        "INSERT INTO user_session_revocation (id, revoked_at) "
+        "VALUES (old.id, CAST(strftime('%s', 'now') AS INTEGER)); "
+        "END"
+    )
+
+
+# (versi, deskripsi, langkah) - langkah berupa SQL atau fungsi(cursor).
+# Jangan mengubah migrasi yang sudah dirilis; tambahkan versi baru.
+MIGRATIONS = (
+    (1, 'kolom student.owner_id', _add_student_owner_id),
+    (2, 'index (owner_id, id) untuk listing dan ownership check per user',
+     'CREATE INDEX IF NOT EXISTS ix_student_owner_id_id ON student (owner_id, id)'),
+    (3, 'tabel table_version + trigger untuk conditional GET', _student_table_version),
+    (4, 'tabel user_session untuk session server-side', _user_session_table),
+    (5, 'FTS5 nama student + index filter/sort (name, age, grade)', _student_search),
+    (6, 'tabel agregat student_stats + trigger', _student_stats),
+    (7, 'tabel purge_job untuk hapus massal di background', _purge_job_table),
+    (8, 'shard map dan direktori id student untuk split per owner', _student_shards),
+    (9, 'log pencabutan user_session untuk cache session lintas worker', _user_session_revocation),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    cursor = connection.cursor()
+    try:
+        return cursor.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def pending(connection):
+    """Daftar migrasi yang belum diterapkan."""
+    version = current_version(connection)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def upgrade(connection, target=LATEST_VERSION):
+    """
+    Terapkan semua migrasi sampai versi ``target``.
+
+    Args:
+        connection: koneksi sqlite3 (atau koneksi pinjaman dari pool)
+
+    Returns:
+        list versi yang baru diterapkan
+    """
+    applied = []
+    cursor = connection.cursor()
+    try:
+        for version, description, step in pending(connection):
+            if version > target:
+                break
+            cursor.execute('BEGIN IMMEDIATE')
+            try:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+                cursor.execute(f'PRAGMA user_version = {int(version)}')
+            except Exception:
+                connection.rollback()
+                raise
+            connection.commit()
+            logger.debug("migrasi %d diterapkan: %s", version, description)
+            applied.append(version)
+    finally:
+        cursor.close()
+    return applied
@@ -0,0 +1,23 @@
+"""
+Kolom model ``Student`` yang sama di ketiga varian aplikasi.
+
+Setiap varian tetap punya ``db = SQLAlchemy(app)`` sendiri, jadi yang dibagi
+hanya definisi kolomnya lewat mixin::
+
+    class Student(models.StudentMixin, db.Model):
+        owner_id = ...  # kolom tambahan khusus varian
+
+Nama tabel tetap ``student`` (diturunkan Flask-SQLAlchemy dari nama class).
+"""
+
+from sqlalchemy import Column, Integer, String
+
+
+class StudentMixin:
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    age = Column(Integer, nullable=False)
+    grade = Column(String(10), nullable=False)
+
+    def __repr__(self):
+        return f'<Student {self.name}>'
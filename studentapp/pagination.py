@@ -0,0 +1,304 @@
+"""
+Keyset pagination (cursor berbasis id) dan rendering streaming untuk daftar
+student.
+
+Halaman diambil dengan ``WHERE id > :after ORDER BY id LIMIT :n`` sehingga
+biaya query tetap sama di halaman mana pun (berbeda dengan OFFSET yang harus
+melewati semua baris sebelumnya).
+
+Baris halaman tidak disimpan sebagai ``Row`` SQLAlchemy: ``compact_rows``
+membaca cursor DBAPI per ``fetchmany`` dan langsung membungkus tuple sqlite3
+menjadi namedtuple (``record_type``). Template tetap memakai ``student.name``
+dst., tetapi akses atribut namedtuple jauh lebih murah dibanding
+``Row.__getattr__`` dan halaman yang di-buffer/di-cache memakai memori lebih
+sedikit (lihat ``benchmarks/bench_rows.py``).
+"""
+
+from collections import namedtuple
+from functools import partial
+
+# Flask & SQLAlchemy diimpor di dalam fungsi yang memakainya: builder SQL
+# (keyset_sql) juga dipakai ``python -m studentapp check-plans`` yang tidak
+# butuh keduanya.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Jumlah event template yang dikumpulkan sebelum dikirim ke client saat streaming
+STREAM_BUFFER_SIZE = 16
+
+# Jumlah baris per fetchmany saat membaca cursor
+FETCH_CHUNK_SIZE = 256
+
+# Kelas record per daftar kolom (dibuat sekali, dipakai ulang semua request)
+_record_types = {}
+
+
+def _positive_int(args, name):
+    try:
+        value = int(args.get(name, ''))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def parse_page_args(args, default_size=DEFAULT_PAGE_SIZE, max_size=MAX_PAGE_SIZE):
+    """
+    Ambil cursor ``after``/``before`` dan ``limit`` dari query string.
+    Nilai yang tidak valid diabaikan dan kembali ke default.
+
+    Returns:
+        tuple (after, before, limit)
+    """
+    after = _positive_int(args, 'after')
+    before = _positive_int(args, 'before')
+    limit = _positive_int(args, 'limit') or default_size
+    return after, before, min(limit, max_size)
+
+
+def record_type(columns):
+    """namedtuple untuk baris dengan kolom ``columns``, di-cache per daftar kolom."""
+    columns = tuple(columns)
+    record = _record_types.get(columns)
+    if record is None:
+        record = namedtuple('Record', columns, rename=True)
+        record = _record_types.setdefault(columns, record)
+    return record
+
+
+def compact_rows(result, chunk_size=FETCH_CHUNK_SIZE):
+    """
+    Generator baris ``result`` sebagai record ringan (``record_type``).
+
+    Result SQLAlchemy (``CursorResult``) dibaca langsung dari cursor DBAPI per
+    ``fetchmany(chunk_size)`` tanpa membuat ``Row`` per baris. Kolom teks/angka
+    sqlite3 tidak punya result processor, jadi nilainya sama persis. Sumber
+    lain (mis. ``sharding.MergedResult``) yang barisnya sudah berupa record
+    di-yield apa adanya. Result tidak ditutup di sini.
+    """
+    cursor = getattr(result, 'cursor', None)
+    if cursor is None:
+        yield from result
+        return
+    make = partial(tuple.__new__, record_type(result.keys()))
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield from map(make, rows)
+
+
+class KeysetPage:
+    """
+    Satu halaman hasil keyset pagination.
+
+    ``rows`` berupa list record (``compact_rows``), atau generator jika
+    halaman dibuat dengan ``stream=True``. Pada mode streaming
+    ``next_cursor`` baru diketahui setelah ``rows`` habis diiterasi; template
+    Jinja yang di-stream mengevaluasi link navigasi setelah loop tabel, jadi
+    urutan ini aman.
+    """
+
+    def __init__(self, result, limit, after=None, before=None, stream=False):
+        self.limit = limit
+        self.after = after
+        self.before = before
+        self.stream = stream
+        self.first_id = None
+        self.last_id = None
+        self._has_more = False
+
+        if before is not None:
+            # Halaman mundur diambil dengan ORDER BY id DESC lalu dibalik,
+            # jadi harus dibuffer (maksimal limit + 1 baris)
+            try:
+                rows = list(compact_rows(result))
+            finally:
+                result.close()
+            self._has_more = len(rows) > limit
+            result = rows[:limit][::-1]
+            stream = False
+
+        self.rows = self._track(result) if stream else list(self._track(result))
+
+    def _track(self, result):
+        try:
+            for count, row in enumerate(compact_rows(result)):
+                if count == self.limit:
+                    # Baris ke limit+1 hanya penanda bahwa masih ada halaman berikutnya
+                    self._has_more = True
+                    break
+                if self.first_id is None:
+                    self.first_id = row.id
+                self.last_id = row.id
+                yield row
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+
+    @property
+    def next_cursor(self):
+        if self.before is not None:
+            return self.last_id
+        return self.last_id if self._has_more else None
+
+    @property
+    def prev_cursor(self):
+        if self.before is not None:
+            return self.first_id if self._has_more else None
+        return self.first_id if self.after is not None else None
+
+    def to_dict(self):
+        """
+        Bentuk JSON halaman yang sudah di-buffer (untuk ``cache.SocketBackend``):
+        nama kolom sekali, lalu nilai baris sebagai list.
+        """
+        fields = self.rows[0]._fields if self.rows else ()
+        return {
+            'limit': self.limit, 'after': self.after, 'before': self.before,
+            'first_id': self.first_id, 'last_id': self.last_id, 'has_more': self._has_more,
+            'fields': list(fields), 'rows': [list(row) for row in self.rows],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        page = cls.__new__(cls)
+        page.limit = data['limit']
+        page.after = data['after']
+        page.before = data['before']
+        page.stream = False
+        page.first_id = data['first_id']
+        page.last_id = data['last_id']
+        page._has_more = data['has_more']
+        record = record_type(data['fields'])
+        page.rows = [record._make(row) for row in data['rows']]
+        return page
+
+
+class CursorNotFound(LookupError):
+    """Baris cursor ``after``/``before`` tidak ada atau tidak terlihat oleh pemanggil (jawab 404)."""
+
+
+def cursor_sql(table, order_by, scope=None):
+    """
+    SQL nilai kolom sort baris cursor. ``scope`` (mis. "owner_id = :owner_id")
+    membatasi lookup ke baris yang memang boleh dilihat pemanggil, jadi cursor
+    berupa id milik owner lain tidak bisa dipakai untuk membandingkan nilai
+    kolomnya dengan baris sendiri.
+    """
+    sql = f'SELECT {order_by} FROM {table} WHERE id = :cursor'
+    return f'{sql} AND {scope}' if scope else sql
+
+
+def cursor_value(session, table, order_by, cursor, scope=None, scope_params=None):
+    """
+    Nilai kolom ``order_by`` baris cursor di dalam ``scope``.
+
+    Raises:
+        CursorNotFound: baris tidak ada atau di luar scope pemanggil
+    """
+    from sqlalchemy import text
+
+    row = session.execute(text(cursor_sql(table, order_by, scope)),
+                          dict(scope_params or {}, cursor=cursor)).fetchone()
+    if row is None:
+        raise CursorNotFound(cursor)
+    return row[0]
+
+
+def keyset_sql(table, where=None, after=False, before=False, order_by='id', descending=False):
+    """
+    Bangun SQL keyset untuk satu halaman. Dipisah dari ``keyset_page`` supaya
+    bentuk query ini juga bisa diperiksa oleh ``studentapp.queryplan``.
+
+    Args:
+        table: nama tabel (konstanta dari kode, BUKAN input user)
+        where: kondisi tambahan dengan parameter binding, mis. "owner_id = :owner_id"
+        after/before: True jika cursor tersebut dipakai
+        order_by: kolom urutan (konstanta dari whitelist, BUKAN input user);
+            id selalu menjadi tie-breaker. Untuk kolom selain id, nilai kolom
+            baris cursor dikirim sebagai parameter ``:cursor_value`` (lihat
+            ``cursor_value``)
+        descending: True untuk urutan menurun
+    """
+    conditions = [where] if where else []
+    # Halaman mundur (before) diambil dengan arah kebalikan lalu dibalik di KeysetPage
+    reverse = descending != bool(before)
+    order = 'DESC' if reverse else 'ASC'
+    comparison = '<' if reverse else '>'
+    cursor = 'before' if before else 'after' if after else None
+
+    if cursor is not None:
+        if order_by == 'id':
+            conditions.append(f'id {comparison} :{cursor}')
+        else:
+            conditions.append(f'({order_by}, id) {comparison} (:cursor_value, :{cursor})')
+
+    sql = f'SELECT * FROM {table}'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if order_by == 'id':
+        return sql + f' ORDER BY id {order} LIMIT :limit'
+    return sql + f' ORDER BY {order_by} {order}, id {order} LIMIT :limit'
+
+
+def keyset_page(session, table, limit, after=None, before=None, where=None, params=None, stream=False,
+                order_by='id', descending=False, scope=None, scope_params=None):
+    """
+    Jalankan query keyset untuk satu halaman.
+
+    Args:
+        session: db.session atau connection SQLAlchemy
+        table: nama tabel (konstanta dari kode, BUKAN input user)
+        limit: jumlah baris per halaman
+        after/before: cursor id dari query string (sudah divalidasi integer)
+        where: kondisi tambahan dengan parameter binding, mis. "owner_id = :owner_id"
+        params: nilai parameter untuk ``where``
+        stream: True agar baris di-yield langsung dari cursor tanpa dibuffer
+        order_by/descending: urutan halaman (lihat ``keyset_sql``)
+        scope/scope_params: batas baris yang boleh dilihat pemanggil (mis.
+            owner_id user biasa) untuk lookup nilai sort baris cursor
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        CursorNotFound: urutan selain id dan baris cursor di luar ``scope``
+    """
+    bind = dict(params or {}, limit=limit + 1)
+    cursor = before if before is not None else after
+    if cursor is not None:
+        bind['before' if before is not None else 'after'] = cursor
+        if order_by != 'id':
+            bind['cursor_value'] = cursor_value(session, table, order_by, cursor, scope, scope_params)
+
+    from sqlalchemy import text
+
+    sql = keyset_sql(table, where, after=after is not None, before=before is not None,
+                     order_by=order_by, descending=descending)
+    result = session.execute(text(sql), bind)
+    return KeysetPage(result, limit, after=after, before=before, stream=stream)
+
+
+def wants_stream(args, default=False):
+    """Mode streaming aktif lewat ``?stream=1`` atau konfigurasi default app."""
+    value = args.get('stream')
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def stream_template(template_name, **context):
+    """
+    Render template sebagai response streaming (Jinja ``stream()`` dibungkus
+    ``stream_with_context``) sehingga baris tabel dikirim begitu keluar dari
+    cursor database, tanpa membangun seluruh HTML di memori.
+    """
+    from flask import Response, current_app, stream_with_context
+
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return Response(stream_with_context(stream), mimetype='text/html')
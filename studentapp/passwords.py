@@ -0,0 +1,155 @@
+"""
+Hash password dengan biaya yang bisa diatur (scrypt) dan pool KDF terbatas.
+
+Format hash::
+
+    scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>
+
+Parameter biaya ikut tersimpan di hash, jadi setelah ``PASSWORD_SCRYPT_N``
+dinaikkan, ``needs_rehash()`` mengenali hash lama dan ``login()`` menyimpan
+ulang hash dengan biaya baru saat password berhasil diverifikasi. Password
+lama yang masih plaintext (sebelum modul ini) juga di-rehash dengan cara yang
+sama.
+
+scrypt dijalankan di ``KdfPool``: thread pool berukuran tetap dengan batas
+antrian. ``hashlib.scrypt`` melepas GIL, jadi thread lain di worker tetap
+melayani request biasa. Jika pool dan antriannya penuh (banjir login),
+``KdfBusy`` langsung di-raise tanpa menghitung hash apa pun.
+
+Environment variable ``STUDENTS_PASSWORD_SCRYPT_N`` menimpa
+``PASSWORD_SCRYPT_N`` (mis. biaya kecil untuk security/regression.py); hash
+yang dibuat dengan biaya itu di-rehash saat login setelah variabelnya dihapus.
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+PREFIX = 'scrypt'
+N_ENV = 'STUDENTS_PASSWORD_SCRYPT_N'
+DEFAULT_N = 2 ** 14   # +- 70 ms per hash di CPU 1 core; naikkan seiring hardware
+DEFAULT_R = 8
+DEFAULT_P = 1
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+DEFAULT_KDF_WORKERS = 2
+DEFAULT_KDF_QUEUE = 8
+# Batas tunggu hasil KDF di request (detik)
+KDF_TIMEOUT = 10.0
+
+
+class KdfBusy(Exception):
+    """Pool KDF penuh; request login sebaiknya dijawab 503."""
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n, dklen=HASH_BYTES)
+
+
+def _parse(stored):
+    """(n, r, p, salt, hash) dari string hash, atau None untuk format lain."""
+    parts = stored.split('$')
+    if len(parts) != 6 or parts[0] != PREFIX:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), bytes.fromhex(parts[4]), bytes.fromhex(parts[5])
+    except ValueError:
+        return None
+
+
+def hash_password(password, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P):
+    salt = os.urandom(SALT_BYTES)
+    return f'{PREFIX}${n}${r}${p}${salt.hex()}${_scrypt(password, salt, n, r, p).hex()}'
+
+
+def verify_password(stored, password):
+    parsed = _parse(stored)
+    if parsed is None:
+        # Data lama: plaintext. Tetap constant-time compare; di-rehash setelah login
+        return hmac.compare_digest(stored.encode(), password.encode())
+    n, r, p, salt, expected = parsed
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), expected)
+
+
+class KdfPool:
+    """ThreadPoolExecutor dengan jumlah slot (berjalan + antri) yang dibatasi."""
+
+    def __init__(self, workers=DEFAULT_KDF_WORKERS, queue=DEFAULT_KDF_QUEUE):
+        self.workers = workers
+        self.queue = queue
+        self.rejected = 0
+        self._start()
+        # Thread tidak ikut fork (studentapp serve): worker membuat pool sendiri
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='studentapp-kdf')
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise KdfBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=KDF_TIMEOUT)
+        except FutureTimeout:
+            raise KdfBusy() from None
+
+
+class PasswordHasher:
+    """Hash/verify lewat ``KdfPool`` dengan parameter dari config app."""
+
+    def __init__(self, n=DEFAULT_N, r=DEFAULT_R, p=DEFAULT_P, pool=None):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.pool = pool or KdfPool()
+        # Hash pembanding untuk username yang tidak ada, dibuat sekali saat start
+        # (bukan saat login gagal pertama, yang akan menghitung dua hash)
+        self._dummy = hash_password(os.urandom(8).hex(), n, r, p)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Config: PASSWORD_SCRYPT_N/_R/_P, PASSWORD_KDF_WORKERS, PASSWORD_KDF_QUEUE.
+        ``STUDENTS_PASSWORD_SCRYPT_N`` di environment menimpa PASSWORD_SCRYPT_N.
+        """
+        n = os.environ.get(N_ENV)
+        return cls(
+            int(n) if n else config.get('PASSWORD_SCRYPT_N', DEFAULT_N),
+            config.get('PASSWORD_SCRYPT_R', DEFAULT_R),
+            config.get('PASSWORD_SCRYPT_P', DEFAULT_P),
+            KdfPool(config.get('PASSWORD_KDF_WORKERS', DEFAULT_KDF_WORKERS),
+                    config.get('PASSWORD_KDF_QUEUE', DEFAULT_KDF_QUEUE)),
+        )
+
+    def hash(self, password):
+        return self.pool.run(hash_password, password, self.n, self.r, self.p)
+
+    def verify(self, stored, password):
+        """
+        Verifikasi password. ``stored=None`` (username tidak ada) tetap menghitung
+        satu hash supaya waktu respons tidak membocorkan username yang valid.
+        """
+        if stored is None:
+            self.pool.run(verify_password, self._dummy, password)
+            return False
+        return self.pool.run(verify_password, stored, password)
+
+    def needs_rehash(self, stored):
+        parsed = _parse(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+    def stats(self):
+        return {'n': self.n, 'r': self.r, 'p': self.p, 'workers': self.pool.workers,
+                'queue': self.pool.queue, 'rejected': self.pool.rejected}
@@ -0,0 +1,358 @@
+"""
+Hapus massal student di background, per chunk id dengan transaksi pendek.
+
+``DELETE FROM student`` dalam satu statement memegang write lock SQLite selama
+seluruh baris dihapus (termasuk trigger FTS, agregat, dan versi tabel per
+baris), sehingga semua writer lain tertahan dan request admin bisa timeout.
+Job purge menghapus baris target dengan id di rentang ``(cursor, batas]`` yang
+berisi paling banyak ``PURGE_CHUNK_SIZE`` baris, satu transaksi per chunk, lalu
+jeda ``PURGE_CHUNK_PAUSE_MS`` supaya writer lain sempat mengambil lock.
+
+Job disimpan di tabel ``purge_job`` (migrasi 7):
+    filters  JSON owner_id dan/atau filter pencarian (q, grade, age_min,
+             age_max; artinya sama dengan di studentapp/search.py)
+    max_id   id terbesar saat job dibuat: baris yang ditambahkan setelahnya
+             tidak ikut terhapus
+    cursor   id terakhir yang sudah diproses, di-commit bersama chunk-nya
+    status   queued -> running -> done | cancelled | failed
+
+Request admin hanya membuat baris job lalu menyerahkannya ke runner thread
+proses itu, jadi langsung mendapat id job. Progres dan permintaan cancel lewat
+tabel, sehingga berlaku dari worker mana pun; runner memeriksa
+``cancel_requested`` di awal setiap chunk (baris yang sudah terhapus tetap
+terhapus). Job yang runner-nya berhenti di tengah jalan (restart, crash)
+dilanjutkan dari cursor terakhir dengan
+``python -m studentapp purge-jobs --resume``.
+
+Dengan sharding (studentapp/sharding.py) satu permintaan hapus menjadi satu
+job per sumber: database utama dan setiap shard yang terdampak (kolom
+``shard``). Job tetap disimpan di database utama; baris dihapus di
+file shard per chunk dan di-commit sebelum progres job disimpan, jadi chunk
+yang diulang setelah crash hanya menghapus ulang rentang yang sama.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from studentapp import database, search, sharding
+from studentapp.validation import validate_id
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_PAUSE_MS = 10
+# Job 'running' tanpa progres selama ini (detik) dianggap runner-nya sudah mati
+STALE_AFTER = 60
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+CREATE_SQL = (
+    "INSERT INTO purge_job (filters, status, cursor, max_id, created_by, created_at, updated_at) "
+    "SELECT ?, 'queued', 0, COALESCE(MAX(id), 0), ?, ?, ? FROM student"
+)
+# Job shard: id baris shard dialokasikan di student_key, jadi id terbesarnya
+# adalah batas atas untuk semua shard
+CREATE_SHARD_SQL = (
+    "INSERT INTO purge_job (filters, status, cursor, max_id, created_by, created_at, updated_at, shard) "
+    "SELECT ?, 'queued', 0, COALESCE(MAX(id), 0), ?, ?, ?, ? FROM student_key"
+)
+GET_SQL = (
+    "SELECT id, filters, status, cursor, max_id, deleted, total, cancel_requested, error, created_by, "
+    "created_at, updated_at, shard FROM purge_job WHERE id = ?"
+)
+LIST_SQL = (
+    "SELECT id, filters, status, cursor, max_id, deleted, total, cancel_requested, error, created_by, "
+    "created_at, updated_at, shard FROM purge_job ORDER BY id DESC LIMIT ?"
+)
+RESUMABLE_SQL = "SELECT id FROM purge_job WHERE status IN ('queued', 'running') AND updated_at < ? ORDER BY id"
+CANCEL_SQL = (
+    "UPDATE purge_job SET cancel_requested = 1, updated_at = ? "
+    "WHERE id = ? AND status IN ('queued', 'running')"
+)
+# Klaim atomik: hanya satu runner yang menjalankan job (worker vs --resume)
+CLAIM_SQL = (
+    "UPDATE purge_job SET status = 'running', updated_at = ? "
+    "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND updated_at < ?))"
+)
+CANCEL_REQUESTED_SQL = "SELECT cancel_requested FROM purge_job WHERE id = ?"
+TOTAL_SQL = "UPDATE purge_job SET total = ?, updated_at = ? WHERE id = ?"
+PROGRESS_SQL = "UPDATE purge_job SET cursor = ?, deleted = deleted + ?, status = ?, updated_at = ? WHERE id = ?"
+FINISH_SQL = "UPDATE purge_job SET status = ?, error = ?, updated_at = ? WHERE id = ?"
+
+
+# ============================================================
+# FILTER & SQL PER CHUNK
+# ============================================================
+
+def parse_filters(args):
+    """
+    Filter job dari ``request.form``/JSON: owner_id, q, grade, age_min, age_max.
+
+    Raises:
+        ValueError: nilai filter tidak valid
+    """
+    student_search = search.StudentSearch.from_args(args)
+    filters = {'q': student_search.q, 'grade': student_search.grade,
+               'age_min': student_search.age_min, 'age_max': student_search.age_max}
+    owner_id = args.get('owner_id')
+    if owner_id not in (None, ''):
+        filters['owner_id'] = validate_id(owner_id)
+    return {name: value for name, value in filters.items() if value is not None}
+
+
+def filter_where(filters):
+    """(where, params) untuk filter job; where None = semua baris."""
+    student_search = search.StudentSearch(filters.get('q'), filters.get('grade'),
+                                          filters.get('age_min'), filters.get('age_max'))
+    owner_id = filters.get('owner_id')
+    if owner_id is None:
+        return student_search.where()
+    return student_search.where('owner_id = :owner_id', {'owner_id': owner_id})
+
+
+def _condition(where):
+    return f' AND {where}' if where else ''
+
+
+def bound_sql(where=None):
+    """Id baris target ke-``offset + 1`` setelah cursor = batas atas chunk."""
+    return ('SELECT id FROM student WHERE id > :after AND id <= :max_id' + _condition(where)
+            + ' ORDER BY id LIMIT 1 OFFSET :offset')
+
+
+def delete_sql(where=None):
+    return 'DELETE FROM student WHERE id > :after AND id <= :upper' + _condition(where)
+
+
+def count_sql(where=None):
+    return 'SELECT COUNT(*) FROM student WHERE id > :after AND id <= :max_id' + _condition(where)
+
+
+# ============================================================
+# JOB (koneksi sqlite3)
+# ============================================================
+
+def _job(row):
+    (job_id, filters, status, cursor, max_id, deleted, total, cancel_requested, error, created_by,
+     created_at, updated_at, shard) = row
+    if total:
+        progress = round(min(deleted / total, 1.0), 4)
+    else:
+        progress = 1.0 if status == DONE else 0.0
+    return {'id': job_id, 'filters': json.loads(filters), 'status': status, 'cursor': cursor,
+            'max_id': max_id, 'deleted': deleted, 'total': total, 'progress': progress,
+            'cancel_requested': bool(cancel_requested), 'error': error, 'created_by': created_by,
+            'created_at': created_at, 'updated_at': updated_at, 'shard': shard}
+
+
+def create(connection, filters, created_by=None, shard=None):
+    """Buat job berstatus queued (``shard``: nama file shard, None = database utama). Return id job."""
+    now = int(time.time())
+    filters = json.dumps(filters, sort_keys=True)
+    if shard is None:
+        cursor = connection.execute(CREATE_SQL, (filters, created_by, now, now))
+    else:
+        cursor = connection.execute(CREATE_SHARD_SQL, (filters, created_by, now, now, shard))
+    connection.commit()
+    return cursor.lastrowid
+
+
+def get(connection, job_id):
+    row = connection.execute(GET_SQL, (job_id,)).fetchone()
+    return _job(row) if row else None
+
+
+def list_jobs(connection, limit=20):
+    return [_job(row) for row in connection.execute(LIST_SQL, (limit,))]
+
+
+def cancel(connection, job_id):
+    """Minta job berhenti di awal chunk berikutnya. Return False jika job sudah selesai."""
+    changed = connection.execute(CANCEL_SQL, (int(time.time()), job_id)).rowcount
+    connection.commit()
+    return changed == 1
+
+
+def resumable(connection, stale_after=STALE_AFTER):
+    """Id job queued/running yang tidak ada progres selama ``stale_after`` detik."""
+    return [row[0] for row in connection.execute(RESUMABLE_SQL, (int(time.time()) - stale_after,))]
+
+
+def _claim(connection, job_id, stale_after):
+    now = int(time.time())
+    claimed = connection.execute(CLAIM_SQL, (now, job_id, now - stale_after)).rowcount == 1
+    connection.commit()
+    return claimed
+
+
+def _open_target(connection, shard):
+    """Koneksi sqlite3 ke file shard job, di folder shard database ``connection``."""
+    path = connection.execute('PRAGMA database_list').fetchone()[2]
+    return sharding.open_shard(os.path.join(sharding.shard_directory(path), shard))
+
+
+def _delete_chunk(cursor, where, params, after, max_id, chunk_size):
+    row = cursor.execute(bound_sql(where), dict(params, after=after, max_id=max_id,
+                                                offset=chunk_size - 1)).fetchone()
+    upper = row[0] if row else max_id
+    cursor.execute(delete_sql(where), dict(params, after=after, upper=upper))
+    return upper, cursor.rowcount
+
+
+def _delete_shard_chunk(target, where, params, after, max_id, chunk_size):
+    """Hapus satu chunk di shard dalam transaksinya sendiri (write lock shard, bukan database utama)."""
+    cursor = target.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        result = _delete_chunk(cursor, where, params, after, max_id, chunk_size)
+        target.commit()
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        cursor.close()
+    return result
+
+
+def _chunk(connection, job_id, where, params, after, max_id, chunk_size, target=None):
+    """
+    Satu transaksi: cek cancel, hapus satu chunk, simpan cursor. Return (status, batas, jumlah).
+    ``target``: koneksi shard job; chunk shard di-commit dulu di file shard.
+    """
+    if target is not None:
+        if connection.execute(CANCEL_REQUESTED_SQL, (job_id,)).fetchone()[0]:
+            connection.execute(FINISH_SQL, (CANCELLED, None, int(time.time()), job_id))
+            connection.commit()
+            return CANCELLED, after, 0
+        upper, deleted = _delete_shard_chunk(target, where, params, after, max_id, chunk_size)
+    cursor = connection.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        now = int(time.time())
+        if target is None:
+            if cursor.execute(CANCEL_REQUESTED_SQL, (job_id,)).fetchone()[0]:
+                cursor.execute(FINISH_SQL, (CANCELLED, None, now, job_id))
+                connection.commit()
+                return CANCELLED, after, 0
+            upper, deleted = _delete_chunk(cursor, where, params, after, max_id, chunk_size)
+        status = DONE if upper >= max_id else RUNNING
+        cursor.execute(PROGRESS_SQL, (upper, deleted, status, now, job_id))
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return status, upper, deleted
+
+
+def run(connection, job_id, chunk_size=DEFAULT_CHUNK_SIZE, pause=DEFAULT_CHUNK_PAUSE_MS / 1000,
+        on_chunk=None, stale_after=STALE_AFTER):
+    """
+    Jalankan job sampai selesai atau di-cancel.
+
+    Args:
+        connection: koneksi sqlite3 khusus runner (bukan koneksi request)
+        on_chunk: callback(job_id, filters, jumlah) setelah chunk yang menghapus baris di-commit
+        stale_after: job 'running' boleh diambil alih jika tidak ada progres selama ini
+
+    Returns:
+        dict job terakhir, atau None jika job sudah dijalankan runner lain
+    """
+    if not _claim(connection, job_id, stale_after):
+        return None
+    job = get(connection, job_id)
+    filters = job['filters']
+    where, params = filter_where(filters)
+    after, max_id = job['cursor'], job['max_id']
+    target = None
+    try:
+        if job['shard'] is not None:
+            target = _open_target(connection, job['shard'])
+        if job['total'] is None:
+            remaining = (target or connection).execute(
+                count_sql(where), dict(params, after=after, max_id=max_id)).fetchone()[0]
+            connection.execute(TOTAL_SQL, (job['deleted'] + remaining, int(time.time()), job_id))
+            connection.commit()
+        status = RUNNING
+        while status == RUNNING:
+            status, after, deleted = _chunk(connection, job_id, where, params, after, max_id, chunk_size,
+                                            target)
+            if deleted and on_chunk is not None:
+                try:
+                    on_chunk(job_id, filters, deleted)
+                except Exception:
+                    logger.exception("callback on_chunk purge gagal")
+            if status == RUNNING and pause:
+                # Jeda tanpa transaksi: writer lain yang menunggu busy_timeout mendapat lock
+                time.sleep(pause)
+    except Exception as e:
+        logger.exception("job purge %s gagal", job_id)
+        connection.rollback()
+        connection.execute(FINISH_SQL, (FAILED, str(e), int(time.time()), job_id))
+        connection.commit()
+    finally:
+        if target is not None:
+            target.close()
+    job = get(connection, job_id)
+    logger.info("job purge %s %s: %s baris dihapus", job_id, job['status'], job['deleted'])
+    return job
+
+
+# ============================================================
+# RUNNER THREAD
+# ============================================================
+
+class PurgeRunner:
+    """Antrian job + satu runner thread per proses dengan koneksi sqlite3 sendiri."""
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, pause_ms=DEFAULT_CHUNK_PAUSE_MS, on_chunk=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.pause = pause_ms / 1000.0
+        self.on_chunk = on_chunk
+        self._reset()
+        # Thread tidak ikut fork (studentapp serve): worker memulai runner sendiri
+        os.register_at_fork(after_in_child=self._reset)
+
+    @classmethod
+    def from_config(cls, config, on_chunk=None):
+        """Config: PURGE_CHUNK_SIZE, PURGE_CHUNK_PAUSE_MS, STUDENTS_DB_PATH (dari database.configure)."""
+        return cls(config['STUDENTS_DB_PATH'],
+                   config.get('PURGE_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+                   config.get('PURGE_CHUNK_PAUSE_MS', DEFAULT_CHUNK_PAUSE_MS),
+                   on_chunk)
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        """Jalankan job di runner thread (job diproses berurutan)."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='studentapp-purge', daemon=True)
+                    self._thread.start()
+        self._queue.put(job_id)
+
+    def _run(self):
+        connection = database.connect(self.path)
+        try:
+            while True:
+                job_id = self._queue.get()
+                try:
+                    run(connection, job_id, self.chunk_size, self.pause, self.on_chunk)
+                except Exception:
+                    logger.exception("runner purge gagal menjalankan job %s", job_id)
+        finally:
+            connection.close()
@@ -0,0 +1,196 @@
+"""
+Pemeriksaan ``EXPLAIN QUERY PLAN`` untuk semua SQL di aplikasi.
+
+SQL dikumpulkan dari source code (argumen ``text(...)`` dan string literal
+yang diawali SELECT/INSERT/UPDATE/DELETE) ditambah bentuk query keyset dari
+``studentapp.pagination`` dan query pencarian dari ``studentapp.search``. Query yang punya WHERE dianggap hot query: jika
+plan-nya berisi ``SCAN`` (full table/index scan), pemeriksaan gagal. Query
+tanpa WHERE (mis. listing admin atau DELETE semua) memang harus membaca
+seluruh tabel, jadi hanya dilaporkan.
+
+SQL yang dibangun dengan f-string (contoh kerentanan SQL Injection di app.py)
+tidak bisa dianalisis secara statis dan dilewati.
+"""
+
+import ast
+import re
+import sqlite3
+
+from studentapp import migrations, pagination, purge, search
+
+SQL_PREFIX = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE)\s+\S', re.IGNORECASE)
+NAMED_PARAM = re.compile(r'(?<!:):(\w+)')
+HAS_WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+# Bentuk query keyset yang dibangun secara dinamis oleh pagination.keyset_sql
+KEYSET_QUERIES = (
+    pagination.keyset_sql('student'),
+    pagination.keyset_sql('student', after=True),
+    pagination.keyset_sql('student', before=True),
+    pagination.keyset_sql('student', 'owner_id = :owner_id'),
+    pagination.keyset_sql('student', 'owner_id = :owner_id', after=True),
+    pagination.keyset_sql('student', 'owner_id = :owner_id', before=True),
+    pagination.cursor_sql('student', 'name'),
+    pagination.cursor_sql('student', 'name', 'owner_id = :owner_id'),
+)
+
+
+def _search_sql(owner=False, after=False, **filters):
+    student_search = search.StudentSearch(**filters)
+    where, _ = student_search.where('owner_id = :owner_id' if owner else None)
+    return pagination.keyset_sql('student', where, after=after, order_by=student_search.sort,
+                                 descending=student_search.descending)
+
+
+# Bentuk query pencarian/filter/sort dari studentapp.search
+SEARCH_QUERIES = (
+    _search_sql(q='x'),
+    _search_sql(q='x', after=True),
+    _search_sql(owner=True, q='x'),
+    _search_sql(grade='A'),
+    _search_sql(grade='A', after=True),
+    _search_sql(age_min=1, age_max=2),
+    _search_sql(owner=True, grade='A', age_min=1),
+    _search_sql(sort='name', after=True),
+    _search_sql(sort='age', descending=True, after=True),
+    _search_sql(owner=True, sort='grade', after=True),
+    _search_sql(q='x', sort='name', after=True),
+    _search_sql(grade='A', sort='age', descending=True, after=True),
+)
+
+
+def _purge_sql(**filters):
+    where, _ = purge.filter_where(filters)
+    return purge.bound_sql(where), purge.delete_sql(where)
+
+
+# Query per chunk job purge (studentapp/purge.py): semua, per owner, per filter
+PURGE_QUERIES = (
+    _purge_sql()
+    + _purge_sql(owner_id=1)
+    + _purge_sql(grade='A')
+    + _purge_sql(q='x')
+    + _purge_sql(owner_id=1, age_min=1, age_max=2)
+)
+
+
+def _is_text_call(node):
+    func = node.func
+    name = func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+    return name == 'text'
+
+
+def collect_sql(paths):
+    """
+    Kumpulkan string SQL statis dari file Python.
+
+    Returns:
+        list tuple (sql, lokasi) tanpa duplikat
+    """
+    found = {}
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        # Potongan string di dalam f-string bukan SQL utuh
+        fragments = {id(value) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+                     for value in node.values}
+        for node in ast.walk(tree):
+            if id(node) in fragments:
+                continue
+            candidates = []
+            if isinstance(node, ast.Call) and _is_text_call(node) and node.args:
+                candidates.append(node.args[0])
+            elif isinstance(node, ast.Constant):
+                candidates.append(node)
+            for candidate in candidates:
+                if isinstance(candidate, ast.Constant) and isinstance(candidate.value, str) \
+                        and SQL_PREFIX.match(candidate.value):
+                    sql = ' '.join(candidate.value.split())
+                    found.setdefault(sql, f'{path}:{candidate.lineno}')
+    return list(found.items())
+
+
+def _placeholder_params(sql):
+    if '?' in sql:
+        return (None,) * sql.count('?')
+    return {name: None for name in NAMED_PARAM.findall(sql)}
+
+
+def explain(connection, sql):
+    """Baris detail dari ``EXPLAIN QUERY PLAN`` (parameter diisi NULL)."""
+    rows = connection.execute(f'EXPLAIN QUERY PLAN {sql}', _placeholder_params(sql)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def schema_copy(source_path):
+    """
+    Database in-memory berisi skema ``source_path`` yang sudah dimigrasi
+    ke versi terbaru (file aslinya tidak diubah).
+    """
+    source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+    try:
+        rows = source.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY type = 'table' DESC, rowid"
+        ).fetchall()
+        # Shadow table FTS5 (<nama>_data, _idx, ...) dibuat ulang oleh CREATE VIRTUAL TABLE
+        virtual = [name for _, name, sql in rows if sql.upper().startswith('CREATE VIRTUAL TABLE')]
+        ddl = [sql for kind, name, sql in rows
+               if not (kind == 'table' and any(name.startswith(f'{table}_') for table in virtual))]
+        version = source.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        source.close()
+
+    connection = sqlite3.connect(':memory:')
+    for statement in ddl:
+        connection.execute(statement)
+    connection.execute(f'PRAGMA user_version = {int(version)}')
+    migrations.upgrade(connection)
+    return connection
+
+
+def check(connection, queries):
+    """
+    Jalankan EXPLAIN untuk setiap query.
+
+    Returns:
+        tuple (failures, reports); keduanya list (lokasi, sql, detail_plan)
+    """
+    failures = []
+    reports = []
+    for sql, location in queries:
+        try:
+            plan = explain(connection, sql)
+        except sqlite3.Error as e:
+            failures.append((location, sql, [f'error: {e}']))
+            continue
+        reports.append((location, sql, plan))
+        # Scan virtual table FTS5 ("VIRTUAL TABLE INDEX") adalah lookup index full-text;
+        # "SCAN CONSTANT ROW" adalah satu baris INSERT ... SELECT tanpa FROM
+        full_scan = any(detail.startswith('SCAN ') and 'VIRTUAL TABLE INDEX' not in detail
+                        and detail != 'SCAN CONSTANT ROW' for detail in plan)
+        if full_scan and HAS_WHERE.search(sql):
+            failures.append((location, sql, plan))
+    return failures, reports
+
+
+def run(db_path, paths, out):
+    """Periksa semua query di ``paths``; return exit code (0 = lolos)."""
+    queries = collect_sql(paths)
+    queries += [(sql, 'studentapp/pagination.py:keyset_sql') for sql in KEYSET_QUERIES]
+    queries += [(sql, 'studentapp/search.py:StudentSearch') for sql in SEARCH_QUERIES]
+    queries += [(sql, 'studentapp/purge.py:bound_sql/delete_sql') for sql in PURGE_QUERIES]
+    connection = schema_copy(db_path)
+    try:
+        failures, reports = check(connection, queries)
+    finally:
+        connection.close()
+
+    for location, sql, plan in reports:
+        out.write(f'{location}\n  {sql}\n')
+        for detail in plan:
+            out.write(f'    {detail}\n')
+    for location, sql, plan in failures:
+        out.write(f'GAGAL (full scan): {location}\n  {sql}\n  {"; ".join(plan)}\n')
+    out.write(f'{len(reports)} query diperiksa, {len(failures)} gagal\n')
+    return 1 if failures else 0
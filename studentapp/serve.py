@@ -0,0 +1,403 @@
+"""
+Mode serving produksi: pre-fork worker + thread pool per worker.
+
+    python -m studentapp serve --app idor-secured --workers 4 --threads 8
+
+Urutan start:
+    1. Parent meng-import varian aplikasi (``--app`` atau ``$STUDENTS_APP``),
+       menjalankan ``create_all`` + migrasi, dan meng-compile semua template
+       sekali (preload). Pool koneksi SQLite di-dispose sebelum fork supaya
+       tidak ada koneksi yang dipakai bersama oleh dua proses.
+    2. Socket listening dibuat di parent lalu diwariskan ke setiap worker.
+    3. Setiap worker membuang state pool warisan (``dispose(close=False)``),
+       membuka koneksi sendiri secara lazy, dan melayani request dengan
+       ``--threads`` thread.
+
+SIGTERM/SIGINT ke parent: worker berhenti menerima koneksi baru, request yang
+sedang berjalan diselesaikan (maksimal ``--graceful-timeout`` detik), lalu
+parent mencetak total request/s dan latency p50/p90/p99/p99.9/max.
+
+Dengan lebih dari satu worker, cache listing ``memory`` diganti cache server
+bersama (proses terpisah) supaya invalidasi dari satu worker terlihat oleh
+worker lain. Endpoint ``/metrics`` dan ``/admin/cache-stats`` tetap per worker.
+"""
+
+import array
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from studentapp import audit, bootstrap, cache, writebehind
+
+logger = logging.getLogger(__name__)
+
+# Nama varian -> modul aplikasi di root proyek (studentapp/bootstrap.py)
+VARIANTS = bootstrap.VARIANTS
+load_app = bootstrap.load_app
+VARIANT_ENV = 'STUDENTS_APP'
+DEFAULT_VARIANT = 'idor-secured'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5000
+DEFAULT_THREADS = 4
+DEFAULT_BACKLOG = 1024
+DEFAULT_GRACEFUL_TIMEOUT = 30.0
+# Koneksi keep-alive yang diam lebih lama dari ini ditutup agar thread bebas
+KEEPALIVE_TIMEOUT = 5.0
+
+REPORT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def preload(module):
+    """Siapkan skema dan template di parent, lalu lepas semua koneksi sebelum fork."""
+    app, db = module.app, module.db
+    # create_all + migrasi dilewati jika fingerprint skema cocok
+    bootstrap.prepare(module)
+    with app.app_context():
+        # Template di-compile sekali; worker mewarisi cache Jinja lewat fork
+        templates = app.jinja_env.list_templates()
+        for name in templates:
+            app.jinja_env.get_template(name)
+        db.engine.dispose()
+    return templates
+
+
+# ============================================================
+# WORKER: server WSGI dengan thread pool terbatas
+# ============================================================
+
+class _RequestHandler(WSGIRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # Batas idle koneksi keep-alive (--keepalive) berlaku per socket
+        self.timeout = self.server.keepalive
+        super().setup()
+
+    def run_wsgi(self):
+        start = time.monotonic()
+        try:
+            super().run_wsgi()
+        finally:
+            self.server.record(start, time.monotonic())
+            if self.server.draining:
+                # Saat drain, koneksi keep-alive ditutup setelah request ini
+                self.close_connection = True
+
+    def log_request(self, code='-', size='-'):
+        if self.server.access_log:
+            super().log_request(code, size)
+
+    def log_error(self, format, *args):
+        # Koneksi keep-alive yang idle sampai timeout bukan error
+        if not format.startswith('Request timed out'):
+            super().log_error(format, *args)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """``BaseWSGIServer`` Werkzeug dengan ``ThreadPoolExecutor`` berukuran tetap.
+
+    Socket listening dipakai bersama oleh semua worker dan dibuat non-blocking,
+    sehingga worker yang kalah berebut ``accept()`` langsung kembali ke
+    ``select`` (dan tetap bisa dihentikan) alih-alih tertahan di ``accept()``.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, fd, app, threads, multiprocess=False, access_log=False,
+                 keepalive=KEEPALIVE_TIMEOUT):
+        self.multiprocess = multiprocess
+        self.access_log = access_log
+        self.keepalive = keepalive
+        self.draining = False
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='studentapp-http')
+        self._stats_lock = threading.Lock()
+        self.latencies = array.array('d')
+        self.first_start = None
+        self.last_end = None
+        super().__init__(host, port, app, handler=_RequestHandler, fd=fd)
+        self.socket.setblocking(False)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def record(self, start, end):
+        with self._stats_lock:
+            self.latencies.append(end - start)
+            if self.first_start is None or start < self.first_start:
+                self.first_start = start
+            if self.last_end is None or end > self.last_end:
+                self.last_end = end
+
+    def drain(self, timeout):
+        """Berhenti menerima koneksi, tunggu request yang sedang berjalan selesai."""
+        self.draining = True
+        done = threading.Event()
+
+        def wait_executor():
+            self.executor.shutdown(wait=True)
+            done.set()
+
+        threading.Thread(target=wait_executor, daemon=True).start()
+        if not done.wait(timeout):
+            logger.warning("Worker %s: drain melewati %.0f s, %s", os.getpid(), timeout,
+                           "request yang tersisa dihentikan")
+
+    def write_stats(self, path):
+        with self._stats_lock:
+            header = array.array('d', [self.first_start or 0.0, self.last_end or 0.0])
+            with open(path, 'wb') as f:
+                header.tofile(f)
+                self.latencies.tofile(f)
+
+
+def _run_worker(module, listen_fd, options, stats_dir, cache_socket):
+    """Badan proses worker setelah fork. Tidak pernah kembali."""
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C ditangani parent
+        app, db = module.app, module.db
+        with app.app_context():
+            # Pool warisan parent sudah kosong; dispose(close=False) memastikan
+            # worker tidak menutup/memakai koneksi milik proses lain
+            db.engine.dispose(close=False)
+        if cache_socket is not None:
+            module.listing_cache.backend = cache.SocketBackend(cache_socket)
+
+        server = PooledWSGIServer(options.host, options.port, listen_fd, app, options.threads,
+                                  multiprocess=options.workers > 1,
+                                  access_log=options.access_log, keepalive=options.keepalive)
+
+        def on_sigterm(signum, frame):
+            # shutdown() menunggu serve_forever selesai, jadi dipanggil dari thread lain
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, on_sigterm)
+        server.serve_forever()
+        server.drain(options.graceful_timeout)
+        # Mutation write-behind yang masih antri di-commit sebelum worker keluar
+        writebehind.flush_all()
+        # os._exit() melewati atexit: event audit di buffer ditulis di sini
+        audit.flush_all()
+        server.write_stats(os.path.join(stats_dir, f'worker-{os.getpid()}.bin'))
+    except BaseException:
+        logger.exception("Worker %s berhenti karena error", os.getpid())
+        exit_code = 1
+    finally:
+        logging.shutdown()
+        os._exit(exit_code)
+
+
+def _run_cache_server(path, maxsize, ttl):
+    exit_code = 0
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        server = cache.CacheServer(path, maxsize, ttl)
+        signal.signal(signal.SIGTERM,
+                      lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+        server.serve_forever()
+        server.server_close()
+    except BaseException:
+        logger.exception("Cache server berhenti karena error")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+# ============================================================
+# LAPORAN THROUGHPUT & LATENCY
+# ============================================================
+
+def read_stats(stats_dir):
+    """Gabungkan file statistik semua worker: (latencies, first_start, last_end)."""
+    latencies = array.array('d')
+    first_start = last_end = None
+    for name in sorted(os.listdir(stats_dir)):
+        if not name.endswith('.bin'):
+            continue
+        data = array.array('d')
+        with open(os.path.join(stats_dir, name), 'rb') as f:
+            data.frombytes(f.read())
+        if len(data) <= 2:
+            continue
+        start, end = data[0], data[1]
+        first_start = start if first_start is None else min(first_start, start)
+        last_end = end if last_end is None else max(last_end, end)
+        latencies.extend(data[2:])
+    return latencies, first_start, last_end
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile dari list yang sudah terurut."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[min(int(rank), len(sorted_values)) - 1]
+
+
+def format_report(latencies, first_start, last_end):
+    if not latencies:
+        return "Tidak ada request yang dilayani"
+    values = sorted(latencies)
+    elapsed = max(last_end - first_start, 1e-9)
+    lines = [f"{len(values)} request dalam {elapsed:.2f} s ({len(values) / elapsed:.1f} req/s)"]
+    parts = [f"p{pct:g} {percentile(values, pct) * 1000:.2f} ms" for pct in REPORT_PERCENTILES]
+    parts.append(f"max {values[-1] * 1000:.2f} ms")
+    lines.append("Latency: " + "  ".join(parts))
+    return '\n'.join(lines)
+
+
+# ============================================================
+# MASTER: fork, supervisi, dan shutdown bertahap
+# ============================================================
+
+class Arbiter:
+    """Proses parent: memegang socket listening dan mengawasi worker."""
+
+    def __init__(self, module, options):
+        self.module = module
+        self.options = options
+        self.workers = {}
+        self.cache_pid = None
+        self.cache_socket = None
+        self.stopping = False
+        self.stats_dir = tempfile.mkdtemp(prefix='studentapp-serve-')
+        self.listener = None
+
+    def bind(self):
+        family = socket.AF_INET6 if ':' in self.options.host else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.options.host, self.options.port))
+        listener.listen(self.options.backlog)
+        listener.set_inheritable(True)
+        self.listener = listener
+
+    def _shared_cache_needed(self):
+        return (self.options.workers > 1
+                and isinstance(self.module.listing_cache.backend, cache.MemoryBackend))
+
+    def spawn_cache_server(self):
+        backend = self.module.listing_cache.backend
+        self.cache_socket = os.path.join(self.stats_dir, 'cache.sock')
+        pid = os.fork()
+        if pid == 0:
+            self.listener.close()
+            _run_cache_server(self.cache_socket, backend.maxsize, backend.ttl)
+        self.cache_pid = pid
+
+    def spawn_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self.module, self.listener.fileno(), self.options,
+                        self.stats_dir, self.cache_socket)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def handle_signal(self, signum, frame):
+        self.stopping = True
+
+    def reap(self):
+        """Ambil status worker yang sudah keluar; respawn jika bukan saat shutdown."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid == self.cache_pid:
+                self.cache_pid = None
+                if not self.stopping:
+                    logger.warning("Cache server keluar (status %s), worker memakai cache miss", status)
+                continue
+            started = self.workers.pop(pid, None)
+            if started is not None and not self.stopping:
+                logger.warning("Worker %s keluar (status %s), menjalankan worker baru", pid, status)
+                # Hindari respawn loop yang memakan CPU jika worker langsung crash
+                if time.monotonic() - started < 1.0:
+                    time.sleep(1.0)
+                self.spawn_worker()
+
+    def stop(self):
+        # Tidak ada respawn lagi (stopping): salinan fd milik worker tetap terbuka
+        # sampai worker selesai drain
+        if self.listener is not None:
+            self.listener.close()
+        for pid in list(self.workers):
+            _kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.options.graceful_timeout + 5.0
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in list(self.workers):
+            logger.warning("Worker %s tidak berhenti, dikirim SIGKILL", pid)
+            _kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.workers.pop(pid)
+        if self.cache_pid is not None:
+            _kill(self.cache_pid, signal.SIGTERM)
+            os.waitpid(self.cache_pid, 0)
+            self.cache_pid = None
+
+    def cleanup(self):
+        shutil.rmtree(self.stats_dir, ignore_errors=True)
+
+    def run(self):
+        self.bind()
+        host, port = self.listener.getsockname()[:2]
+        if self._shared_cache_needed():
+            self.spawn_cache_server()
+        signal.signal(signal.SIGTERM, self.handle_signal)
+        signal.signal(signal.SIGINT, self.handle_signal)
+        for _ in range(self.options.workers):
+            self.spawn_worker()
+        # Socket listening TIDAK ditutup di sini: worker pengganti (reap ->
+        # spawn_worker) mewarisi fd ini dari parent. Ditutup di stop().
+        print(f"Melayani {self.options.app} di http://{host}:{port} "
+              f"({self.options.workers} worker x {self.options.threads} thread)", flush=True)
+        try:
+            while not self.stopping:
+                self.reap()
+                time.sleep(0.2)
+        finally:
+            self.stop()
+        report = format_report(*read_stats(self.stats_dir))
+        self.cleanup()
+        return report
+
+
+def _kill(pid, signum):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def serve(options):
+    module = load_app(options.app)
+    templates = preload(module)
+    logger.info("Preload %s: %d template di-compile", VARIANTS[options.app], len(templates))
+    report = Arbiter(module, options).run()
+    print(report, flush=True)
+    return 0
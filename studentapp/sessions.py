@@ -0,0 +1,329 @@
+"""
+Session server-side untuk app_secured_idor.py.
+
+Cookie hanya berisi session ID acak (``secrets.token_urlsafe``), bukan data
+session yang ditandatangani. Data session - termasuk principal ``user_id`` dan
+``role`` yang dibaca ``login_required``/``admin_required`` - disimpan di:
+
+    1. LRU di memori dengan TTL: request berikutnya cukup satu lookup dict,
+       tanpa query, tanpa verifikasi HMAC, dan tanpa decode data session.
+    2. Tabel SQLite ``user_session`` (migrasi 4) sebagai fallback untuk worker
+       lain dan setelah proses restart.
+
+Yang disimpan sebagai key adalah hash session ID, jadi isi tabel tidak bisa
+dipakai langsung sebagai cookie. Session ID diganti saat login (mencegah
+session fixation) dan dihapus saat logout.
+
+Logout dan revoke massal (``revoke_user``/``revoke_all``, juga
+``python -m studentapp revoke-sessions``) berlaku di worker yang menanganinya
+saat itu juga, dan di worker lain paling lambat ``SESSION_REVOCATION_CHECK_MS``
+kemudian: trigger migrasi 9 mencatat key setiap session yang masih berlaku
+dihapus di ``user_session_revocation``, dan setiap worker membaca baris baru
+paling sering sekali per interval itu lalu hanya membuang key tersebut dari
+cache. Request ke ``/static/`` tidak membuka session sama sekali.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from studentapp import database
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIFETIME = 8 * 3600
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TTL = 60
+# Interval membaca log pencabutan dari worker lain (0 = setiap request)
+DEFAULT_REVOCATION_CHECK_MS = 1000
+# Baris log pencabutan disimpan selama ini (harus jauh di atas cache TTL)
+REVOCATION_RETENTION = 24 * 3600
+# Purge session kedaluwarsa di SQLite setiap N session baru
+PURGE_EVERY = 100
+
+# token_urlsafe(32): 43 karakter base64url. Cookie lain ditolak tanpa query.
+_SID_PATTERN = re.compile(r'[A-Za-z0-9_-]{43}')
+
+
+def _key(sid):
+    return hashlib.blake2b(sid.encode(), digest_size=16).hexdigest()
+
+
+# ============================================================
+# SQL (dipakai interface dan command line)
+# ============================================================
+
+def load(connection, key, now):
+    row = connection.execute(
+        "SELECT data, expires_at FROM user_session WHERE id = ? AND expires_at > ?", (key, now)
+    ).fetchone()
+    return (json.loads(row[0]), row[1]) if row else None
+
+
+def store(connection, key, user_id, data, expires_at):
+    connection.execute(
+        "INSERT OR REPLACE INTO user_session (id, user_id, data, expires_at) VALUES (?, ?, ?, ?)",
+        (key, user_id, json.dumps(data, separators=(',', ':')), expires_at)
+    )
+
+
+def delete(connection, key):
+    connection.execute("DELETE FROM user_session WHERE id = ?", (key,))
+
+
+def revoke(connection, user_id=None):
+    """Hapus semua session milik ``user_id`` (atau semua session). Return jumlah baris."""
+    if user_id is None:
+        cursor = connection.execute("DELETE FROM user_session")
+    else:
+        cursor = connection.execute("DELETE FROM user_session WHERE user_id = ?", (user_id,))
+    return cursor.rowcount
+
+
+def last_revocation(connection):
+    """Nomor urut log pencabutan terakhir (0 jika kosong)."""
+    return connection.execute("SELECT MAX(seq) FROM user_session_revocation").fetchone()[0] or 0
+
+
+def revocations(connection, after):
+    """Daftar (seq, key) session yang dicabut setelah nomor urut ``after``."""
+    return connection.execute(
+        "SELECT seq, id FROM user_session_revocation WHERE seq > ? ORDER BY seq", (after,)
+    ).fetchall()
+
+
+def purge_expired(connection, now):
+    connection.execute("DELETE FROM user_session_revocation WHERE revoked_at <= ?", (now - REVOCATION_RETENTION,))
+    return connection.execute("DELETE FROM user_session WHERE expires_at <= ?", (now,)).rowcount
+
+
+# ============================================================
+# CACHE MEMORI
+# ============================================================
+
+class SessionCache:
+    """LRU key -> (data, user_id, expires_at, dibaca_pada), aman dipakai banyak thread."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or now >= entry[2] or now - entry[3] >= self.ttl:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, data, user_id, expires_at, now):
+        with self._lock:
+            self._data[key] = (data, user_id, expires_at, now)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_user(self, user_id):
+        with self._lock:
+            for key in [key for key, entry in self._data.items() if entry[1] == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'maxsize': self.maxsize, 'ttl': self.ttl,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# ============================================================
+# FLASK SESSION INTERFACE
+# ============================================================
+
+class ServerSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.new = sid is None
+        self.modified = False
+        self.rotate = False
+
+    def regenerate(self):
+        """Minta session ID baru saat response disimpan (panggil saat login)."""
+        self.rotate = True
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    session_class = ServerSession
+
+    def __init__(self, db, lifetime=DEFAULT_LIFETIME, cache_size=DEFAULT_CACHE_SIZE,
+                 cache_ttl=DEFAULT_CACHE_TTL, revocation_check_ms=DEFAULT_REVOCATION_CHECK_MS):
+        self.db = db
+        self.lifetime = lifetime
+        self.cache = SessionCache(cache_size, cache_ttl)
+        self.revocation_check = revocation_check_ms / 1000.0
+        self._created = 0
+        self._revocation_lock = threading.Lock()
+        self._revocation_seq = None
+        self._revocation_checked = 0.0
+
+    def _check_revocations(self, now):
+        """Buang dari cache session yang dicabut worker/proses lain sejak pengecekan terakhir."""
+        if now - self._revocation_checked < self.revocation_check:
+            return
+        with self._revocation_lock:
+            if now - self._revocation_checked < self.revocation_check:
+                return
+            with database.connection(self.db) as connection:
+                if self._revocation_seq is None or now - self._revocation_checked >= self.cache.ttl:
+                    # Awal proses atau lama tidak dicek (log bisa sudah di-purge):
+                    # entri cache yang ada pasti sudah melewati TTL
+                    self.cache.clear()
+                    self._revocation_seq = last_revocation(connection)
+                    rows = ()
+                else:
+                    rows = revocations(connection, self._revocation_seq)
+            for seq, key in rows:
+                self.cache.delete(key)
+                self._revocation_seq = seq
+            self._revocation_checked = now
+
+    def open_session(self, app, request):
+        if request.path.startswith(app.static_url_path + '/'):
+            return None  # null session: CSS/asset tidak membaca session
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid or not _SID_PATTERN.fullmatch(sid):
+            return self.session_class()
+        key = _key(sid)
+        now = time.time()
+        self._check_revocations(now)
+        entry = self.cache.get(key, now)
+        if entry is not None:
+            data, _, expires_at, _ = entry
+            return self.session_class(data, sid, expires_at)
+        seq = self._revocation_seq
+        with database.connection(self.db) as connection:
+            row = load(connection, key, int(now))
+        if row is None:
+            return self.session_class()
+        data, expires_at = row
+        # Pencabutan yang terbaca di antara load dan set: jangan cache baris lama
+        if seq == self._revocation_seq:
+            self.cache.set(key, data, data.get('user_id'), expires_at, now)
+        return self.session_class(data, sid, expires_at)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.sid is not None and session.modified:
+                # logout / session.clear()
+                self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+        if not session.modified:
+            return
+
+        now = time.time()
+        if session.sid is None or session.rotate:
+            if session.sid is not None:
+                self._delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+            session.expires_at = int(now) + self.lifetime
+            session.rotate = False
+            self._created += 1
+
+        data = dict(session)
+        key = _key(session.sid)
+        with database.connection(self.db) as connection:
+            store(connection, key, data.get('user_id'), data, session.expires_at)
+            if self._created >= PURGE_EVERY:
+                self._created = 0
+                purge_expired(connection, int(now))
+            connection.commit()
+        self.cache.set(key, data, data.get('user_id'), session.expires_at, now)
+
+        response.set_cookie(name, session.sid, max_age=max(0, int(session.expires_at - now)),
+                            domain=domain, path=path,
+                            secure=self.get_cookie_secure(app),
+                            httponly=self.get_cookie_httponly(app),
+                            samesite=self.get_cookie_samesite(app) or 'Lax')
+        response.vary.add('Cookie')
+
+    def _delete(self, sid):
+        key = _key(sid)
+        self.cache.delete(key)
+        with database.connection(self.db) as connection:
+            delete(connection, key)
+            connection.commit()
+
+    def revoke_user(self, user_id):
+        """Logout paksa semua session milik satu user."""
+        with database.connection(self.db) as connection:
+            count = revoke(connection, user_id)
+            connection.commit()
+        self.cache.delete_user(user_id)
+        logger.info("%d session user %s dicabut", count, user_id)
+        return count
+
+    def revoke_all(self):
+        """Logout paksa semua user."""
+        with database.connection(self.db) as connection:
+            count = revoke(connection)
+            connection.commit()
+        self.cache.clear()
+        logger.info("%d session dicabut", count)
+        return count
+
+    def stats(self):
+        return dict(self.cache.stats(), revocation_seq=self._revocation_seq)
+
+
+def init_app(app, db):
+    """
+    Pasang session server-side. Config: SESSION_LIFETIME, SESSION_CACHE_SIZE,
+    SESSION_CACHE_TTL, SESSION_REVOCATION_CHECK_MS.
+    """
+    app.config.setdefault('SESSION_LIFETIME', DEFAULT_LIFETIME)
+    app.config.setdefault('SESSION_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+    app.config.setdefault('SESSION_CACHE_TTL', DEFAULT_CACHE_TTL)
+    app.config.setdefault('SESSION_REVOCATION_CHECK_MS', DEFAULT_REVOCATION_CHECK_MS)
+    app.config.setdefault('SESSION_COOKIE_HTTPONLY', True)
+    interface = ServerSideSessionInterface(
+        db, app.config['SESSION_LIFETIME'], app.config['SESSION_CACHE_SIZE'], app.config['SESSION_CACHE_TTL'],
+        app.config['SESSION_REVOCATION_CHECK_MS']
+    )
+    app.session_interface = interface
+    return interface
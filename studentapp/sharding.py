@@ -0,0 +1,676 @@
+"""
+Sharding per owner: data student setiap owner_id di file SQLite sendiri.
+
+Mode opsional untuk app_secured_idor.py (``STUDENTS_SHARDING``). SQLite hanya
+mengizinkan satu writer per file, jadi dengan satu ``students.db`` tulis dari
+satu tenant yang sibuk menahan semua tenant lain, dan query per owner selalu
+berjalan di tabel gabungan. Di database utama:
+
+    student_shard_map   owner_id -> file shard di folder ``<db>-shards/``.
+                        Owner tanpa entri 'active' tetap dilayani database
+                        utama, jadi owner bisa dipindah satu per satu.
+    student_key         direktori id -> owner_id. Id baru dialokasikan di sini
+                        (AUTOINCREMENT), jadi id tetap unik lintas shard dan
+                        ``/edit/<id>`` milik admin bisa dirutekan.
+
+Setiap shard memakai tabel ``student`` dan migrasi yang sama (FTS, agregat
+stats, table_version), jadi pencarian, ``/stats``, dan conditional GET per
+owner hanya membaca file shard itu. Owner baru yang belum punya baris di
+database utama langsung mendapat shard sendiri saat insert pertama.
+
+``ShardRouter`` membaca shard map (dicache per proses, dimuat ulang jika
+versinya di ``table_version`` berubah) dan menyimpan engine SQLAlchemy per
+shard dalam LRU (``STUDENTS_SHARD_MAX_OPEN``); engine yang paling lama tidak
+dipakai ditutup. Listing admin menjalankan query keyset yang sama di database
+utama dan setiap shard lalu menggabungkannya dengan k-way merge
+(``heapq.merge``) secara streaming: setiap sumber membaca maksimal
+``limit + 1`` baris.
+
+Split online (``python -m studentapp shard-split``), per owner:
+    1. entri map 'copying': trigger mulai mencatat id baris owner tersebut
+       yang berubah ke ``student_shard_log``
+    2. baris disalin ke shard per chunk id (tanpa write lock database utama)
+    3. log diputar ulang sampai sisanya di bawah satu chunk
+    4. satu transaksi ``BEGIN IMMEDIATE`` di database utama: sisa log, state
+       'active', hapus baris owner dari database utama
+Selama langkah 1-3 aplikasi tetap membaca/menulis database utama. Setelah
+'active', trigger guard menolak INSERT/UPDATE owner itu di database utama;
+worker dengan shard map lama memuat ulang map lalu mengulang statement di
+shard. Split yang terhenti bisa dijalankan ulang: semua langkah idempotent.
+
+Import massal ditulis ke shard owner yang mengupload (``import_writer``),
+dan hapus massal/purge dijalankan sebagai satu job per shard
+(studentapp/purge.py). Route lain yang bekerja langsung di database utama
+lewat sqlite3 (export massal, batch API, write-behind) tidak tersedia dalam
+mode ini.
+"""
+
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from functools import partial
+
+from studentapp import database, migrations, pagination, stats
+
+logger = logging.getLogger(__name__)
+
+ENABLE_ENV = 'STUDENTS_SHARDING'
+# Engine shard yang tetap terbuka per proses (LRU)
+DEFAULT_MAX_OPEN = 32
+# Koneksi per engine shard: satu file = satu writer, beberapa reader (WAL)
+SHARD_POOL_SIZE = 2
+SHARD_POOL_OVERFLOW = 4
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_CHUNK_PAUSE_MS = 10
+# Putaran replay log sebelum switch; sisanya diputar di dalam transaksi switch
+MAX_CATCHUP_ROUNDS = 100
+
+COPYING = 'copying'
+ACTIVE = 'active'
+# Pesan RAISE trigger student_shard_guard_*
+MOVED_MESSAGE = 'owner sudah dipindah ke shard'
+
+# Trigger log/guard di tabel student database utama. Hanya dipasang jika
+# sharding dipakai (install_triggers: app dengan STUDENTS_SHARDING, dan
+# shard-split), jadi deployment tanpa sharding tidak membayar pengecekan
+# student_shard_map di setiap tulis.
+TRIGGERS = tuple(
+    (f'student_shard_log_{event.lower()}',
+     f"CREATE TRIGGER IF NOT EXISTS student_shard_log_{event.lower()} AFTER {event} ON student "
+     f"WHEN EXISTS (SELECT 1 FROM student_shard_map WHERE owner_id = {row}.owner_id AND state = 'copying') "
+     f"BEGIN INSERT INTO student_shard_log (owner_id, student_id) VALUES ({row}.owner_id, {row}.id); END")
+    for event, row in (('INSERT', 'new'), ('UPDATE', 'old'), ('DELETE', 'old'))
+) + tuple(
+    (f'student_shard_guard_{event.lower()}',
+     f"CREATE TRIGGER IF NOT EXISTS student_shard_guard_{event.lower()} BEFORE {event} ON student "
+     "WHEN EXISTS (SELECT 1 FROM student_shard_map WHERE owner_id = new.owner_id AND state = 'active') "
+     f"BEGIN SELECT RAISE(ABORT, '{MOVED_MESSAGE}'); END")
+    for event in ('INSERT', 'UPDATE')
+)
+# Nama objek di sqlite_master unik lintas tipe; tabel kecil, dibaca utuh
+SCHEMA_NAMES_SQL = "SELECT name FROM sqlite_master"
+
+# Tabel student di shard: kolom sama dengan model (studentapp/models.py)
+SHARD_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS student (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+    "age INTEGER NOT NULL, grade VARCHAR(10) NOT NULL, owner_id INTEGER)"
+)
+
+MAP_SQL = "SELECT owner_id, shard, state FROM student_shard_map"
+MAP_VERSION_SQL = "SELECT version FROM table_version WHERE name = 'student_shard_map'"
+VERSION_SQL = "SELECT version, updated_at FROM table_version WHERE name = 'student'"
+OWNER_OF_SQL = "SELECT owner_id FROM student_key WHERE id = :id"
+# Id student terbesar ikut didaftarkan sebelum alokasi: baris yang ditulis tanpa
+# student_key (mode tanpa sharding) menaikkan sequence AUTOINCREMENT, jadi id baru
+# tidak bentrok dengan id di database utama
+SYNC_KEY_SQL = (
+    "INSERT OR IGNORE INTO student_key (id, owner_id) "
+    "SELECT id, owner_id FROM student WHERE id = (SELECT MAX(id) FROM student)"
+)
+ALLOCATE_SQL = "INSERT INTO student_key (owner_id) VALUES (:owner_id) RETURNING id"
+# Owner baru (belum punya baris di database utama) langsung mendapat shard
+ASSIGN_SQL = (
+    "INSERT OR IGNORE INTO student_shard_map (owner_id, shard, state) SELECT :owner_id, :shard, 'active' "
+    "WHERE NOT EXISTS (SELECT 1 FROM student WHERE owner_id = :owner_id)"
+)
+
+# Import massal (sqlite3, parameter ?): satu blok id student_key per batch
+IMPORT_KEY_SQL = "INSERT INTO student_key (owner_id) VALUES (?)"
+LAST_KEY_SQL = "SELECT MAX(id) FROM student_key"
+IMPORT_SQL = "INSERT INTO student (id, name, age, grade, owner_id) VALUES (?, ?, ?, ?, ?)"
+
+# Split (sqlite3, parameter ?)
+STATE_SQL = "SELECT shard, state FROM student_shard_map WHERE owner_id = ?"
+START_SQL = "INSERT OR IGNORE INTO student_shard_map (owner_id, shard, state) VALUES (?, ?, 'copying')"
+# owner_id NULL (baris app.py / app_secured.py) tetap di database utama
+OWNERS_SQL = "SELECT DISTINCT owner_id FROM student WHERE owner_id > 0 ORDER BY owner_id"
+COPY_SQL = "SELECT id, name, age, grade, owner_id FROM student WHERE owner_id = ? AND id > ? ORDER BY id LIMIT ?"
+ROW_SQL = "SELECT id, name, age, grade, owner_id FROM student WHERE id = ?"
+KEY_SQL = "INSERT OR IGNORE INTO student_key (id, owner_id) VALUES (?, ?)"
+LOG_SQL = "SELECT seq, student_id FROM student_shard_log WHERE owner_id = ? AND seq > ? ORDER BY seq LIMIT ?"
+# ON CONFLICT DO UPDATE (bukan INSERT OR REPLACE) supaya trigger UPDATE FTS/stats di shard ikut jalan
+UPSERT_SQL = (
+    "INSERT INTO student (id, name, age, grade, owner_id) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (id) DO UPDATE SET name = excluded.name, age = excluded.age, grade = excluded.grade, "
+    "owner_id = excluded.owner_id"
+)
+SHARD_DELETE_SQL = "DELETE FROM student WHERE id = ?"
+ACTIVATE_SQL = (
+    "UPDATE student_shard_map SET state = 'active', "
+    "updated_at = CAST(strftime('%s', 'now') AS INTEGER) WHERE owner_id = ?"
+)
+DRAIN_SQL = "DELETE FROM student WHERE owner_id = ?"
+CLEAR_LOG_SQL = "DELETE FROM student_shard_log WHERE owner_id = ?"
+
+
+class ShardMoved(Exception):
+    """Database utama menolak tulis karena owner sudah pindah ke shard."""
+
+
+def shard_directory(db_path):
+    """Folder ``<db>-shards/`` di samping database utama."""
+    return os.path.splitext(db_path)[0] + '-shards'
+
+
+def shard_name(owner_id):
+    return f'owner-{int(owner_id)}.db'
+
+
+def ensure_shard_schema(connection):
+    """Tabel student + migrasi yang sama dengan database utama (sqlite3)."""
+    connection.execute(SHARD_TABLE_SQL)
+    connection.commit()
+    migrations.upgrade(connection)
+
+
+def install_triggers(connection):
+    """
+    Pasang trigger log/guard sharding di database utama (koneksi DBAPI) jika
+    belum ada. Tanpa tulis (dan tanpa write lock) jika semuanya sudah terpasang.
+    """
+    existing = {row[0] for row in connection.execute(SCHEMA_NAMES_SQL)}
+    missing = [sql for name, sql in TRIGGERS if name not in existing]
+    for sql in missing:
+        connection.execute(sql)
+    connection.commit()
+    return len(missing)
+
+
+def open_shard(path):
+    """Koneksi sqlite3 ke file shard (dibuat jika belum ada) dengan skema terbaru."""
+    connection = database.connect(path)
+    try:
+        ensure_shard_schema(connection)
+    except Exception:
+        connection.close()
+        raise
+    return connection
+
+
+# ============================================================
+# ROUTER (APLIKASI)
+# ============================================================
+
+class MergedResult:
+    """
+    Baris dari beberapa sumber digabung berurutan (k-way merge), dengan
+    antarmuka yang dipakai ``pagination.KeysetPage``: iterasi, ``fetchall()``,
+    dan ``close()`` yang menutup semua result dan koneksi shard. Baris tiap
+    sumber dibaca sebagai record ringan (``pagination.compact_rows``).
+    """
+
+    def __init__(self, results, connections, key, reverse):
+        self._results = results
+        self._connections = connections
+        self._rows = heapq.merge(*map(pagination.compact_rows, results), key=key, reverse=reverse)
+
+    def __iter__(self):
+        return self._rows
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        for result in self._results:
+            result.close()
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+
+
+class ShardRouter:
+    """
+    Merutekan statement student ke database utama (``db.session``) atau shard
+    owner. Method dengan ``owner_id=None`` bekerja di semua sumber (admin).
+    """
+
+    def __init__(self, db, directory, max_open=DEFAULT_MAX_OPEN):
+        self.db = db
+        self.directory = directory
+        self.max_open = max_open
+        self._reset()
+        # Engine (dan koneksi sqlite3-nya) tidak boleh dipakai bersama setelah fork
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    @classmethod
+    def from_config(cls, db, config):
+        """
+        None jika sharding tidak aktif. Config: STUDENTS_SHARDING,
+        STUDENTS_SHARD_MAX_OPEN, STUDENTS_DB_PATH (dari database.configure).
+        """
+        enabled = os.environ.get(ENABLE_ENV)
+        enabled = enabled not in ('', '0', 'false') if enabled is not None else config.get(ENABLE_ENV)
+        if not enabled:
+            return None
+        return cls(db, shard_directory(config['STUDENTS_DB_PATH']),
+                   config.get('STUDENTS_SHARD_MAX_OPEN', DEFAULT_MAX_OPEN))
+
+    def prepare(self):
+        """Pasang trigger log/guard di database utama (dipanggil saat bootstrap.prepare)."""
+        with database.connection(self.db) as connection:
+            if install_triggers(connection):
+                logger.info("Trigger sharding dipasang di database utama")
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._engines = OrderedDict()
+        self._map = {}
+        self._map_version = None
+        self.opened = 0
+        self.evicted = 0
+
+    def _after_fork(self):
+        for engine in self._engines.values():
+            # close=False: koneksi milik parent tidak ditutup dari child
+            engine.dispose(close=False)
+        self._reset()
+
+    # ---------------- shard map ----------------
+
+    def _shard_map(self, force=False):
+        """Shard map {owner_id: (shard, state)}; versinya dicek sekali per request."""
+        from flask import g
+        from sqlalchemy import text
+
+        if force or not g.get('_shard_map_checked'):
+            version = self.db.session.execute(text(MAP_VERSION_SQL)).scalar()
+            if force or version != self._map_version:
+                rows = self.db.session.execute(text(MAP_SQL))
+                self._map = {owner_id: (shard, state) for owner_id, shard, state in rows}
+                self._map_version = version
+            g._shard_map_checked = True
+        return self._map
+
+    def route_owner(self, owner_id, force=False):
+        """Nama file shard owner, atau None jika owner dilayani database utama."""
+        shard, state = self._shard_map(force).get(owner_id, (None, None))
+        return shard if state == ACTIVE else None
+
+    def route_student(self, student_id, force=False):
+        """Shard yang menyimpan student ``student_id`` (lewat direktori student_key)."""
+        from sqlalchemy import text
+
+        owner_id = self.db.session.execute(text(OWNER_OF_SQL), {"id": student_id}).scalar()
+        # Tidak ada di direktori: baris lama di database utama
+        return None if owner_id is None else self.route_owner(owner_id, force)
+
+    def sources(self):
+        """Database utama (None) + semua shard aktif."""
+        return [None] + sorted({shard for shard, state in self._shard_map().values() if state == ACTIVE})
+
+    def purge_sources(self, owner_id=None):
+        """Sumber yang diproses job purge: hanya sumber owner jika ``owner_id``, selain itu semua."""
+        if owner_id is not None:
+            return [self.route_owner(owner_id)]
+        return self.sources()
+
+    # ---------------- koneksi ----------------
+
+    def _engine(self, shard):
+        from sqlalchemy import create_engine
+
+        with self._lock:
+            engine = self._engines.pop(shard, None)
+            if engine is None:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, shard)
+                engine = create_engine('sqlite:///' + path, creator=partial(open_shard, path),
+                                       pool_size=SHARD_POOL_SIZE, max_overflow=SHARD_POOL_OVERFLOW,
+                                       pool_timeout=database.POOL_TIMEOUT_S)
+                self.opened += 1
+            self._engines[shard] = engine
+            while len(self._engines) > self.max_open:
+                _, evicted = self._engines.popitem(last=False)
+                # Koneksi yang masih dipinjam request lain ditutup saat dikembalikan
+                evicted.dispose()
+                self.evicted += 1
+        return engine
+
+    @contextmanager
+    def connect(self, shard):
+        """``db.session`` untuk database utama, koneksi SQLAlchemy untuk shard."""
+        if shard is None:
+            yield self.db.session
+            return
+        with self._engine(shard).connect() as connection:
+            yield connection
+
+    # ---------------- statement ----------------
+
+    def _execute(self, shard, sql, params):
+        from sqlalchemy import exc, text
+
+        with self.connect(shard) as connection:
+            try:
+                row = connection.execute(text(sql), params).first()
+            except exc.IntegrityError as e:
+                connection.rollback()
+                if MOVED_MESSAGE in str(e.orig):
+                    raise ShardMoved() from e
+                raise
+            if row is None:
+                connection.rollback()
+            else:
+                connection.commit()
+            return row
+
+    def execute(self, sql, params, owner_id=None, student_id=None):
+        """
+        Jalankan satu statement ``... RETURNING`` lalu commit (rollback jika
+        tidak ada baris). Dirutekan ke shard ``owner_id``, atau ke shard yang
+        menyimpan ``student_id``. Return baris pertama atau None.
+        """
+        def route(force=False):
+            if student_id is not None:
+                return self.route_student(student_id, force)
+            return self.route_owner(owner_id, force)
+
+        shard = route()
+        try:
+            row = self._execute(shard, sql, params)
+            if row is not None or shard is not None:
+                return row
+        except ShardMoved:
+            pass
+        # Ditolak/tidak ditemukan di database utama: owner mungkin baru saja dipindah
+        moved = route(force=True)
+        if moved is None:
+            return None
+        return self._execute(moved, sql, params)
+
+    def insert(self, sql, params, owner_id):
+        """
+        Tambah student milik ``owner_id`` dengan id dari ``student_key``.
+        ``sql`` memakai parameter :id dan :owner_id.
+        """
+        from sqlalchemy import text
+
+        session = self.db.session
+        assigned = self._assign(owner_id)
+        session.execute(text(SYNC_KEY_SQL))
+        student_id = session.execute(text(ALLOCATE_SQL), {"owner_id": owner_id}).scalar()
+        session.commit()
+        if assigned:
+            self._shard_map(force=True)
+        return self.execute(sql, dict(params, id=student_id, owner_id=owner_id), owner_id=owner_id)
+
+    def _assign(self, owner_id):
+        """Owner baru langsung mendapat shard sendiri (belum di-commit). Return True jika ditambahkan."""
+        from sqlalchemy import text
+
+        if owner_id in self._shard_map():
+            return False
+        assignment = {"owner_id": owner_id, "shard": shard_name(owner_id)}
+        return bool(self.db.session.execute(text(ASSIGN_SQL), assignment).rowcount)
+
+    @contextmanager
+    def import_writer(self, owner_id):
+        """
+        Writer batch untuk ``bulk.import_students``: baris (name, age, grade)
+        milik ``owner_id`` mendapat blok id berurutan dari ``student_key``
+        (write lock database utama dipegang selama alokasi, jadi bloknya
+        tidak terselip alokasi lain) lalu ditulis ke shard owner dengan satu
+        ``executemany``, atau ke database utama jika owner belum dipindah.
+        """
+        assigned = self._assign(owner_id)
+        # Commit juga jika tidak ada yang ditambahkan: INSERT OR IGNORE tetap memegang write lock
+        self.db.session.commit()
+        if assigned:
+            self._shard_map(force=True)
+        route = {'shard': self.route_owner(owner_id)}
+
+        with database.connection(self.db) as main:
+            def allocate(rows):
+                main.execute(SYNC_KEY_SQL)
+                main.executemany(IMPORT_KEY_SQL, [(owner_id,)] * len(rows))
+                first = main.execute(LAST_KEY_SQL).fetchone()[0] - len(rows) + 1
+                return [(first + index,) + tuple(row) + (owner_id,) for index, row in enumerate(rows)]
+
+            def write(rows):
+                if route['shard'] is None:
+                    try:
+                        # Id dan baris di satu transaksi database utama
+                        main.executemany(IMPORT_SQL, allocate(rows))
+                        main.commit()
+                        return
+                    except sqlite3.IntegrityError as e:
+                        main.rollback()
+                        if MOVED_MESSAGE not in str(e):
+                            raise
+                        # Owner dipindah di tengah import: batch ini dan berikutnya ke shard
+                        route['shard'] = self.route_owner(owner_id, force=True)
+                values = allocate(rows)
+                main.commit()
+                with self._engine(route['shard']).begin() as connection:
+                    connection.exec_driver_sql(IMPORT_SQL, values)
+
+            yield write
+
+    def fetch(self, sql, params, student_id):
+        """Baca satu baris dari shard yang menyimpan ``student_id``."""
+        from sqlalchemy import text
+
+        with self.connect(self.route_student(student_id)) as connection:
+            return connection.execute(text(sql), params).fetchone()
+
+    # ---------------- listing, versi, stats ----------------
+
+    def _cursor_value(self, cursor, order_by, owner_id=None):
+        """
+        Nilai kolom sort baris cursor. User biasa: hanya dicari di shard miliknya
+        dengan ``owner_id = :owner_id`` (cursor milik owner lain -> CursorNotFound),
+        admin: di sumber tempat student itu berada.
+        """
+        if owner_id is None:
+            shard, scope, scope_params = self.route_student(cursor), None, None
+        else:
+            shard, scope, scope_params = self.route_owner(owner_id), 'owner_id = :owner_id', {"owner_id": owner_id}
+        with self.connect(shard) as connection:
+            # order_by dari whitelist studentapp/search.py (SORT_COLUMNS), bukan input user
+            return pagination.cursor_value(connection, 'student', order_by, cursor, scope, scope_params)
+
+    def page(self, student_search, limit, after=None, before=None, stream=False, owner_id=None):
+        """
+        Satu halaman keyset (``pagination.KeysetPage``) untuk owner, atau untuk
+        semua owner (``owner_id=None``) lewat k-way merge semua sumber.
+        """
+        from sqlalchemy import text
+
+        if owner_id is None:
+            where, params = student_search.where()
+            shards = self.sources()
+        else:
+            where, params = student_search.where('owner_id = :owner_id', {"owner_id": owner_id})
+            shards = [self.route_owner(owner_id)]
+        order_by = student_search.sort
+        cursor = before if before is not None else after
+        bind = dict(params, limit=limit + 1)
+        if cursor is not None:
+            bind['before' if before is not None else 'after'] = cursor
+        # Baris cursor hanya ada di satu sumber: nilai kolom sort-nya dikirim sebagai parameter
+        if cursor is not None and order_by != 'id':
+            bind['cursor_value'] = self._cursor_value(cursor, order_by, owner_id)
+        sql = text(pagination.keyset_sql('student', where, after=after is not None, before=before is not None,
+                                         order_by=order_by, descending=student_search.descending))
+
+        results, connections = [], []
+        try:
+            for shard in shards:
+                if shard is None:
+                    results.append(self.db.session.execute(sql, bind))
+                else:
+                    connection = self._engine(shard).connect()
+                    connections.append(connection)
+                    results.append(connection.execute(sql, bind))
+        except Exception:
+            MergedResult(results, connections, None, False).close()
+            raise
+        if order_by == 'id':
+            key = lambda row: row.id  # noqa: E731
+        else:
+            key = lambda row: (getattr(row, order_by), row.id)  # noqa: E731
+        merged = MergedResult(results, connections, key, reverse=student_search.descending != (before is not None))
+        return pagination.KeysetPage(merged, limit, after=after, before=before, stream=stream)
+
+    def table_version(self, owner_id=None, student_id=None):
+        """
+        ``conditional.TableVersion`` shard student/owner, atau gabungan semua
+        sumber (jumlah versi + versi shard map, waktu perubahan terakhir).
+        """
+        from sqlalchemy import text
+
+        from studentapp import conditional
+
+        if student_id is not None:
+            shards = [self.route_student(student_id)]
+        elif owner_id is not None:
+            shards = [self.route_owner(owner_id)]
+        else:
+            shards = self.sources()
+        version, updated_at = self._map_version or 0, 0
+        for shard in shards:
+            with self.connect(shard) as connection:
+                row = connection.execute(text(VERSION_SQL)).fetchone()
+            if row is None:
+                return None
+            version += row[0]
+            updated_at = max(updated_at, row[1])
+        return conditional.TableVersion(version, updated_at)
+
+    def stats_report(self, owner_id=None):
+        """``stats.report`` untuk owner, atau jumlah agregat semua sumber."""
+        from sqlalchemy import text
+
+        if owner_id is not None:
+            with self.connect(self.route_owner(owner_id)) as connection:
+                return stats.report(connection, owner_id=owner_id)
+        totals = defaultdict(lambda: [0, 0])
+        for shard in self.sources():
+            with self.connect(shard) as connection:
+                for kind, key, count, age_sum in connection.execute(text(stats.SUMMARY_SQL)):
+                    total = totals[kind, key]
+                    total[0] += count
+                    total[1] += age_sum
+        return stats.summarize((kind, key, count, age_sum) for (kind, key), (count, age_sum) in totals.items())
+
+    def stats(self):
+        return {
+            'open': len(self._engines),
+            'max_open': self.max_open,
+            'opened': self.opened,
+            'evicted': self.evicted,
+            'shards': sum(1 for _, state in self._map.values() if state == ACTIVE),
+        }
+
+
+# ============================================================
+# SPLIT ONLINE (COMMAND LINE, sqlite3)
+# ============================================================
+
+def _copy(connection, shard, rows):
+    """Tulis baris ke shard dan daftarkan id-nya di student_key (belum di-commit di database utama)."""
+    shard.executemany(UPSERT_SQL, rows)
+    shard.commit()
+    connection.executemany(KEY_SQL, [(row[0], row[4]) for row in rows])
+
+
+def _replay(connection, shard, owner_id, seq, limit):
+    """
+    Putar ulang satu chunk ``student_shard_log``: baris yang masih ada disalin
+    ulang, yang sudah dihapus ikut dihapus di shard. Return (seq terakhir, jumlah entri).
+    """
+    entries = connection.execute(LOG_SQL, (owner_id, seq, limit)).fetchall()
+    if not entries:
+        return seq, 0
+    rows, deleted = [], []
+    for student_id in dict.fromkeys(student_id for _, student_id in entries):
+        row = connection.execute(ROW_SQL, (student_id,)).fetchone()
+        if row is None:
+            deleted.append((student_id,))
+        else:
+            rows.append(row)
+    shard.executemany(SHARD_DELETE_SQL, deleted)
+    _copy(connection, shard, rows)
+    return entries[-1][0], len(entries)
+
+
+def split_owner(connection, owner_id, directory, chunk_size=DEFAULT_CHUNK_SIZE,
+                pause=DEFAULT_CHUNK_PAUSE_MS / 1000):
+    """
+    Pindahkan student milik ``owner_id`` dari database utama (koneksi sqlite3)
+    ke shard-nya tanpa menghentikan aplikasi.
+
+    Returns:
+        dict shard, copied, replayed, switch_ms; None jika owner sudah pindah
+    """
+    state = connection.execute(STATE_SQL, (owner_id,)).fetchone()
+    if state is not None and state[1] == ACTIVE:
+        return None
+    # Trigger log harus sudah ada sebelum entri 'copying' dibuat
+    install_triggers(connection)
+    if state is None:
+        connection.execute(START_SQL, (owner_id, shard_name(owner_id)))
+        connection.commit()
+        state = connection.execute(STATE_SQL, (owner_id,)).fetchone()
+    name = state[0]
+    os.makedirs(directory, exist_ok=True)
+    shard = open_shard(os.path.join(directory, name))
+    try:
+        # 2. Salin per chunk id; perubahan setelah langkah 1 tercatat di log
+        copied, last_id = 0, 0
+        while True:
+            rows = connection.execute(COPY_SQL, (owner_id, last_id, chunk_size)).fetchall()
+            if not rows:
+                break
+            _copy(connection, shard, rows)
+            connection.commit()
+            copied += len(rows)
+            last_id = rows[-1][0]
+            time.sleep(pause)
+
+        # 3. Kejar perubahan selama penyalinan
+        seq, replayed = 0, 0
+        for _ in range(MAX_CATCHUP_ROUNDS):
+            seq, count = _replay(connection, shard, owner_id, seq, chunk_size)
+            connection.commit()
+            replayed += count
+            if count < chunk_size:
+                break
+
+        # 4. Switch: writer database utama menunggu sampai transaksi ini selesai
+        started = time.perf_counter()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            while True:
+                seq, count = _replay(connection, shard, owner_id, seq, chunk_size)
+                replayed += count
+                if count < chunk_size:
+                    break
+            connection.execute(ACTIVATE_SQL, (owner_id,))
+            connection.execute(DRAIN_SQL, (owner_id,))
+            connection.execute(CLEAR_LOG_SQL, (owner_id,))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        switch_ms = (time.perf_counter() - started) * 1000
+    finally:
+        shard.close()
+    logger.info("Owner %s -> %s: %d baris disalin, %d perubahan diputar ulang, switch %.1f ms",
+                owner_id, name, copied, replayed, switch_ms)
+    return {'shard': name, 'copied': copied, 'replayed': replayed, 'switch_ms': switch_ms}
+
+
+def pending_owners(connection):
+    """Owner yang masih punya baris di database utama."""
+    return [row[0] for row in connection.execute(OWNERS_SQL)]
+
+
+def shard_map(connection):
+    """Isi shard map: list (owner_id, shard, state)."""
+    return connection.execute(MAP_SQL).fetchall()
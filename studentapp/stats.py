@@ -0,0 +1,114 @@
+"""
+Agregat student per grade, kelompok umur, dan owner untuk ``GET /stats``.
+
+Tabel ``student_stats`` (migrasi 6) berisi satu baris per kombinasi
+(owner_id, grade, kelompok umur 10 tahun) dengan ``count`` dan ``age_sum``.
+Trigger di tabel ``student`` menjaga isinya di setiap INSERT/UPDATE/DELETE,
+jadi semua jalur tulis (route, import massal, write-behind, proses lain) ikut
+ter-update tanpa perubahan di route. ``/stats`` cukup membaca tabel kecil ini:
+biayanya sebanding dengan jumlah bucket, bukan jumlah student.
+
+Jika agregat pernah tidak konsisten (mis. data diubah dengan trigger
+dinonaktifkan), ``python -m studentapp rebuild-stats`` menghitung ulang dari
+tabel ``student`` dalam satu kali scan. ``--check`` hanya melaporkan selisih.
+"""
+
+AGE_BUCKET_WIDTH = 10
+# owner_id NULL (app.py / app_secured.py) disimpan sebagai 0
+NO_OWNER = 0
+
+# Rekap per dimensi dihitung SQLite dari tabel agregat: ('grade'|'age'|'owner', key, count, age_sum)
+SUMMARY_SQL = (
+    "SELECT 'grade', grade, SUM(count), SUM(age_sum) FROM student_stats GROUP BY grade "
+    "UNION ALL SELECT 'age', age_bucket, SUM(count), SUM(age_sum) FROM student_stats GROUP BY age_bucket "
+    "UNION ALL SELECT 'owner', owner_id, SUM(count), SUM(age_sum) FROM student_stats GROUP BY owner_id"
+)
+OWNER_SUMMARY_SQL = (
+    "SELECT 'grade', grade, SUM(count), SUM(age_sum) FROM student_stats WHERE owner_id = :owner_id GROUP BY grade "
+    "UNION ALL SELECT 'age', age_bucket, SUM(count), SUM(age_sum) FROM student_stats WHERE owner_id = :owner_id "
+    "GROUP BY age_bucket"
+)
+STORED_SQL = "SELECT owner_id, grade, age_bucket, count, age_sum FROM student_stats"
+
+# Agregat dihitung langsung dari student (satu scan, GROUP BY di SQLite)
+RECOUNT_SQL = (
+    "SELECT COALESCE(owner_id, 0) AS owner_id, grade, age / 10 * 10 AS age_bucket, "
+    "COUNT(*) AS count, SUM(age) AS age_sum FROM student GROUP BY 1, 2, 3"
+)
+CLEAR_SQL = "DELETE FROM student_stats"
+REBUILD_SQL = (
+    "INSERT INTO student_stats (owner_id, grade, age_bucket, count, age_sum) "
+    "SELECT COALESCE(owner_id, 0), grade, age / 10 * 10, COUNT(*), SUM(age) FROM student GROUP BY 1, 2, 3"
+)
+
+
+def _bucket_label(age_bucket):
+    return f'{age_bucket}-{age_bucket + AGE_BUCKET_WIDTH - 1}'
+
+
+def summarize(rows, include_owners=True):
+    """
+    Susun laporan dari baris ``SUMMARY_SQL``/``OWNER_SUMMARY_SQL``.
+
+    Returns:
+        dict total, age_avg, by_grade, by_age, dan (opsional) by_owner
+    """
+    groups = {'grade': [], 'age': [], 'owner': []}
+    for kind, key, count, age_sum in rows:
+        groups[kind].append((key, count, age_sum))
+
+    total = sum(count for _, count, _ in groups['grade'])
+    age_sum = sum(age_sum for _, _, age_sum in groups['grade'])
+    report = {
+        'total': total,
+        'age_avg': round(age_sum / total, 2) if total else None,
+        'by_grade': {grade: count for grade, count, _ in sorted(groups['grade'])},
+        'by_age': {_bucket_label(bucket): count for bucket, count, _ in sorted(groups['age'])},
+    }
+    if include_owners:
+        report['by_owner'] = [{'owner_id': owner_id if owner_id != NO_OWNER else None, 'count': count}
+                              for owner_id, count, _ in sorted(groups['owner'])]
+    return report
+
+
+def report(session, owner_id=None):
+    """Laporan untuk semua student, atau hanya milik ``owner_id``."""
+    from sqlalchemy import text  # rebuild-stats (CLI) tidak butuh SQLAlchemy
+
+    if owner_id is None:
+        return summarize(session.execute(text(SUMMARY_SQL)))
+    rows = session.execute(text(OWNER_SUMMARY_SQL), {"owner_id": owner_id})
+    return summarize(rows, include_owners=False)
+
+
+def rebuild(connection):
+    """Hitung ulang ``student_stats`` dari tabel student (sqlite3). Return jumlah bucket."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(CLEAR_SQL)
+        cursor.execute(REBUILD_SQL)
+        buckets = cursor.rowcount
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return buckets
+
+
+def differences(connection):
+    """
+    Bandingkan ``student_stats`` dengan hasil hitung ulang tanpa mengubah apa pun.
+
+    Returns:
+        list (owner_id, grade, age_bucket, (count, age_sum) tersimpan, (count, age_sum) seharusnya)
+    """
+    stored = {row[:3]: row[3:] for row in connection.execute(STORED_SQL)}
+    expected = {row[:3]: row[3:] for row in connection.execute(RECOUNT_SQL)}
+    diffs = []
+    for key in sorted(stored.keys() | expected.keys(), key=repr):
+        if stored.get(key) != expected.get(key):
+            diffs.append(key + (stored.get(key), expected.get(key)))
+    return diffs
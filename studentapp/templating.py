@@ -0,0 +1,94 @@
+"""
+Bytecode cache Jinja di disk dan fragment cache per baris tabel student.
+
+Bytecode cache: hasil compile template disimpan di
+``TEMPLATE_BYTECODE_CACHE_DIR`` (default ``instance/jinja-cache``), jadi proses
+baru (restart, worker baru) tidak perlu parse + compile ulang semua template
+sebelum render pertama. Jinja memvalidasi entry dengan checksum sumber template,
+jadi template yang diubah otomatis di-compile ulang.
+
+Fragment cache: markup ``<tr>`` satu student dirender lewat macro
+``templates/_student_row.html`` dan disimpan di LRU dengan key isi baris
+(id, name, age, grade). Tabel ``student`` tidak punya kolom versi per baris;
+isi baris itu sendiri berfungsi sebagai versi, jadi edit otomatis menghasilkan
+key baru dan entry lama tersingkir oleh LRU. Markup statis (head, form, header
+tabel) tidak perlu di-cache: Jinja sudah meng-compile-nya menjadi konstanta
+string di bytecode.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import FileSystemBytecodeCache
+
+ROW_TEMPLATE = '_student_row.html'
+DEFAULT_ROW_CACHE_SIZE = 10000
+
+
+class RowFragmentCache:
+    """LRU (id, name, age, grade) -> Markup ``<tr>``, aman dipakai banyak thread."""
+
+    def __init__(self, jinja_env, maxsize=DEFAULT_ROW_CACHE_SIZE):
+        self.jinja_env = jinja_env
+        self.maxsize = maxsize
+        self._macro = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _render(self, student):
+        if self._macro is None:
+            self._macro = self.jinja_env.get_template(ROW_TEMPLATE).module.student_row
+        return self._macro(student)
+
+    def render(self, student):
+        if not self.maxsize:
+            return self._render(student)
+        key = (student.id, student.name, student.age, student.grade)
+        with self._lock:
+            markup = self._data.get(key)
+            if markup is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return markup
+            self.misses += 1
+        markup = self._render(student)
+        with self._lock:
+            self._data[key] = markup
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return markup
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._macro = None
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._data), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def init_app(app):
+    """
+    Pasang bytecode cache dan ``student_row()`` di Jinja.
+
+    Konfigurasi:
+        TEMPLATE_BYTECODE_CACHE_DIR: folder cache (None = nonaktif)
+        TEMPLATE_ROW_CACHE_SIZE: jumlah fragment baris (0 = tanpa fragment cache)
+    """
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja-cache'))
+    app.config.setdefault('TEMPLATE_ROW_CACHE_SIZE', DEFAULT_ROW_CACHE_SIZE)
+
+    cache_dir = app.config['TEMPLATE_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    rows = RowFragmentCache(app.jinja_env, app.config['TEMPLATE_ROW_CACHE_SIZE'] or 0)
+    app.jinja_env.globals['student_row'] = rows.render
+    app.extensions['studentapp_row_fragments'] = rows
+    return rows
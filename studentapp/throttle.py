@@ -0,0 +1,79 @@
+"""
+Throttle login dengan token bucket di memori, per IP dan per username.
+
+Dicek sebelum query user dan sebelum hashing, jadi percobaan yang ditolak
+hanya memakan satu lookup dict. Bucket IP berkurang di setiap percobaan;
+bucket username hanya berkurang saat password salah, supaya login yang
+berhasil (mis. banyak tab/perangkat) tidak mengunci akun sendiri.
+
+Bucket disimpan di LRU berukuran tetap supaya banjir IP/username acak tidak
+menghabiskan memori. State per proses: dengan ``studentapp serve --workers N``
+batas efektif maksimal N kali lipat.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# (kapasitas burst, token per detik)
+DEFAULT_IP_RATE = (20, 1.0)
+DEFAULT_USER_RATE = (5, 0.2)
+DEFAULT_MAXSIZE = 100000
+
+
+class TokenBuckets:
+    """Kumpulan token bucket per key dengan kapasitas dan laju isi ulang yang sama."""
+
+    def __init__(self, capacity, refill_per_second, maxsize=DEFAULT_MAXSIZE):
+        self.capacity = capacity
+        self.refill = refill_per_second
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None, consume=True):
+        """
+        Ambil satu token (atau hanya cek jika ``consume=False``).
+        Return 0 jika boleh, atau detik sampai token berikutnya tersedia.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.refill)
+            if tokens >= 1:
+                retry_after = 0
+                if consume:
+                    tokens -= 1
+            else:
+                retry_after = (1 - tokens) / self.refill
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+
+class LoginThrottle:
+    def __init__(self, ip_rate=DEFAULT_IP_RATE, user_rate=DEFAULT_USER_RATE, maxsize=DEFAULT_MAXSIZE):
+        self.by_ip = TokenBuckets(*ip_rate, maxsize=maxsize)
+        self.by_user = TokenBuckets(*user_rate, maxsize=maxsize)
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Config: LOGIN_THROTTLE_IP, LOGIN_THROTTLE_USER = (burst, token per detik)."""
+        return cls(config.get('LOGIN_THROTTLE_IP', DEFAULT_IP_RATE),
+                   config.get('LOGIN_THROTTLE_USER', DEFAULT_USER_RATE))
+
+    def check(self, ip, username):
+        """0 jika percobaan login boleh diproses, selain itu nilai Retry-After (detik)."""
+        now = time.monotonic()
+        retry_after = self.by_ip.take(ip, now)
+        if not retry_after:
+            retry_after = self.by_user.take(username.lower(), now, consume=False)
+        if retry_after:
+            self.rejected += 1
+        return retry_after
+
+    def failed(self, username):
+        """Catat password salah untuk username ini."""
+        self.by_user.take(username.lower())
@@ -0,0 +1,162 @@
+"""
+Fungsi validasi input bersama untuk app_secured.py dan app_secured_idor.py.
+
+Pattern regex dikompilasi sekali saat import, daftar grade disimpan sebagai
+frozenset, dan setiap field hanya diperiksa satu kali. ``validate_batch``
+memvalidasi banyak record sekaligus (untuk import massal / API) tanpa
+overhead pemanggilan fungsi per field. Pesan error sama persis dengan
+versi per-field.
+"""
+
+import re
+from functools import lru_cache
+
+DEFAULT_PATTERN = r'^[a-zA-Z0-9\s\-\.]+$'
+DEFAULT_MAX_LENGTH = 100
+
+# Urutan dipertahankan untuk pesan error
+GRADE_CHOICES = ('A', 'B', 'C', 'D', 'E', 'F', 'A+', 'A-', 'B+', 'B-', 'C+', 'C-', 'D+', 'D-')
+VALID_GRADES = frozenset(GRADE_CHOICES)
+GRADE_ERROR = f"Grade harus salah satu dari: {', '.join(GRADE_CHOICES)}"
+
+MIN_AGE = 1
+MAX_AGE = 150
+
+_DEFAULT_MATCH = re.compile(DEFAULT_PATTERN).match
+
+
+@lru_cache(maxsize=32)
+def _matcher(pattern):
+    return re.compile(pattern).match
+
+
+def validate_input(value, field_name, max_length=DEFAULT_MAX_LENGTH, allowed_pattern=DEFAULT_PATTERN):
+    """
+    Validasi input untuk mencegah SQL Injection dan serangan lainnya
+
+    Args:
+        value: nilai input dari user
+        field_name: nama field untuk pesan error
+        max_length: panjang maksimum yang diizinkan
+        allowed_pattern: regex pattern karakter yang diizinkan
+
+    Returns:
+        string yang sudah divalidasi
+
+    Raises:
+        ValueError jika input tidak valid
+    """
+    if not value:
+        raise ValueError(f"{field_name} tidak boleh kosong")
+
+    # Batasi panjang input
+    if len(value) > max_length:
+        raise ValueError(f"{field_name} maksimal {max_length} karakter")
+
+    # Cek karakter yang diizinkan
+    if allowed_pattern == DEFAULT_PATTERN:
+        # Pattern default sudah menolak < dan >, tidak perlu scan kedua
+        if not _DEFAULT_MATCH(value):
+            raise ValueError(f"{field_name} mengandung karakter tidak valid")
+    else:
+        if not _matcher(allowed_pattern)(value):
+            raise ValueError(f"{field_name} mengandung karakter tidak valid")
+        # Blokir karakter berbahaya untuk XSS
+        if '<' in value or '>' in value:
+            raise ValueError(f"{field_name} mengandung karakter berbahaya")
+
+    return value.strip()
+
+
+def validate_id(id_value):
+    """
+    Validasi ID harus berupa integer positif
+    """
+    try:
+        id_int = int(id_value)
+    except (ValueError, TypeError):
+        raise ValueError("ID tidak valid")
+    if id_int <= 0:
+        raise ValueError("ID tidak valid")
+    return id_int
+
+
+def validate_age(age_value):
+    """
+    Validasi umur harus integer antara 1-150
+    """
+    try:
+        age_int = int(age_value)
+    except (ValueError, TypeError):
+        raise ValueError("Umur tidak valid")
+    if age_int < MIN_AGE or age_int > MAX_AGE:
+        raise ValueError("Umur tidak valid")
+    return age_int
+
+
+def validate_grade(grade_value):
+    """
+    Validasi grade hanya A, B, C, D, E, F (dengan +/-)
+    """
+    grade = grade_value.strip().upper()
+    if grade not in VALID_GRADES:
+        raise ValueError(GRADE_ERROR)
+    return grade
+
+
+def validate_batch(records, max_length=DEFAULT_MAX_LENGTH):
+    """
+    Validasi banyak record student (dict dengan key name, age, grade) sekaligus.
+
+    Aturan dan pesan error sama dengan validate_input('Name') /
+    validate_age / validate_grade, tetapi dijalankan inline dalam satu loop.
+
+    Returns:
+        tuple (rows, errors):
+            rows: list (index, (name, age, grade)) untuk record yang valid
+            errors: list (index, pesan_error) untuk record yang tidak valid
+    """
+    rows = []
+    errors = []
+    append_row = rows.append
+    append_error = errors.append
+    match = _DEFAULT_MATCH
+    grades = VALID_GRADES
+    min_age, max_age = MIN_AGE, MAX_AGE
+    name_too_long = f"Name maksimal {max_length} karakter"
+
+    for index, record in enumerate(records):
+        get = record.get
+        name = get('name')
+        if name.__class__ is not str:
+            # Record JSON bisa berisi angka/null untuk field teks
+            name = str(name or '')
+        if not name:
+            append_error((index, "Name tidak boleh kosong"))
+            continue
+        if len(name) > max_length:
+            append_error((index, name_too_long))
+            continue
+        if not match(name):
+            append_error((index, "Name mengandung karakter tidak valid"))
+            continue
+
+        try:
+            age = int(get('age'))
+        except (ValueError, TypeError):
+            append_error((index, "Umur tidak valid"))
+            continue
+        if age < min_age or age > max_age:
+            append_error((index, "Umur tidak valid"))
+            continue
+
+        grade = get('grade')
+        if grade.__class__ is not str:
+            grade = str(grade or '')
+        grade = grade.strip().upper()
+        if grade not in grades:
+            append_error((index, GRADE_ERROR))
+            continue
+
+        append_row((index, (name.strip(), age, grade)))
+    return rows, errors
@@ -0,0 +1,247 @@
+"""
+Write-behind queue untuk mutation student (add/edit/delete) dengan group commit.
+
+Mode ini opsional (``STUDENTS_WRITE_BEHIND = True`` atau environment variable
+``STUDENTS_WRITE_BEHIND=1``). Route tetap melakukan validasi dan pengecekan
+ownership seperti biasa, lalu menaruh statement SQL yang sudah final ke queue.
+Satu writer thread per proses mengambil semua mutation yang sedang antri dan
+menjalankannya dalam SATU transaksi (``BEGIN IMMEDIATE`` ... ``COMMIT``),
+sehingga N request berbagi satu commit alih-alih N commit.
+
+Setiap mutation dibungkus SAVEPOINT: mutation yang gagal (mis. constraint)
+di-rollback sendiri tanpa menggagalkan mutation lain dalam batch yang sama.
+
+Durability per request (header ``X-Write-Durability`` atau field
+``durability``; default ``STUDENTS_WRITE_DURABILITY``):
+    commit  request menunggu sampai batch-nya di-commit (hasil & error sama
+            seperti mode sinkron)
+    async   fire-and-forget: request langsung selesai, error hanya dicatat di log
+
+Callback ``on_commit(rows)`` dijalankan writer thread setelah commit, jadi
+invalidasi cache listing tidak mendahului data yang ditulis.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+
+from studentapp import database
+
+logger = logging.getLogger(__name__)
+
+ENABLE_ENV = 'STUDENTS_WRITE_BEHIND'
+DURABILITY_HEADER = 'X-Write-Durability'
+COMMIT = 'commit'
+ASYNC = 'async'
+DURABILITY_CHOICES = (COMMIT, ASYNC)
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_QUEUE = 10000
+# 0: tanpa menunggu; batch berisi semua yang antri selama commit sebelumnya
+DEFAULT_MAX_DELAY_MS = 0
+# Batas tunggu saat queue penuh (backpressure) atau menunggu commit (detik)
+ENQUEUE_TIMEOUT = 1.0
+COMMIT_TIMEOUT = 30.0
+
+_STOP = object()
+_queues = weakref.WeakSet()
+
+
+class QueueFull(Exception):
+    """Queue write-behind penuh; request sebaiknya dijawab 503."""
+
+
+class _Mutation:
+    __slots__ = ('sql', 'params', 'on_commit', 'wait', 'future')
+
+    def __init__(self, sql, params, on_commit, wait):
+        self.sql = sql
+        self.params = params
+        self.on_commit = on_commit
+        self.wait = wait
+        self.future = Future()
+
+
+def durability(request):
+    """Pilihan durability request ini ('commit'/'async'), None = default queue."""
+    value = request.headers.get(DURABILITY_HEADER) or request.values.get('durability')
+    value = (value or '').strip().lower()
+    return value if value in DURABILITY_CHOICES else None
+
+
+class WriteBehindQueue:
+    """Queue mutation + satu writer thread dengan koneksi sqlite3 sendiri."""
+
+    def __init__(self, path, max_batch=DEFAULT_MAX_BATCH, max_queue=DEFAULT_MAX_QUEUE,
+                 max_delay_ms=DEFAULT_MAX_DELAY_MS, default_durability=COMMIT):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_delay = max_delay_ms / 1000.0
+        self.default_durability = default_durability
+        self._reset()
+        _queues.add(self)
+        # Thread tidak ikut fork (studentapp serve): worker memulai writer sendiri
+        os.register_at_fork(after_in_child=self._reset)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        None jika write-behind tidak aktif. Config: STUDENTS_WRITE_BEHIND,
+        STUDENTS_WRITE_DURABILITY, STUDENTS_WRITE_BATCH, STUDENTS_WRITE_QUEUE,
+        STUDENTS_WRITE_MAX_DELAY_MS, STUDENTS_DB_PATH (dari database.configure).
+        """
+        enabled = os.environ.get(ENABLE_ENV)
+        enabled = enabled not in ('', '0', 'false') if enabled is not None else config.get(ENABLE_ENV)
+        if not enabled:
+            return None
+        return cls(config['STUDENTS_DB_PATH'],
+                   config.get('STUDENTS_WRITE_BATCH', DEFAULT_MAX_BATCH),
+                   config.get('STUDENTS_WRITE_QUEUE', DEFAULT_MAX_QUEUE),
+                   config.get('STUDENTS_WRITE_MAX_DELAY_MS', DEFAULT_MAX_DELAY_MS),
+                   config.get('STUDENTS_WRITE_DURABILITY', COMMIT))
+
+    def _reset(self):
+        self._queue = queue.Queue(self.max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.mutations = 0
+        self.failed = 0
+        self.last_batch_size = 0
+        self.max_batch_seen = 0
+
+    def _ensure_writer(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='studentapp-writer', daemon=True)
+                    self._thread.start()
+
+    # ============================================================
+    # API UNTUK ROUTE
+    # ============================================================
+
+    def submit(self, sql, params=(), on_commit=None, wait=True):
+        """Masukkan mutation ke queue. Return Future berisi baris hasil (RETURNING)."""
+        self._ensure_writer()
+        mutation = _Mutation(sql, params, on_commit, wait)
+        try:
+            self._queue.put(mutation, timeout=ENQUEUE_TIMEOUT)
+        except queue.Full:
+            raise QueueFull() from None
+        return mutation.future
+
+    def execute(self, sql, params=(), on_commit=None, durability=None):
+        """
+        Jalankan mutation lewat queue. Mode 'commit': tunggu commit lalu kembalikan
+        baris hasil (exception sqlite3 diteruskan). Mode 'async': return None.
+        """
+        wait = (durability or self.default_durability) == COMMIT
+        future = self.submit(sql, params, on_commit, wait)
+        return future.result(timeout=COMMIT_TIMEOUT) if wait else None
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {'depth': self.depth(), 'max_queue': self.max_queue, 'batches': self.batches,
+                'mutations': self.mutations, 'failed': self.failed,
+                'last_batch_size': self.last_batch_size, 'max_batch_size': self.max_batch_seen}
+
+    def flush(self, timeout=COMMIT_TIMEOUT):
+        """Tunggu semua mutation yang sudah antri di-commit, lalu hentikan writer."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    # ============================================================
+    # WRITER THREAD
+    # ============================================================
+
+    def _next_batch(self):
+        """Blok sampai ada mutation, lalu ambil yang antri (maks. max_batch)."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        connection = database.connect(self.path)
+        try:
+            stop = False
+            while not stop:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._commit(connection, batch)
+        finally:
+            connection.close()
+
+    def _commit(self, connection, batch):
+        results = []
+        cursor = connection.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for mutation in batch:
+                cursor.execute('SAVEPOINT mutation')
+                try:
+                    cursor.execute(mutation.sql, mutation.params)
+                    results.append((mutation, cursor.fetchall(), None))
+                    cursor.execute('RELEASE mutation')
+                except sqlite3.Error as e:
+                    cursor.execute('ROLLBACK TO mutation')
+                    cursor.execute('RELEASE mutation')
+                    results.append((mutation, None, e))
+            connection.commit()
+        except sqlite3.Error as e:
+            connection.rollback()
+            results = [(mutation, None, e) for mutation in batch]
+        finally:
+            cursor.close()
+
+        self.batches += 1
+        self.mutations += len(batch)
+        self.last_batch_size = len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        for mutation, rows, error in results:
+            if error is not None:
+                self.failed += 1
+                if not mutation.wait:
+                    logger.warning("write-behind gagal: %s (%s)", error, mutation.sql)
+                mutation.future.set_exception(error)
+                continue
+            if mutation.on_commit is not None:
+                try:
+                    mutation.on_commit(rows)
+                except Exception:
+                    logger.exception("callback on_commit write-behind gagal")
+            mutation.future.set_result(rows)
+
+
+def flush_all():
+    """Commit semua mutation yang masih antri (dipanggil saat proses berhenti)."""
+    for write_queue in list(_queues):
+        write_queue.flush()
+
+
+atexit.register(flush_all)